@@ -1,10 +1,13 @@
-import duckdb
+import os
+import sys
 
-DB_FILE = 'petitions.duckdb'
+# Read-only local replica of the cloud DB (etl/replica.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'etl'))
+from replica import open_replica
 
 def run_analytics():
-    print(f"Connecting to {DB_FILE}...\n")
-    con = duckdb.connect(DB_FILE)
+    con = open_replica()
+    print()
 
     # 1. Total Count by Source
     print("📊 TOTAL PETITIONS BY SOURCE:")
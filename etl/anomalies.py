@@ -0,0 +1,280 @@
+"""
+Vote-spike detector: flags petitions whose daily gain is far above their own
+usual gain (bot-driven surges, mass mailings, scrape glitches).
+
+Every tracked petition keeps a robust location and scale of its daily gain
+in `vote_stats`. A day's gain is scored as
+
+    z = (gain - location) / scale
+
+and flagged when z >= Z_THRESHOLD and the gain is at least MIN_SPIKE votes.
+Then the statistics take the day in with a Huber-clipped exponentially
+weighted update, so a spike moves them by at most HUBER_C scales and keeps
+standing out on the following days.
+
+Each sync only reads the new day's votes_history rows and the statistics
+table; the history is scanned once, when `vote_stats` is empty: the median
+and MAD of the last WARMUP_DAYS gains of every petition are computed in one
+vectorized pass (a lexsort by petition and gain, no per-petition loop).
+
+Tables:
+    vote_stats - per petition: last recorded votes, robust location/scale of
+                 the daily gain, number of gains seen
+    anomalies  - flagged (day, petition) gains with their z-score
+
+Usage:
+    python anomalies.py                     # Score the latest history day (local DB)
+    python anomalies.py --day 2026-03-20    # Score one day
+    python anomalies.py --rebuild           # Re-seed the statistics from history
+    python anomalies.py --cloud ...         # Same, against MotherDuck
+"""
+
+import os
+import sys
+import math
+import argparse
+
+import duckdb
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from votes_store import init_votes_tables, latest_day
+from typed_schema import SOURCE_TYPE
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(BASE_DIR, 'petitions.duckdb')
+
+Z_THRESHOLD = 6.0
+MIN_SPIKE = 200
+# Gains a petition needs before it can be flagged
+MIN_GAINS = 5
+WARMUP_DAYS = 28
+# Exponential weighting: span of the moving statistics, in days
+SPAN = 14
+ALPHA = 2 / (SPAN + 1)
+HUBER_C = 2.0
+# E|clip(Z, -c, c)| for a standard normal Z: keeps the scale a standard deviation
+HUBER_ABS_MEAN = (math.sqrt(2 / math.pi) * (1 - math.exp(-HUBER_C ** 2 / 2))
+                  + HUBER_C * math.erfc(HUBER_C / math.sqrt(2)))
+MAD_TO_SD = 1.4826
+
+
+def init_anomaly_tables(con):
+    """Creates the detector tables if they don't exist."""
+    init_votes_tables(con)
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS vote_stats (
+            source {SOURCE_TYPE},
+            petition_id INTEGER,
+            last_date DATE,
+            last_votes INTEGER,
+            location DOUBLE,
+            scale DOUBLE,
+            gains INTEGER,
+            PRIMARY KEY (source, petition_id)
+        )
+    """)
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS anomalies (
+            date DATE,
+            source {SOURCE_TYPE},
+            petition_id INTEGER,
+            votes INTEGER,
+            gain DOUBLE,                 -- votes per day since the previous record
+            expected DOUBLE,
+            scale DOUBLE,
+            z DOUBLE,
+            PRIMARY KEY (date, source, petition_id)
+        )
+    """)
+
+
+def scale_floor(location):
+    """Lower bound of the scale: Poisson noise of the expected gain, at least 1 vote."""
+    return np.maximum(np.sqrt(np.maximum(location, 0)), 1.0)
+
+
+def grouped_median(g, values, n):
+    """Median of `values` within each of the `n` groups `g` (groups without values get 0)."""
+    order = np.lexsort((values, g))
+    counts = np.bincount(g, minlength=n)
+    starts = np.r_[0, np.cumsum(counts)[:-1]]
+    sorted_values = values[order]
+    lo = sorted_values[np.minimum(starts + (counts - 1) // 2, len(values) - 1)]
+    hi = sorted_values[np.minimum(starts + counts // 2, len(values) - 1)]
+    return np.where(counts > 0, (lo + hi) / 2, 0.0)
+
+
+def seed_stats(con, day):
+    """
+    Rebuilds vote_stats from the WARMUP_DAYS of history before `day`:
+    location = median gain, scale = MAD of the gains (as a standard deviation).
+    """
+    rows = con.execute(f"""
+        SELECT dense_rank() OVER (ORDER BY source, petition_id) - 1 AS g,
+               CAST(source AS VARCHAR) AS source, petition_id, date, CAST(date - CAST($day AS DATE) AS INTEGER) AS t, votes
+        FROM votes_between(CAST($day AS DATE) - {WARMUP_DAYS}, CAST($day AS DATE) - 1)
+        WHERE votes IS NOT NULL
+        ORDER BY g, t
+    """, {"day": str(day)}).fetchnumpy()
+    con.execute("DELETE FROM vote_stats")
+    g = rows["g"].astype(np.int64)
+    if len(g) == 0:
+        return 0
+    n = int(g[-1]) + 1
+    t = rows["t"].astype(np.int64)
+    votes = rows["votes"].astype(np.float64)
+
+    ok = (g[1:] == g[:-1]) & (np.diff(t) > 0)
+    gg = g[1:][ok]
+    gains = np.diff(votes)[ok] / np.diff(t)[ok]
+    location = grouped_median(gg, gains, n)
+    mad = grouped_median(gg, np.abs(gains - location[gg]), n)
+
+    last = np.r_[g[1:] != g[:-1], True]
+    batch = {
+        "source": rows["source"][last],
+        "petition_id": rows["petition_id"][last],
+        "last_date": rows["date"][last],
+        "last_votes": votes[last].astype(np.int64),
+        "location": location,
+        "scale": np.maximum(MAD_TO_SD * mad, scale_floor(location)),
+        "gains": np.bincount(gg, minlength=n),
+    }
+    con.execute("""
+        INSERT INTO vote_stats
+        SELECT source, petition_id, last_date, last_votes, location, scale, gains FROM batch
+    """)
+    return n
+
+
+def score_day(con, day):
+    """
+    Scores the gains recorded on `day` against vote_stats, stores the outliers
+    in `anomalies` and rolls the statistics forward. Petitions whose
+    statistics are already at `day` (a re-run) are left alone.
+    Returns the number of petitions scored.
+    """
+    rows = con.execute("""
+        SELECT CAST(v.source AS VARCHAR) AS source, v.petition_id, v.votes,
+               s.last_votes IS NULL AS is_new,
+               COALESCE(s.last_votes, v.votes) AS last_votes,
+               COALESCE(CAST(v.date - s.last_date AS INTEGER), 1) AS gap,
+               COALESCE(s.location, 0) AS location,
+               COALESCE(s.scale, 1) AS scale,
+               COALESCE(s.gains, 0) AS gains
+        FROM votes_between(?, ?) v
+        LEFT JOIN vote_stats s ON s.source = v.source AND s.petition_id = v.petition_id
+        WHERE v.votes IS NOT NULL
+          AND (s.last_date IS NULL OR s.last_date < v.date)
+    """, [str(day), str(day)]).fetchnumpy()
+    if len(rows["votes"]) == 0:
+        return 0
+
+    votes = rows["votes"].astype(np.int64)
+    is_new = rows["is_new"].astype(bool)
+    location = rows["location"].astype(np.float64)
+    scale = rows["scale"].astype(np.float64)
+    seen = rows["gains"].astype(np.int64)
+    gain = (votes - rows["last_votes"]) / np.maximum(rows["gap"], 1)
+
+    z = (gain - location) / scale
+    flagged = ~is_new & (seen >= MIN_GAINS) & (z >= Z_THRESHOLD) & (gain >= MIN_SPIKE)
+    if flagged.any():
+        batch = {
+            "source": rows["source"][flagged],
+            "petition_id": rows["petition_id"][flagged],
+            "votes": votes[flagged],
+            "gain": gain[flagged],
+            "expected": location[flagged],
+            "scale": scale[flagged],
+            "z": np.round(z[flagged], 2),
+        }
+        con.execute("""
+            INSERT OR REPLACE INTO anomalies
+            SELECT CAST(? AS DATE), source, petition_id, votes, gain, expected, scale, z FROM batch
+        """, [str(day)])
+
+    # Huber-clipped EW update; the first gains are averaged (weight 1/n) so a
+    # new petition's statistics settle quickly. A petition seen for the first
+    # time has no gain yet, only its votes are recorded.
+    psi = np.clip(z, -HUBER_C, HUBER_C)
+    weight = np.maximum(ALPHA, 1 / (seen + 1))
+    first = seen == 0
+    new_location = np.where(first, gain, location + weight * psi * scale)
+    new_scale = np.where(first, scale_floor(gain),
+                         (1 - weight) * scale + weight * scale * np.abs(psi) / HUBER_ABS_MEAN)
+    new_location = np.where(is_new, 0.0, new_location)
+    batch = {
+        "source": rows["source"],
+        "petition_id": rows["petition_id"],
+        "votes": votes,
+        "location": new_location,
+        "scale": np.where(is_new, 1.0, np.maximum(new_scale, scale_floor(new_location))),
+        "gains": np.where(is_new, 0, seen + 1),
+    }
+    con.execute("""
+        INSERT OR REPLACE INTO vote_stats
+        SELECT source, petition_id, CAST(? AS DATE), votes, location, scale, gains FROM batch
+    """, [str(day)])
+    return len(votes)
+
+
+def day_anomalies(con, day):
+    """Anomalies flagged on `day`, biggest z first, with the petition titles."""
+    rows = con.execute("""
+        SELECT a.source, a.petition_id, p.title, p.url, a.votes, a.gain, a.expected, a.z
+        FROM anomalies a
+        LEFT JOIN petitions p ON p.source = a.source AND p.external_id = a.petition_id
+        WHERE a.date = CAST(? AS DATE)
+        ORDER BY a.z DESC
+    """, [str(day)]).fetchall()
+    return [{
+        "source": r[0], "id": r[1], "title": r[2], "url": r[3], "votes": r[4],
+        "gain": int(round(r[5])), "expected": int(round(r[6])), "z": r[7]
+    } for r in rows]
+
+
+def detect_anomalies(con, day):
+    """
+    Called once per sync after votes_history has been written for `day`.
+    Seeds the statistics from history the first time. Returns day_anomalies().
+    """
+    init_anomaly_tables(con)
+    if con.execute("SELECT COUNT(*) FROM vote_stats").fetchone()[0] == 0:
+        seeded = seed_stats(con, day)
+        print(f"   vote_stats was empty, seeded {seeded} petitions from {WARMUP_DAYS} days of history.")
+    scored = score_day(con, day)
+    found = day_anomalies(con, day)
+    print(f"   ✅ anomalies: {scored} gains scored, {len(found)} flagged for {day}.")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag abnormal vote gains")
+    parser.add_argument("--day", help="Score this day (YYYY-MM-DD), default latest history day")
+    parser.add_argument("--rebuild", action="store_true", help="Re-seed vote_stats from history first")
+    parser.add_argument("--cloud", action="store_true", help="Run against MotherDuck instead of the local DB")
+    args = parser.parse_args()
+
+    if args.cloud:
+        from cloud_sync import get_motherduck_connection
+        con = get_motherduck_connection()
+    else:
+        con = duckdb.connect(DB_FILE)
+
+    try:
+        init_anomaly_tables(con)
+        day = args.day or latest_day(con)
+        if args.rebuild:
+            con.execute("DELETE FROM vote_stats")
+        for a in detect_anomalies(con, day):
+            print(f"   z={a['z']:6.1f}  [{a['source']}] {(a['title'] or str(a['id']))[:70]}  "
+                  f"(+{a['gain']:,}/day, usually ~{a['expected']:,})")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
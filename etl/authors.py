@@ -0,0 +1,252 @@
+"""
+Author dimension and per-author leaderboards.
+
+The raw `petitions.author` strings differ between sources and spellings
+(Cabinet authors come as "Прізвище Ім'я По-батькові", the president site
+uses other orderings, apostrophes vary). Every petition gets an `author_id`
+pointing at one row of `authors`, keyed by a normalized name:
+lowercase, apostrophes unified, punctuation dropped, tokens sorted.
+
+Tables:
+    authors       - author_id, name_key (unique), display_name
+    petitions     - gains author_id (logical FK to authors; DuckDB cannot add a
+                    FOREIGN KEY to an existing table). 0 = unknown/placeholder author.
+    author_stats  - petitions / total / max / avg votes per (author_id, source),
+                    refreshed only for authors whose petitions changed
+
+Writers that rewrite `petitions.author` (pipeline.save_to_db(), the fix
+scripts) must reset author_id to NULL so the next sync_authors() run
+re-resolves it. The author the petition had before is found by its
+author_stats row no longer matching petitions, and is refreshed too.
+
+Usage:
+    python authors.py                 # Assign new authors + refresh stats (local DB)
+    python authors.py --rebuild       # Rebuild author_stats from scratch
+    python authors.py --top 10        # Print the leaderboards
+    python authors.py --cloud ...     # Same, against MotherDuck
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rollups import init_rollup_tables, get_watermark, set_watermark
+from typed_schema import SOURCE_TYPE
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(BASE_DIR, 'petitions.duckdb')
+
+UNKNOWN_AUTHOR_ID = 0
+
+# Normalized name key of a raw author column
+NAME_KEY_SQL = """
+    array_to_string(list_sort(list_filter(string_split(
+        regexp_replace(regexp_replace(lower({col}), '[’ʼ`‘´]', '''', 'g'), '[^\\p{{L}}\\p{{N}}''-]+', ' ', 'g'),
+    ' '), t -> t != '')), ' ')
+"""
+
+# Keys that are not real people (placeholders written by the fix scripts)
+PLACEHOLDER_KEYS = ("автор невідомий",)
+
+
+def init_author_tables(con):
+    """Creates the author tables and the petitions.author_id column if missing."""
+    init_rollup_tables(con)
+    con.execute("CREATE SEQUENCE IF NOT EXISTS author_id_seq START 1")
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS authors (
+            author_id INTEGER DEFAULT nextval('author_id_seq') PRIMARY KEY,
+            name_key VARCHAR UNIQUE,
+            display_name VARCHAR
+        )
+    """)
+    con.execute("""
+        INSERT INTO authors (author_id, name_key, display_name)
+        VALUES (?, '', NULL)
+        ON CONFLICT DO NOTHING
+    """, [UNKNOWN_AUTHOR_ID])
+    con.execute("ALTER TABLE petitions ADD COLUMN IF NOT EXISTS author_id INTEGER")
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS author_stats (
+            author_id INTEGER,
+            source {SOURCE_TYPE},
+            petitions INTEGER,
+            total_votes BIGINT,
+            max_votes INTEGER,
+            avg_votes DOUBLE,
+            PRIMARY KEY (author_id, source)
+        )
+    """)
+
+
+def assign_author_ids(con):
+    """
+    Resolves author_id for petitions that have an author but no id yet
+    (new rows, or rows reset by a fix script). New names get a new authors
+    row. Returns (ids that were assigned, previous ids of reassigned rows):
+    the authors whose author_stats petition counts no longer match.
+    """
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE author_assign AS
+        SELECT source, external_id, trim(author) AS author,
+               {NAME_KEY_SQL.format(col='author')} AS name_key
+        FROM petitions
+        WHERE author_id IS NULL AND author IS NOT NULL
+    """)
+    con.execute("""
+        UPDATE author_assign SET name_key = ''
+        WHERE name_key IS NULL OR length(name_key) <= 2 OR list_contains(?, name_key)
+    """, [list(PLACEHOLDER_KEYS)])
+
+    con.execute("""
+        INSERT INTO authors (name_key, display_name)
+        SELECT name_key, mode(author)
+        FROM author_assign
+        WHERE name_key != '' AND name_key NOT IN (SELECT name_key FROM authors)
+        GROUP BY name_key
+    """)
+    con.execute("""
+        UPDATE petitions SET author_id = a.author_id
+        FROM author_assign t
+        JOIN authors a ON a.name_key = t.name_key
+        WHERE petitions.source = t.source AND petitions.external_id = t.external_id
+    """)
+    assigned = [r[0] for r in con.execute("""
+        SELECT DISTINCT a.author_id FROM author_assign t JOIN authors a ON a.name_key = t.name_key
+    """).fetchall()]
+    con.execute("DROP TABLE author_assign")
+    # The reset rows' old ids are gone from petitions; their stats still count them
+    previous = [r[0] for r in con.execute("""
+        SELECT s.author_id
+        FROM author_stats s
+        LEFT JOIN (
+            SELECT author_id, source, COUNT(*) AS petitions FROM petitions
+            WHERE author_id IS NOT NULL GROUP BY author_id, source
+        ) p USING (author_id, source)
+        WHERE p.petitions IS DISTINCT FROM s.petitions
+        GROUP BY s.author_id
+    """).fetchall()]
+    return assigned, previous
+
+
+def refresh_author_stats(con, author_ids):
+    """Recomputes author_stats rows of the given authors from petitions."""
+    if not author_ids:
+        return
+    con.execute("DELETE FROM author_stats WHERE author_id IN (SELECT UNNEST(?))", [author_ids])
+    con.execute("""
+        INSERT INTO author_stats
+        SELECT author_id, source, COUNT(*), SUM(votes), MAX(votes), AVG(votes)
+        FROM petitions
+        WHERE author_id IN (SELECT UNNEST(?)) AND author_id != ?
+        GROUP BY author_id, source
+    """, [author_ids, UNKNOWN_AUTHOR_ID])
+
+
+def rebuild_author_stats(con):
+    """Rebuilds author_stats for every author."""
+    con.execute("DELETE FROM author_stats")
+    con.execute("""
+        INSERT INTO author_stats
+        SELECT author_id, source, COUNT(*), SUM(votes), MAX(votes), AVG(votes)
+        FROM petitions
+        WHERE author_id IS NOT NULL AND author_id != ?
+        GROUP BY author_id, source
+    """, [UNKNOWN_AUTHOR_ID])
+
+
+def sync_authors(con):
+    """
+    Called once per sync after petitions were written: assigns ids to new
+    authors, then refreshes the stats of every author whose petitions were
+    inserted/updated since the last run.
+    """
+    init_author_tables(con)
+
+    assigned, previous = assign_author_ids(con)
+
+    watermark = get_watermark(con, "author_stats")
+    latest = con.execute("SELECT MAX(COALESCE(updated_at, crawled_at)) FROM petitions").fetchone()[0]
+    if watermark is None:
+        rebuild_author_stats(con)
+        print(f"   ✅ author_stats rebuilt ({len(assigned)} authors resolved).")
+    else:
+        changed = [r[0] for r in con.execute("""
+            SELECT DISTINCT author_id FROM petitions
+            WHERE COALESCE(updated_at, crawled_at) > ? AND author_id IS NOT NULL
+        """, [watermark]).fetchall()]
+        touched = sorted(set(assigned) | set(previous) | set(changed))
+        refresh_author_stats(con, touched)
+        print(f"   ✅ author_stats refreshed for {len(touched)} authors.")
+    set_watermark(con, "author_stats", latest)
+
+
+def top_authors(con, source=None, limit=10):
+    """
+    Leaderboard by total votes, for one source or across all sources.
+    Reads the precomputed author_stats rows, never the petitions table.
+    """
+    where = "WHERE s.source = ?" if source else ""
+    params = [source, limit] if source else [limit]
+    rows = con.execute(f"""
+        SELECT a.display_name,
+               SUM(s.petitions) AS petitions,
+               SUM(s.total_votes) AS total_votes,
+               MAX(s.max_votes) AS max_votes,
+               SUM(s.total_votes) / SUM(s.petitions) AS avg_votes
+        FROM author_stats s
+        JOIN authors a USING (author_id)
+        {where}
+        GROUP BY a.author_id, a.display_name
+        ORDER BY total_votes DESC, a.author_id
+        LIMIT ?
+    """, params).fetchall()
+    return [{
+        "author": r[0], "petitions": r[1], "total_votes": r[2],
+        "max_votes": r[3], "avg_votes": int(round(r[4])) if r[4] else 0
+    } for r in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the authors dimension and leaderboards")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild author_stats from scratch")
+    parser.add_argument("--top", type=int, help="Print the top-N authors per source")
+    parser.add_argument("--cloud", action="store_true", help="Run against MotherDuck instead of the local DB")
+    args = parser.parse_args()
+
+    if args.cloud:
+        from cloud_sync import get_motherduck_connection
+        con = get_motherduck_connection()
+    else:
+        print(f"💾 Connecting to local DB: {DB_FILE}")
+        con = duckdb.connect(DB_FILE)
+
+    try:
+        start = time.time()
+        if args.rebuild:
+            init_author_tables(con)
+            assign_author_ids(con)
+            rebuild_author_stats(con)
+            set_watermark(con, "author_stats", con.execute(
+                "SELECT MAX(COALESCE(updated_at, crawled_at)) FROM petitions").fetchone()[0])
+            print("✅ author_stats rebuilt.")
+        else:
+            sync_authors(con)
+        print(f"⏱️ {time.time() - start:.2f}s")
+
+        if args.top:
+            for source in (None, "president", "cabinet"):
+                print(f"\n🏆 {source or 'all'}:")
+                for i, a in enumerate(top_authors(con, source, args.top), 1):
+                    print(f"   {i:>2}. {a['author']} — {a['total_votes']:,} votes ({a['petitions']} petitions)")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
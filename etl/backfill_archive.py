@@ -3,17 +3,24 @@ Backfill script для заповнення бази даних архівним
 
 Логіка:
 - Якщо запис НОВИЙ → INSERT
-- Якщо запис ІСНУЄ → UPDATE тільки NULL поля (не перезаписуємо існуючі дані)
+- Якщо запис ІСНУЄ → UPDATE тільки NULL поля (COALESCE(існуюче, нове):
+  не перезаписуємо існуючі дані)
 
 Оптимізація:
 - Завантажуємо всі existing IDs в пам'ять один раз (швидко)
-- Батчування запитів (20 записів за раз)
+- Батчування: зібрані записи (--batch-size, 20 за замовчуванням) йдуть у
+  staging-колонки, і батч записується однією транзакцією: один
+  INSERT ... SELECT нових і один UPDATE ... FROM staging існуючих,
+  замість SELECT + UPDATE на кожен запис. Час кожного коміту друкується,
+  підсумок (середній / максимальний) - у фінальному звіті
 - Прогрес-бар
 
 Використання:
     python3 etl/backfill_archive.py --test        # Тільки ID 1-100
     python3 etl/backfill_archive.py --start 1000 --end 10000
     python3 etl/backfill_archive.py --full        # Весь діапазон 1-200000
+    python3 etl/backfill_archive.py --full --fill-nulls --batch-size 50
+                                                  # + дозаповнити існуючі з NULL полями
 """
 import requests
 from bs4 import BeautifulSoup
@@ -23,9 +30,17 @@ import random
 import argparse
 from datetime import datetime
 
+import numpy as np
+
 BASE_URL = "https://petition.president.gov.ua/petition/"
 HEADERS = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"}
 DB_FILE = "petitions.duckdb"
+BATCH_SIZE = 20
+
+# Поля, які backfill заповнює (у існуючих записах - тільки NULL)
+FIELDS = ['number', 'title', 'date', 'status', 'votes', 'url', 'author', 'text_length', 'has_answer']
+# Типи staging-колонок (numpy object-колонки DuckDB читає як VARCHAR)
+FIELD_TYPES = {'votes': 'INTEGER', 'text_length': 'INTEGER', 'has_answer': 'BOOLEAN'}
 
 def extract_petition_data(pet_id):
     """Витягує всі доступні дані з петиції"""
@@ -50,7 +65,7 @@ def extract_petition_data(pet_id):
         
         data = {
             'source': 'president',
-            'id': str(pet_id),
+            'id': pet_id,
             'title': h1.get_text(strip=True)
         }
         
@@ -123,55 +138,53 @@ def load_existing_ids(con):
     return set(row[0] for row in result)
 
 
-def insert_new(con, petition):
-    """INSERT нової петиції"""
-    con.execute("""
-        INSERT INTO petitions (source, external_id, number, title, date, status, votes, url, author, text_length, has_answer)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        petition['source'],
-        petition['id'],
-        petition.get('number'),
-        petition.get('title'),
-        petition.get('date'),
-        petition.get('status'),
-        petition.get('votes'),
-        petition.get('url'),
-        petition.get('author'),
-        petition.get('text_length'),
-        petition.get('has_answer')
-    ))
+def load_incomplete_ids(con):
+    """IDs існуючих петицій, у яких є NULL поля (для --fill-nulls)"""
+    nulls = " OR ".join(f"{field} IS NULL" for field in FIELDS)
+    result = con.execute(f"""
+        SELECT external_id FROM petitions WHERE source='president' AND ({nulls})
+    """).fetchall()
+    return set(row[0] for row in result)
 
 
-def update_existing(con, petition):
-    """UPDATE існуючої петиції (тільки NULL поля)"""
-    # Спочатку дізнаємося які поля NULL
-    existing = con.execute("""
-        SELECT number, title, date, status, votes, url, author, text_length, has_answer
-        FROM petitions
-        WHERE source=? AND external_id=?
-    """, (petition['source'], petition['id'])).fetchone()
-    
-    if not existing:
-        return  # Запис зник, скіп
-    
-    # UPDATE тільки NULL поля
-    updates = []
-    params = []
-    
-    fields = ['number', 'title', 'date', 'status', 'votes', 'url', 'author', 'text_length', 'has_answer']
-    for i, field in enumerate(fields):
-        if existing[i] is None and petition.get(field) is not None:
-            updates.append(f"{field} = ?")
-            params.append(petition.get(field))
-    
-    if updates:
-        sql = f"UPDATE petitions SET {', '.join(updates)} WHERE source=? AND external_id=?"
-        params.extend([petition['source'], petition['id']])
-        con.execute(sql, params)
+def flush_batch(con, batch):
+    """
+    Записує батч однією транзакцією: INSERT нових петицій і UPDATE ... FROM
+    staging існуючих, де заповнюються тільки NULL поля.
+    Повертає (нових, оновлених, секунд до коміту).
+    """
+    staging = {'source': np.array([p['source'] for p in batch], dtype=object),
+               'external_id': np.array([p['id'] for p in batch], dtype=np.int64)}
+    for field in FIELDS:
+        staging[field] = np.array([p.get(field) for p in batch], dtype=object)
+    columns = ", ".join(f"CAST({field} AS {FIELD_TYPES.get(field, 'VARCHAR')}) AS {field}" for field in FIELDS)
+    staged = f"(SELECT source, external_id, {columns} FROM staging)"
+
+    start = time.perf_counter()
+    con.execute("BEGIN TRANSACTION")
+    try:
+        inserted = con.execute(f"""
+            INSERT INTO petitions (source, external_id, {', '.join(FIELDS)})
+            SELECT s.* FROM {staged} s
+            WHERE NOT EXISTS (SELECT 1 FROM petitions p
+                              WHERE p.source = s.source AND p.external_id = s.external_id)
+        """).fetchone()[0]
+        # Тільки рядки, де справді є що заповнити
+        sets = ", ".join(f"{field} = COALESCE(p.{field}, s.{field})" for field in FIELDS)
+        fillable = " OR ".join(f"(p.{field} IS NULL AND s.{field} IS NOT NULL)" for field in FIELDS)
+        updated = con.execute(f"""
+            UPDATE petitions p SET {sets}
+            FROM {staged} s
+            WHERE p.source = s.source AND p.external_id = s.external_id AND ({fillable})
+        """).fetchone()[0]
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return inserted, updated, time.perf_counter() - start
 
 
-def backfill(start_id, end_id, test_mode=False):
+def backfill(start_id, end_id, test_mode=False, batch_size=BATCH_SIZE, fill_nulls=False):
     """Головна функція backfill"""
     
     print("="*70)
@@ -179,6 +192,7 @@ def backfill(start_id, end_id, test_mode=False):
     print("="*70)
     print(f"Діапазон: ID {start_id} → {end_id}")
     print(f"Режим: {'TEST (перші 100)' if test_mode else 'PRODUCTION'}")
+    print(f"Батч: {batch_size} записів{' | дозаповнення NULL полів' if fill_nulls else ''}")
     print(f"Час старту: {datetime.now().strftime('%H:%M:%S')}")
     print("="*70)
     
@@ -188,6 +202,9 @@ def backfill(start_id, end_id, test_mode=False):
     print("\n📥 Завантаження existing IDs...")
     existing_ids = load_existing_ids(con)
     print(f"✅ Знайдено {len(existing_ids)} існуючих записів в БД")
+    incomplete_ids = load_incomplete_ids(con) if fill_nulls else set()
+    if fill_nulls:
+        print(f"✅ З них з NULL полями: {len(incomplete_ids)}")
     
     # Статистика
     stats = {
@@ -195,18 +212,30 @@ def backfill(start_id, end_id, test_mode=False):
         'found': 0,
         'inserted': 0,
         'updated': 0,
-        'skipped_404': 0
+        'skipped_404': 0,
+        'batches': 0
     }
     
     batch = []
+    commit_times = []
+
+    def flush():
+        inserted, updated, seconds = flush_batch(con, batch)
+        stats['inserted'] += inserted
+        stats['updated'] += updated
+        stats['batches'] += 1
+        commit_times.append(seconds)
+        print(f"  💾 Батч {stats['batches']}: {len(batch)} записів → +{inserted} нових, "
+              f"{updated} оновлених ({seconds * 1000:.1f}ms)")
+        batch.clear()
     
     print(f"\n🔍 Починаємо сканування...\n")
     
     for pet_id in range(start_id, end_id + 1):
         stats['checked'] += 1
 
-        # Пропускаємо ID, які вже є в БД
-        if str(pet_id) in existing_ids:
+        # Пропускаємо ID, які вже є в БД (з --fill-nulls - тільки повні)
+        if pet_id in existing_ids and pet_id not in incomplete_ids:
             continue
         
         # Progress every 10
@@ -226,18 +255,16 @@ def backfill(start_id, end_id, test_mode=False):
         
         stats['found'] += 1
         
-        # Визначаємо INSERT vs UPDATE
-        if data['id'] in existing_ids:
-            update_existing(con, data)
-            stats['updated'] += 1
-        else:
-            insert_new(con, data)
-            stats['inserted'] += 1
-            existing_ids.add(data['id'])  # Додаємо до кешу
+        # INSERT vs UPDATE визначає flush_batch
+        batch.append(data)
+        if len(batch) >= batch_size:
+            flush()
         
         # Polite delay
         time.sleep(random.uniform(0.3, 0.7))
     
+    if batch:
+        flush()
     con.close()
     
     # Final report
@@ -249,6 +276,9 @@ def backfill(start_id, end_id, test_mode=False):
     print(f"Пропущено 404:     {stats['skipped_404']}")
     print(f"Нових записів:     {stats['inserted']}")
     print(f"Оновлених записів: {stats['updated']}")
+    if commit_times:
+        print(f"Батчів:            {stats['batches']} (коміт: середній {np.mean(commit_times) * 1000:.1f}ms, "
+              f"макс. {max(commit_times) * 1000:.1f}ms)")
     print(f"Час завершення:    {datetime.now().strftime('%H:%M:%S')}")
     print("="*70)
 
@@ -259,12 +289,15 @@ if __name__ == "__main__":
     parser.add_argument('--start', type=int, default=1000, help='Start ID')
     parser.add_argument('--end', type=int, default=200000, help='End ID')
     parser.add_argument('--full', action='store_true', help='Full range 1-200000')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Records per write transaction')
+    parser.add_argument('--fill-nulls', action='store_true',
+                        help='Also re-scrape existing petitions with NULL fields')
     
     args = parser.parse_args()
     
     if args.test:
-        backfill(1, 100, test_mode=True)
+        backfill(1, 100, test_mode=True, batch_size=args.batch_size, fill_nulls=args.fill_nulls)
     elif args.full:
-        backfill(1, 200000)
+        backfill(1, 200000, batch_size=args.batch_size, fill_nulls=args.fill_nulls)
     else:
-        backfill(args.start, args.end)
+        backfill(args.start, args.end, batch_size=args.batch_size, fill_nulls=args.fill_nulls)
@@ -64,7 +64,7 @@ def extract_petition_data(pet_id):
 
             data = {
                 'source': 'president',
-                'id': str(pet_id),
+                'id': pet_id,
                 'title': h1.get_text(strip=True)
             }
 
@@ -222,7 +222,7 @@ def backfill(start_id, end_id, test_mode=False):
         stats['checked'] += 1
 
         # Пропускаємо ID, які вже є в БД (мінусим навантаження)
-        if str(pet_id) in existing_ids:
+        if pet_id in existing_ids:
             stats['skipped_existing'] += 1
             # все одно робимо невелику паузу, щоб не «летіти» по циклу надто швидко
             polite_sleep(stats['checked'])
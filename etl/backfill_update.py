@@ -60,7 +60,7 @@ def extract_petition_data(pet_id):
 
             data = {
                 'source': 'president',
-                'id': str(pet_id),
+                'id': pet_id,
                 'title': h1.get_text(strip=True),
                 'url': url
             }
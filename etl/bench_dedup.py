@@ -0,0 +1,111 @@
+"""
+Benchmark for dedup.py on synthetic titles (in-memory DuckDB, single thread).
+
+Titles mimic the real mix: ~40% template petitions ("Присвоїти звання Герой
+України (посмертно) <name>") and the rest free-form titles from a word pool.
+Prints the time of every stage of a full rebuild, then of an incremental
+batch of new petitions.
+
+Usage:
+    python bench_dedup.py                # 500k titles
+    python bench_dedup.py --titles 100000 --new 5000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import duckdb
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import dedup
+
+TEMPLATES = (
+    "Присвоїти звання Герой України (посмертно) {name}",
+    "Присвоїти звання Герой України {name} посмертно",
+    "Про присвоєння звання Герой України військовослужбовцю {name}",
+    "Нагородити орденом За мужність {name}",
+    "Щодо увічнення пам'яті захисника України {name}",
+)
+SURNAMES = ("Шевченко", "Коваленко", "Бондаренко", "Ткаченко", "Кравченко", "Олійник", "Шевчук",
+            "Поліщук", "Бойко", "Мельник", "Іваненко", "Лисенко", "Савченко", "Руденко", "Марченко")
+NAMES = ("Олександр", "Андрій", "Сергій", "Іван", "Дмитро", "Микола", "Тарас", "Олег", "Юрій", "Василь")
+PATRONYMICS = ("Олександрович", "Іванович", "Петрович", "Миколайович", "Васильович", "Сергійович")
+SYLLABLES = ("за", "кон", "та", "ри", "фи", "пен", "сі", "ос", "ві", "ме", "ди", "ци", "на", "еко",
+             "ло", "гі", "до", "ро", "по", "дат", "ки", "ар", "мі", "мо", "бі", "лі", "жит", "суб",
+             "тран", "спорт", "су", "ко", "руп", "ен", "ер", "ви", "бо", "ку", "ль", "ту", "ді", "ве",
+             "те", "се", "міс", "заб", "скас", "під", "зни", "ре", "фор", "ство", "ти", "ння", "ва")
+
+
+def word_pool(rng, size=20000):
+    """Pseudo-words built from syllables: a vocabulary about as large as the real titles'."""
+    return [
+        "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+        for _ in range(size)
+    ]
+
+
+def synthetic_titles(n, seed=42):
+    rng = random.Random(seed)
+    words = word_pool(rng)
+    titles = []
+    for _ in range(n):
+        if rng.random() < 0.4:
+            name = f"{rng.choice(SURNAMES)} {rng.choice(NAMES)} {rng.choice(PATRONYMICS)}"
+            titles.append(rng.choice(TEMPLATES).format(name=name))
+        else:
+            titles.append(" ".join(rng.choice(words) for _ in range(rng.randint(4, 12))).capitalize())
+    return titles
+
+
+def timed(label, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    print(f"   {label:<22} {time.perf_counter() - start:7.2f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MinHash LSH dedup")
+    parser.add_argument("--titles", type=int, default=500_000)
+    parser.add_argument("--new", type=int, default=2_000, help="Size of the incremental batch")
+    args = parser.parse_args()
+
+    titles = synthetic_titles(args.titles + args.new)
+    con = duckdb.connect()
+    con.execute("SET threads TO 1")
+    con.execute("CREATE TABLE petitions (source VARCHAR, external_id VARCHAR, title VARCHAR, votes INTEGER)")
+    ids = np.array([str(i) for i in range(args.titles)], dtype=object)
+    batch = {"external_id": ids, "title": np.array(titles[:args.titles], dtype=object)}
+    con.execute("INSERT INTO petitions SELECT 'president', external_id, title, 0 FROM batch")
+
+    print(f"🧪 {args.titles:,} titles, {dedup.NUM_PERM} permutations, {dedup.BANDS} bands × {dedup.ROWS} rows")
+    start = time.perf_counter()
+    sigs, inverse = timed("shingles + minhash", dedup.sign_titles, titles[:args.titles])
+    keys = timed("band keys", dedup.band_keys, sigs)
+    a, b = timed("candidate pairs", dedup.candidate_pairs, keys)
+    keep = timed("verify pairs", dedup.similar, sigs, a, b)
+    labels = timed("components", dedup.connected_components, len(sigs), a[keep], b[keep])
+    core = time.perf_counter() - start
+    print(f"   {'= in memory':<22} {core:7.2f}s  ({args.titles / core:,.0f} titles/s, {len(sigs):,} distinct, "
+          f"{len(a):,} candidate pairs, {int(keep.sum()):,} kept, {len(np.unique(labels)):,} clusters)")
+
+    dedup.init_dedup_tables(con)
+    count, clusters = timed("rebuild_clusters (db)", dedup.rebuild_clusters, con)
+
+    new_ids = np.array([str(i) for i in range(args.titles, args.titles + args.new)], dtype=object)
+    batch = {"external_id": new_ids, "title": np.array(titles[args.titles:], dtype=object)}
+    con.execute("INSERT INTO petitions SELECT 'president', external_id, title, 0 FROM batch")
+    added, merged = timed(f"add {args.new:,} new", dedup.add_new_petitions, con)
+
+    total = con.execute("SELECT COUNT(DISTINCT cluster_id) FROM dedup_docs").fetchone()[0]
+    print(f"✅ {count + added:,} petitions in {total:,} clusters ({merged} merged by the new batch)")
+    con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark for records.py: the per-petition dicts the scrapers used to return
+vs PetitionRecord, on synthetic detail-page results (the fields
+scraper_detail fills; the strings are shared by both so only the containers
+are measured).
+
+Prints the memory per record (tracemalloc), the time to build them, the
+time to turn them into the petitions tuples (the old save_to_db() tuple vs
+db_row()) and the time of save_to_db()'s upsert into an in-memory
+petitions table (one execute per dict vs one INSERT over db_batch()).
+
+Usage:
+    python bench_records.py                  # 100k records
+    python bench_records.py --records 500000 --write 5000
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pipeline import init_db
+from records import PETITION_COLUMNS, PetitionRecord, db_batch
+
+OLD_INSERT = """
+    INSERT OR REPLACE INTO petitions (source, external_id, number, title, date, status, votes, url, author,
+                                      text_length, has_answer, date_normalized)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def synthetic_fields(n):
+    """Field values of `n` detail pages, one dict of keyword arguments each."""
+    statuses = ("Триває збір підписів", "Архів", "На розгляді", "З відповіддю")
+    return [{
+        "source": "president",
+        "external_id": 100_000 + i,
+        "number": f"№22/{100_000 + i}-еп",
+        "title": f"Петиція {i}",
+        "date": "15 жовтня 2025",
+        "status": statuses[i % 4],
+        "votes": i % 25_000,
+        "url": f"https://petition.president.gov.ua/petition/{100_000 + i}",
+        "author": f"Автор {i % 5000}",
+        "text_length": 500 + i % 3000,
+        "has_answer": i % 4 == 3,
+        "date_normalized": "2025-10-15",
+        "body": None,
+        "answer": None,
+    } for i in range(n)]
+
+
+def as_dict(f):
+    """The dict scraper_detail.fetch_petition_detail() used to return."""
+    return {
+        'source': f["source"], 'id': f["external_id"], 'title': f["title"], 'url': f["url"],
+        'number': f["number"], 'author': f["author"], 'date': f["date"], 'status': f["status"],
+        'votes': f["votes"], 'text_length': f["text_length"], 'body': f["body"], 'answer': f["answer"],
+        'has_answer': f["has_answer"], 'date_normalized': f["date_normalized"],
+    }
+
+
+def dict_row(p):
+    """The tuple save_to_db() used to build from a dict."""
+    return (p['source'], p['id'], p['number'], p['title'], p['date'], p['status'], p['votes'], p['url'],
+            p.get('author'), p.get('text_length'), p.get('has_answer'), p.get('date_normalized'))
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(build, fields):
+    """(records, bytes per record, build seconds) of build() over `fields`."""
+    tracemalloc.start()
+    records = [build(f) for f in fields]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # tracemalloc slows allocations down: build time is taken untraced.
+    # The list itself is the same for both
+    return records, (size - sys.getsizeof(records)) / len(records), timed(lambda: [build(f) for f in fields])
+
+
+def write_time(petitions, bulk):
+    con = duckdb.connect()
+    con.execute("SET threads TO 1")
+    init_db(con)
+    start = time.perf_counter()
+    if bulk:
+        batch = db_batch(petitions)
+        con.execute(f"INSERT OR REPLACE INTO petitions ({', '.join(PETITION_COLUMNS)}) SELECT * FROM batch")
+    else:
+        for p in petitions:
+            con.execute(OLD_INSERT, dict_row(p))
+    seconds = time.perf_counter() - start
+    assert con.execute("SELECT COUNT(*) FROM petitions").fetchone()[0] == len(petitions)
+    con.close()
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PetitionRecord vs per-petition dicts")
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--write", type=int, default=2_000, help="Records upserted into DuckDB")
+    args = parser.parse_args()
+
+    fields = synthetic_fields(args.records)
+    print(f"🧪 {args.records:,} records")
+
+    dicts, dict_bytes, dict_build = measure(as_dict, fields)
+    records, record_bytes, record_build = measure(lambda f: PetitionRecord(**f), fields)
+    assert [dict_row(p) for p in dicts[:1000]] == [p.db_row() for p in records[:1000]]
+
+    dict_convert = timed(lambda: [dict_row(p) for p in dicts])
+    record_convert = timed(lambda: [p.db_row() for p in records])
+
+    dict_write = write_time(dicts[:args.write], bulk=False)
+    record_write = write_time(records[:args.write], bulk=True)
+
+    print(f"   {'':<22} {'dict':>10} {'record':>10}")
+    print(f"   {'bytes per record':<22} {dict_bytes:10.0f} {record_bytes:10.0f}")
+    print(f"   {'build':<22} {dict_build * 1000:8.1f}ms {record_build * 1000:8.1f}ms")
+    print(f"   {'to DB tuples':<22} {dict_convert * 1000:8.1f}ms {record_convert * 1000:8.1f}ms")
+    print(f"   {f'write {args.write:,} rows':<22} {dict_write * 1000:8.1f}ms {record_write * 1000:8.1f}ms"
+          f"  (execute per row / db_batch)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark for snapshot.py: the queries consumers run on petitions and the
+votes history, against the DuckDB file and against the Parquet snapshot, on
+synthetic history shaped like the real one (bench_votes_history.py; file
+DuckDB in a temp dir, single thread).
+
+Prints the snapshot write times (first run, then after one synced day), the
+sizes and the query times on both.
+
+Usage:
+    python bench_snapshot.py                  # 1 year of history
+    python bench_snapshot.py --days 730 --cabinet 3000
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from datetime import timedelta
+
+import duckdb
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import votes_store
+from bench_votes_history import START, synthetic_history, timed
+from snapshot import write_snapshot
+from typed_schema import SOURCE_TYPE, STATUS_TYPE, ACTIVE, ANSWERED, init_types
+
+
+def build_db(path, days, cabinet, president_per_day):
+    ids, sources, offsets, votes = synthetic_history(days, cabinet, president_per_day)
+    con = duckdb.connect(path)
+    con.execute("SET threads TO 1")
+    init_types(con)
+    con.execute("CREATE TABLE votes_history (petition_id INTEGER, source VARCHAR, date DATE, votes INTEGER)")
+    batch = {"petition_id": ids.astype(np.int64), "source": sources, "offset": offsets, "votes": votes}
+    con.execute("""
+        INSERT INTO votes_history
+        SELECT petition_id, source, DATE '2025-01-01' + CAST("offset" AS INTEGER), votes FROM batch
+    """)
+    votes_store.init_votes_tables(con)
+    con.execute(f"""
+        CREATE TABLE petitions (
+            source {SOURCE_TYPE}, external_id INTEGER, title VARCHAR, status {STATUS_TYPE},
+            votes INTEGER, date_normalized DATE, updated_at TIMESTAMP,
+            PRIMARY KEY (source, external_id)
+        )
+    """)
+    con.execute(f"""
+        INSERT INTO petitions
+        SELECT source, petition_id, 'Петиція ' || petition_id,
+               CASE WHEN MAX(last_seen) = DATE '{START}' + {days - 1} THEN '{ACTIVE}'
+                    WHEN hash(petition_id) % 10 = 0 THEN '{ANSWERED}' ELSE 'Архів' END,
+               arg_max(votes, valid_from), MIN(valid_from), MAX(last_seen)
+        FROM votes_intervals GROUP BY source, petition_id
+    """)
+    con.execute("CHECKPOINT")
+    return con
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Parquet snapshots vs the DuckDB file")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--cabinet", type=int, default=1000)
+    parser.add_argument("--president-per-day", type=int, default=10)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp, "petitions.duckdb")
+        out = os.path.join(tmp, "snapshots")
+        db = build_db(db_path, args.days, args.cabinet, args.president_per_day)
+        points = db.execute("SELECT COUNT(*) FROM votes_history").fetchone()[0]
+        print(f"🧪 {args.days} days, {points:,} history points")
+
+        start = time.perf_counter()
+        write_snapshot(db, out)
+        first = time.perf_counter() - start
+
+        # One synced day: every tracked petition gets its count again
+        last = START + timedelta(days=args.days - 1)
+        today = last + timedelta(days=1)
+        day_rows = db.execute("SELECT source, petition_id, votes + 1 FROM votes_between(?, ?)",
+                              [last, last]).fetchall()
+        votes_store.record_votes(db, today.isoformat(), day_rows)
+        db.execute("UPDATE petitions SET votes = votes + 1, updated_at = CURRENT_TIMESTAMP WHERE status = ?", [ACTIVE])
+        start = time.perf_counter()
+        rewritten = write_snapshot(db, out)
+        day = time.perf_counter() - start
+        db.execute("CHECKPOINT")
+
+        parquet_bytes = sum(os.path.getsize(os.path.join(root, f))
+                            for root, _, files in os.walk(out) for f in files if f.endswith(".parquet"))
+        print(f"   first snapshot   {first:8.2f}s")
+        print(f"   after one day    {day:8.2f}s  ({rewritten} files rewritten)")
+        print(f"   size             {os.path.getsize(db_path) / 2**20:7.1f}MB duckdb, "
+              f"{parquet_bytes / 2**20:.1f}MB parquet")
+
+        pq = duckdb.connect()
+        pq.execute("SET threads TO 1")
+        pq.execute(f"CREATE VIEW petitions AS SELECT * FROM read_parquet('{out}/petitions.parquet')")
+        pq.execute(f"""
+            CREATE VIEW votes_history AS
+            SELECT * FROM read_parquet('{out}/votes_history/*/*/*.parquet', hive_partitioning = true)
+        """)
+        month_ago = today - timedelta(days=30)
+        petition = db.execute("SELECT MIN(petition_id) FROM votes_intervals WHERE source = 'president'").fetchone()[0]
+        queries = (
+            ("cabinet day total",
+             "SELECT SUM(votes) FROM votes_between(?, ?) WHERE source = 'cabinet'",
+             "SELECT SUM(votes) FROM votes_history WHERE source = 'cabinet' AND date BETWEEN ? AND ?",
+             [today, today]),
+            ("30-day gains",
+             "SELECT source, petition_id, arg_max(votes, date) - arg_min(votes, date) "
+             "FROM votes_between(?, ?) GROUP BY ALL",
+             "SELECT source, petition_id, arg_max(votes, date) - arg_min(votes, date) "
+             "FROM votes_history WHERE date BETWEEN ? AND ? GROUP BY ALL",
+             [month_ago, today]),
+            ("monthly totals",
+             "SELECT date_trunc('month', date), source, SUM(votes) FROM votes_history GROUP BY ALL",
+             "SELECT year, month, source, SUM(votes) FROM votes_history GROUP BY ALL", []),
+            ("one petition",
+             f"SELECT date, votes FROM votes_history WHERE petition_id = {petition} ORDER BY date",
+             f"SELECT date, votes FROM votes_history WHERE petition_id = {petition} ORDER BY date", []),
+            ("status by source",
+             "SELECT source, status, COUNT(*), SUM(votes) FROM petitions GROUP BY ALL",
+             "SELECT source, status, COUNT(*), SUM(votes) FROM petitions GROUP BY ALL", []),
+            ("active petitions",
+             f"SELECT external_id, votes FROM petitions WHERE source = 'president' AND status = '{ACTIVE}'",
+             f"SELECT external_id, votes FROM petitions WHERE source = 'president' AND status = '{ACTIVE}'", []),
+        )
+        print(f"   {'query':<20} {'duckdb':>9} {'parquet':>9}")
+        for label, db_sql, pq_sql, params in queries:
+            old = timed(db, db_sql, params)
+            new = timed(pq, pq_sql, params)
+            print(f"   {label:<20} {old * 1000:7.1f}ms {new * 1000:7.1f}ms")
+        db.close()
+        pq.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
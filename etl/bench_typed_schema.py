@@ -0,0 +1,250 @@
+"""
+Benchmark for typed_schema.py: VARCHAR source/status/ids vs ENUM source and
+status and INTEGER ids, on synthetic petitions and votes_intervals shaped like
+the real ones (file-backed DuckDB in a temp dir, single thread).
+
+The legacy database is built first, with the mixed English/Ukrainian Cabinet
+statuses, then copied and converted with migrate_typed_schema(). Prints the
+migration time, the database sizes and the time of the export and sync
+queries against both layouts.
+
+Usage:
+    python bench_typed_schema.py                       # 200k petitions
+    python bench_typed_schema.py --president 500000 --cabinet 50000
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import duckdb
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from typed_schema import ACTIVE, ANSWERED, migrate_typed_schema, normalize_status
+
+PRESIDENT_STATUSES = ("Архів", "На розгляді", "З відповіддю", "Триває збір підписів")
+CABINET_STATUSES = ("Unsupported", "Approved", "Answered", "Supported")
+
+LEGACY_DDL = """
+    CREATE TABLE petitions (
+        source VARCHAR, external_id VARCHAR, title VARCHAR, status VARCHAR, votes INTEGER,
+        date_normalized DATE, PRIMARY KEY (source, external_id)
+    );
+    CREATE TABLE votes_intervals (
+        petition_id VARCHAR, source VARCHAR, valid_from DATE, last_seen DATE, votes INTEGER,
+        PRIMARY KEY (petition_id, source, valid_from)
+    );
+    CREATE TABLE petition_metrics (
+        petition_id VARCHAR, source VARCHAR, votes_now INTEGER, delta_7d INTEGER,
+        PRIMARY KEY (petition_id, source)
+    );
+"""
+
+LEGACY_STATUS_DIST = """
+    SELECT CASE status
+               WHEN 'Unsupported' THEN 'Архів'
+               WHEN 'Approved' THEN 'На розгляді'
+               WHEN 'Answered' THEN 'З відповіддю'
+               WHEN 'Supported' THEN 'Збір підписів'
+               WHEN 'Триває збір підписів' THEN 'Збір підписів'
+               WHEN 'Не підтримано' THEN 'Архів'
+               ELSE status
+           END AS unified_status, source, COUNT(*)
+    FROM petitions
+    WHERE status IS NOT NULL AND status != 'Unknown'
+    GROUP BY unified_status, source
+"""
+
+
+def synthetic_petitions(president, cabinet, seed=5):
+    """Column arrays of the legacy petitions table (string ids and statuses)."""
+    rng = np.random.default_rng(seed)
+    n = president + cabinet
+    source = np.array(["president"] * president + ["cabinet"] * cabinet, dtype=object)
+    ids = np.r_[np.arange(president) + 100_000, np.arange(cabinet) + 1]
+    status = np.r_[
+        np.array(PRESIDENT_STATUSES, dtype=object)[rng.choice(4, president, p=[0.85, 0.05, 0.05, 0.05])],
+        np.array(CABINET_STATUSES, dtype=object)[rng.choice(4, cabinet, p=[0.85, 0.05, 0.05, 0.05])],
+    ]
+    return {
+        "source": source,
+        "external_id": ids.astype(str).astype(object),
+        "title": np.array([f"Петиція {i}" for i in range(n)], dtype=object),
+        "status": status,
+        "votes": np.minimum(rng.pareto(1.2, n) * 10, 200_000).astype(np.int64),
+        "age": rng.integers(0, 3000, n),
+    }
+
+
+def build_legacy(path, pets, intervals_per_petition, seed=6):
+    rng = np.random.default_rng(seed)
+    con = duckdb.connect(path)
+    con.execute("SET threads TO 1")
+    con.execute(LEGACY_DDL)
+    con.execute("""
+        INSERT INTO petitions
+        SELECT source, external_id, title, status, votes, DATE '2026-03-31' - CAST(age AS INTEGER) FROM pets
+    """)
+    # Change-only intervals: a few per petition, the last one ending today
+    k = intervals_per_petition
+    n = len(pets["votes"])
+    hist = {
+        "source": np.repeat(pets["source"], k),
+        "petition_id": np.repeat(pets["external_id"], k),
+        "step": np.tile(np.arange(k), n),
+        "votes": np.repeat(pets["votes"], k) - np.tile(np.arange(k)[::-1], n) * rng.integers(0, 5, n * k),
+    }
+    con.execute("""
+        INSERT INTO votes_intervals
+        SELECT petition_id, source, DATE '2026-03-31' - CAST((step_count - step) * 7 AS INTEGER),
+               DATE '2026-03-31' - CAST((step_count - step - 1) * 7 AS INTEGER), GREATEST(votes, 0)
+        FROM (SELECT *, ? AS step_count FROM hist)
+        ORDER BY source, petition_id, step
+    """, [k])
+    con.execute("""
+        INSERT INTO petition_metrics
+        SELECT petition_id, source, arg_max(votes, valid_from), MAX(votes) - MIN(votes)
+        FROM votes_intervals GROUP BY ALL
+    """)
+    con.execute("CHECKPOINT")
+    return con
+
+
+def timed(con, sql, params=None, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        con.execute(sql, params or []).fetchall()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ENUM/INTEGER vs VARCHAR keys and statuses")
+    parser.add_argument("--president", type=int, default=180_000)
+    parser.add_argument("--cabinet", type=int, default=20_000)
+    parser.add_argument("--intervals", type=int, default=6, help="votes_intervals rows per petition")
+    parser.add_argument("--batch", type=int, default=5_000, help="Petitions per sync batch")
+    args = parser.parse_args()
+
+    pets = synthetic_petitions(args.president, args.cabinet)
+    tmp = tempfile.mkdtemp()
+    try:
+        legacy_path = os.path.join(tmp, "legacy.duckdb")
+        typed_path = os.path.join(tmp, "typed.duckdb")
+        legacy = build_legacy(legacy_path, pets, args.intervals)
+        legacy.close()
+        shutil.copy(legacy_path, typed_path)
+
+        legacy = duckdb.connect(legacy_path)
+        legacy.execute("SET threads TO 1")
+        typed = duckdb.connect(typed_path)
+        typed.execute("SET threads TO 1")
+        start = time.perf_counter()
+        migrate_typed_schema(typed)
+        migration = time.perf_counter() - start
+        typed.execute("CHECKPOINT")
+        # The rebuilds leave the old blocks free inside the file; compare compacted copies
+        sizes = []
+        for con, name in ((legacy, "legacy"), (typed, "typed")):
+            compact = os.path.join(tmp, f"{name}_compact.duckdb")
+            con.execute(f"ATTACH '{compact}' AS compact")
+            con.execute("COPY FROM DATABASE " + con.execute("SELECT current_database()").fetchone()[0] + " TO compact")
+            con.execute("DETACH compact")
+            sizes.append(os.path.getsize(compact))
+
+        n = len(pets["votes"])
+        rows = legacy.execute("SELECT COUNT(*) FROM votes_intervals").fetchone()[0]
+        print(f"🧪 {n:,} petitions, {rows:,} votes_intervals rows")
+        print(f"   migration        {migration:8.2f}s")
+        print(f"   database size    {sizes[0] / 2**20:7.1f}MB -> {sizes[1] / 2**20:.1f}MB")
+
+        queries = (
+            ("overview", """
+                SELECT COUNT(*), COUNT(*) FILTER (WHERE source = 'president'), MEDIAN(votes),
+                       COUNT(*) FILTER (WHERE status IN ('З відповіддю', 'Answered'))
+                FROM petitions
+            """, f"""
+                SELECT COUNT(*), COUNT(*) FILTER (WHERE source = 'president'), MEDIAN(votes),
+                       COUNT(*) FILTER (WHERE status = '{ANSWERED}')
+                FROM petitions
+            """),
+            ("platform", """
+                SELECT source, COUNT(*), AVG(votes), COUNT(*) FILTER (WHERE status IN ('З відповіддю', 'Answered'))
+                FROM petitions GROUP BY source
+            """, f"""
+                SELECT source, COUNT(*), AVG(votes), COUNT(*) FILTER (WHERE status = '{ANSWERED}')
+                FROM petitions GROUP BY source
+            """),
+            ("status distribution", LEGACY_STATUS_DIST,
+             "SELECT status, source, COUNT(*) FROM petitions GROUP BY status, source"),
+            ("velocity join", """
+                SELECT m.petition_id, p.title, m.delta_7d FROM petition_metrics m
+                JOIN petitions p ON m.petition_id = p.external_id AND m.source = p.source
+                WHERE p.status IN ('Триває збір підписів', 'Supported')
+                ORDER BY m.delta_7d DESC LIMIT 10
+            """, f"""
+                SELECT m.petition_id, p.title, m.delta_7d FROM petition_metrics m
+                JOIN petitions p ON m.petition_id = p.external_id AND m.source = p.source
+                WHERE p.status = '{ACTIVE}'
+                ORDER BY m.delta_7d DESC LIMIT 10
+            """),
+            ("active fetch", """
+                SELECT source, external_id, votes FROM petitions
+                WHERE status IN ('Триває збір підписів', 'Supported') AND source = 'president'
+            """, f"""
+                SELECT source, external_id, votes FROM petitions
+                WHERE status = '{ACTIVE}' AND source = 'president'
+            """),
+            ("history join", """
+                SELECT p.source, p.external_id, arg_max(v.votes, v.valid_from)
+                FROM petitions p JOIN votes_intervals v ON v.petition_id = p.external_id AND v.source = p.source
+                GROUP BY ALL
+            """, """
+                SELECT p.source, p.external_id, arg_max(v.votes, v.valid_from)
+                FROM petitions p JOIN votes_intervals v ON v.petition_id = p.external_id AND v.source = p.source
+                GROUP BY ALL
+            """),
+        )
+        print(f"   {'query':<20} {'varchar':>9} {'typed':>9}")
+        for label, old_sql, new_sql in queries:
+            old = timed(legacy, old_sql)
+            new = timed(typed, new_sql)
+            print(f"   {label:<20} {old * 1000:7.1f}ms {new * 1000:7.1f}ms")
+
+        # Sync batches: latest interval of each synced petition (record_votes)
+        # and the status comparison (status_transitions)
+        pick = np.random.default_rng(7).choice(n, min(args.batch, n), replace=False)
+        lookup = """
+            SELECT b.source, b.petition_id, l.votes, p.status IS DISTINCT FROM b.status
+            FROM batch b
+            LEFT JOIN (
+                SELECT petition_id, source, votes FROM votes_intervals
+                WHERE (petition_id, source) IN (SELECT petition_id, source FROM batch)
+                QUALIFY ROW_NUMBER() OVER (PARTITION BY petition_id, source ORDER BY valid_from DESC) = 1
+            ) l ON l.petition_id = b.petition_id AND l.source = b.source
+            LEFT JOIN petitions p ON p.source = b.source AND p.external_id = b.petition_id
+        """
+        batch_rows = {"source": pets["source"][pick], "petition_id": pets["external_id"][pick],
+                      "status": pets["status"][pick]}
+        legacy.execute("CREATE TEMP TABLE batch AS SELECT * FROM batch_rows")
+        batch_rows = {"source": pets["source"][pick],
+                      "petition_id": pets["external_id"][pick].astype(np.int64),
+                      "status": np.array([normalize_status(s) for s in pets["status"][pick]], dtype=object)}
+        typed.execute("CREATE TEMP TABLE batch AS SELECT * FROM batch_rows")
+        old = timed(legacy, lookup)
+        new = timed(typed, lookup)
+        print(f"   {'sync batch lookup':<20} {old * 1000:7.1f}ms {new * 1000:7.1f}ms  ({len(pick):,} petitions)")
+        legacy.close()
+        typed.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
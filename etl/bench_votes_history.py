@@ -0,0 +1,144 @@
+"""
+Benchmark for votes_store.py: legacy one-row-per-day votes_history vs the
+change-only votes_intervals, on synthetic history shaped like the real one
+(in-memory DuckDB, single thread).
+
+Per day: every Cabinet petition is synced (its count rarely moves), every
+active President petition is synced for its 90 days of collection (its count
+moves most days, less and less towards the end) and then drops out.
+
+Prints the row counts and the time of the queries the syncs and the export
+run on the history, against both layouts.
+
+Usage:
+    python bench_votes_history.py                  # 1 year of history
+    python bench_votes_history.py --days 730 --cabinet 3000
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import date, timedelta
+
+import duckdb
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import votes_store
+
+START = date(2025, 1, 1)
+
+
+def synthetic_history(days, cabinet, president_per_day, seed=11):
+    """(petition_id, source, day offset, votes) arrays of the legacy layout."""
+    rng = np.random.default_rng(seed)
+    ids, sources, offsets, votes = [], [], [], []
+
+    # Cabinet: every petition synced every day, counts move on ~3% of the days
+    cab_ids = np.arange(cabinet)
+    moves = rng.random((cabinet, days)) < 0.03
+    counts = np.cumsum(moves * rng.integers(1, 30, (cabinet, days)), axis=1)
+    ids.append(np.repeat(cab_ids, days))
+    sources.append(np.full(cabinet * days, "cabinet", dtype=object))
+    offsets.append(np.tile(np.arange(days), cabinet))
+    votes.append(counts.ravel())
+
+    # President: new petitions every day, tracked for 90 days with decaying gains
+    n = president_per_day * days
+    born = np.repeat(np.arange(days), president_per_day)
+    age = np.arange(90)
+    rate = rng.lognormal(2, 1.5, n)[:, None] * np.exp(-age / rng.uniform(3, 20, n)[:, None])
+    counts = np.cumsum(rng.poisson(rate), axis=1)
+    tracked = (born[:, None] + age) < days
+    ids.append(np.repeat(np.arange(n) + 100_000, 90)[tracked.ravel()])
+    sources.append(np.full(int(tracked.sum()), "president", dtype=object))
+    offsets.append((born[:, None] + age)[tracked])
+    votes.append(counts[tracked])
+
+    return (np.concatenate(ids).astype(str).astype(object), np.concatenate(sources),
+            np.concatenate(offsets), np.concatenate(votes))
+
+
+def timed(con, sql, params=None, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        con.execute(sql, params or []).fetchall()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark change-only votes history")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--cabinet", type=int, default=1000)
+    parser.add_argument("--president-per-day", type=int, default=10)
+    args = parser.parse_args()
+
+    ids, sources, offsets, votes = synthetic_history(args.days, args.cabinet, args.president_per_day)
+    legacy = duckdb.connect()
+    legacy.execute("SET threads TO 1")
+    legacy.execute("CREATE TABLE votes_history (petition_id VARCHAR, source VARCHAR, date DATE, votes INTEGER, "
+                   "PRIMARY KEY (petition_id, source, date))")
+    batch = {"petition_id": ids, "source": sources, "offset": offsets, "votes": votes}
+    legacy.execute("""
+        INSERT INTO votes_history
+        SELECT petition_id, source, DATE '2025-01-01' + CAST("offset" AS INTEGER), votes FROM batch
+        ORDER BY source, petition_id, "offset"
+    """)
+    last = (START + timedelta(days=args.days - 1)).isoformat()
+    month_ago = (START + timedelta(days=args.days - 31)).isoformat()
+
+    intervals = duckdb.connect()
+    intervals.execute("SET threads TO 1")
+    # Same rows, then the one-off migration to intervals
+    rows = legacy.execute("SELECT petition_id, source, date, votes FROM votes_history").fetchnumpy()
+    intervals.execute("CREATE TABLE votes_history (petition_id VARCHAR, source VARCHAR, date DATE, votes INTEGER)")
+    intervals.execute("INSERT INTO votes_history SELECT * FROM rows")
+    votes_store.init_votes_tables(intervals)
+
+    stored, points = votes_store.storage_stats(intervals)
+    print(f"🧪 {args.days} days, {args.cabinet:,} cabinet + {args.president_per_day}/day president petitions")
+    print(f"   legacy rows      {points:>12,}")
+    print(f"   interval rows    {stored:>12,}  ({points / stored:.1f}x fewer)")
+
+    queries = (
+        ("day totals (sync)", "SELECT source, SUM(votes) FROM votes_history WHERE date = ? GROUP BY source",
+         "SELECT source, SUM(votes) FROM votes_between(?, ?) GROUP BY source", [last], [last, last]),
+        ("30-day window", "SELECT petition_id, source, arg_max(votes, date) - arg_min(votes, date) "
+                          "FROM votes_history WHERE date BETWEEN ? AND ? GROUP BY ALL",
+         "SELECT petition_id, source, arg_max(votes, date) - arg_min(votes, date) "
+         "FROM votes_between(?, ?) GROUP BY ALL", [month_ago, last], [month_ago, last]),
+        ("all daily totals", "SELECT date, source, SUM(votes) FROM votes_history GROUP BY ALL",
+         "SELECT date, source, SUM(votes) FROM votes_history GROUP BY ALL", [], []),
+        ("one petition", "SELECT * FROM votes_history WHERE petition_id = '100500' ORDER BY date",
+         "SELECT * FROM votes_history WHERE petition_id = '100500' ORDER BY date", [], []),
+    )
+    print(f"   {'query':<20} {'legacy':>9} {'intervals':>10}")
+    for label, old_sql, new_sql, old_params, new_params in queries:
+        old = timed(legacy, old_sql, old_params)
+        new = timed(intervals, new_sql, new_params)
+        print(f"   {label:<20} {old * 1000:7.1f}ms {new * 1000:8.1f}ms")
+
+    # One day of sync writes: every tracked petition gets its count for a new day
+    today = (START + timedelta(days=args.days)).isoformat()
+    day_rows = legacy.execute("SELECT source, petition_id, votes FROM votes_history WHERE date = ?", [last]).fetchall()
+    start = time.perf_counter()
+    for source, petition_id, count in day_rows:
+        legacy.execute("""
+            INSERT INTO votes_history (petition_id, source, date, votes) VALUES (?, ?, ?, ?)
+            ON CONFLICT (petition_id, source, date) DO UPDATE SET votes = EXCLUDED.votes
+        """, (petition_id, source, today, count))
+    old = time.perf_counter() - start
+    start = time.perf_counter()
+    votes_store.record_votes(intervals, today, day_rows)
+    new = time.perf_counter() - start
+    print(f"   {'write 1 day':<20} {old * 1000:7.1f}ms {new * 1000:8.1f}ms  ({len(day_rows):,} petitions)")
+    legacy.close()
+    intervals.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -14,21 +14,34 @@ import sys
 import duckdb
 from curl_cffi import requests
 import time
-import json
 import argparse
 from datetime import datetime, date
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from scraper_detail import fetch_petition_detail, normalize_date
+from scraper_detail import fetch_petition_detail
 from scraper_cabinet import fetch_cabinet_petitions
+from records import FetchError, insert_sql
 from validator import run_preflight_check, run_postsync_validation
-from notifier import notify_sync_failure, notify_sync_success, load_env
+from notifier import notify_sync_failure, notify_sync_success, notify_anomalies, load_env
+from rollups import refresh_rollups
+from authors import sync_authors
+from search import refresh_search_index
+from dedup import sync_dedup
+from similar import sync_similar
+from forecast import refresh_forecasts
+from series_cache import refresh_series
+from anomalies import detect_anomalies
+from text_store import store_texts
+from status_events import record_status_events, refresh_funnel_metrics, init_status_tables
+from votes_store import record_votes
+from migrations import run_migrations
+from replica import refresh_replica, open_replica
+from snapshot import write_snapshot
 
 # --- CONFIG ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-JSON_FILE = os.path.join(BASE_DIR, 'src', 'analytics_data.json')
 
 
 def get_motherduck_connection():
@@ -50,6 +63,8 @@ def create_backup(con):
     print("\n📦 Creating backup...")
     con.execute("CREATE OR REPLACE TABLE petitions_backup AS SELECT * FROM petitions")
     con.execute("CREATE OR REPLACE TABLE daily_stats_backup AS SELECT * FROM daily_stats")
+    init_status_tables(con)
+    con.execute("CREATE OR REPLACE TABLE status_events_backup AS SELECT * FROM status_events")
     print("✅ Backup created")
 
 
@@ -61,6 +76,8 @@ def rollback_from_backup(con):
         con.execute("ALTER TABLE petitions_backup RENAME TO petitions")
         con.execute("DROP TABLE IF EXISTS daily_stats")
         con.execute("ALTER TABLE daily_stats_backup RENAME TO daily_stats")
+        con.execute("DROP TABLE IF EXISTS status_events")
+        con.execute("ALTER TABLE status_events_backup RENAME TO status_events")
         print("✅ Rollback complete")
     except Exception as e:
         print(f"❌ Rollback failed: {e}")
@@ -71,6 +88,7 @@ def cleanup_backup(con):
     print("\n🧹 Cleaning up backup...")
     con.execute("DROP TABLE IF EXISTS petitions_backup")
     con.execute("DROP TABLE IF EXISTS daily_stats_backup")
+    con.execute("DROP TABLE IF EXISTS status_events_backup")
     print("✅ Backup removed")
 
 
@@ -79,7 +97,7 @@ def sync_president_updates(con, today_str, stats, session):
     print("\n--- 1. President Updates (Active) ---")
     
     active_ids = con.execute("""
-        SELECT external_id, votes, status 
+        SELECT external_id, votes, status, text_length
         FROM petitions 
         WHERE source='president' AND status='Триває збір підписів'
     """).fetchall()
@@ -88,13 +106,16 @@ def sync_president_updates(con, today_str, stats, session):
     stats["total_checked"] = len(active_ids)
     
     updates_count = 0
+    skipped_writes = 0
     votes_delta_sum = 0
     status_changes = []
     growth_stats = []
+    texts = []
+    history = []
     errors = 0
     
     for row in active_ids:
-        pet_id, old_votes, old_status = row[0], row[1], row[2]
+        pet_id, old_votes, old_status, old_text_length = row
         
         data = fetch_petition_detail(pet_id, session=session)
         
@@ -102,14 +123,14 @@ def sync_president_updates(con, today_str, stats, session):
             errors += 1
             continue
             
-        if 'error' in data:
-            if data['error'] == 404:
+        if isinstance(data, FetchError):
+            if data.not_found:
                 con.execute("UPDATE petitions SET status='Not Found', updated_at=CURRENT_TIMESTAMP WHERE source='president' AND external_id=?", [pet_id])
                 status_changes.append({"id": pet_id, "from": old_status, "to": "Not Found"})
             errors += 1
             continue
 
-        new_votes = data.get('votes', 0)
+        new_votes = data.votes or 0
         
         # Safety check
         if new_votes == 0 and (old_votes or 0) > 100:
@@ -117,7 +138,7 @@ def sync_president_updates(con, today_str, stats, session):
             new_votes = old_votes
             errors += 1
         
-        current_status = data.get('status')
+        current_status = data.status
         
         # Check for Unknown status
         if current_status == "Unknown":
@@ -126,29 +147,28 @@ def sync_president_updates(con, today_str, stats, session):
             continue
         
         delta = new_votes - (old_votes or 0)
+        text_length = data.text_length or 0
         
-        con.execute("""
-            UPDATE petitions 
-            SET votes=?, votes_previous=?, status=?, text_length=?, updated_at=CURRENT_TIMESTAMP
-            WHERE source='president' AND external_id=?
-        """, (new_votes, old_votes, current_status, data.get('text_length', 0), pet_id))
+        # Only rows that changed are written: an unchanged petition keeps its
+        # updated_at (the watermark of replicate.py and the incremental
+        # refreshes) and votes_previous (the count before its last change)
+        if (new_votes, current_status, text_length) != (old_votes, old_status, old_text_length):
+            con.execute("""
+                UPDATE petitions 
+                SET votes=?, votes_previous=?, status=?, text_length=?, updated_at=CURRENT_TIMESTAMP
+                WHERE source='president' AND external_id=?
+            """, (new_votes, old_votes, current_status, text_length, pet_id))
+            updates_count += 1
+        else:
+            skipped_writes += 1
         
-        con.execute("""
-            INSERT INTO votes_history (petition_id, source, date, votes)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT (petition_id, source, date) DO UPDATE SET votes = EXCLUDED.votes
-        """, (pet_id, 'president', today_str, new_votes))
-
-        updates_count += 1
+        # An unchanged count still extends its interval in votes_intervals
+        history.append(('president', pet_id, new_votes))
+        texts.append(('president', pet_id, data.body, data.answer))
         votes_delta_sum += delta
         
         if delta > 0:
-            growth_stats.append({
-                "title": data['title'],
-                "delta": delta,
-                "total": new_votes,
-                "url": data['url']
-            })
+            growth_stats.append(data.growth(delta))
         
         if current_status != old_status:
             print(f"🔄 Status change for {pet_id}: {old_status} -> {current_status}")
@@ -157,10 +177,15 @@ def sync_president_updates(con, today_str, stats, session):
         time.sleep(1.5)
         
     stats["errors"] = errors
+    stats["skipped_writes"] = skipped_writes
     stats["vote_delta"] = votes_delta_sum
     stats["status_changes"] = len(status_changes)
     
-    print(f"✅ Updated: {updates_count}. Total Vote Delta: {votes_delta_sum}")
+    record_votes(con, today_str, history)
+    store_texts(con, texts)
+    record_status_events(con, [('president', c['id'], c['from'], c['to']) for c in status_changes])
+    print(f"✅ Updated: {updates_count}, unchanged (not written): {skipped_writes}. "
+          f"Total Vote Delta: {votes_delta_sum}")
     return votes_delta_sum, status_changes, growth_stats
 
 
@@ -171,6 +196,9 @@ def sync_president_new(con, today_str, stats, session):
     new_count = 0
     new_petitions_list = []
     processed_ids = set()
+    texts = []
+    events = []
+    history = []
     
     for page in range(1, 6):
         url = f"https://petition.president.gov.ua/?status=active&sort=date&order=desc&page={page}"
@@ -192,36 +220,24 @@ def sync_president_new(con, today_str, stats, session):
                 if s_id in processed_ids: continue
                 processed_ids.add(s_id)
                 
-                exists = con.execute("SELECT 1 FROM petitions WHERE source='president' AND external_id=?", [s_id]).fetchone()
+                pet_id = int(s_id)
+                exists = con.execute("SELECT 1 FROM petitions WHERE source='president' AND external_id=?", [pet_id]).fetchone()
                 if exists:
                     continue
                 
-                pet_id = int(s_id)
                 data = fetch_petition_detail(pet_id, session=session)
                 
-                if data and 'error' not in data:
-                    print(f"✨ Found NEW: {s_id} - {data['title'][:40]}...")
-                    
-                    date_norm = data.get('date_normalized')
-                    con.execute("""
-                        INSERT INTO petitions (source, external_id, number, title, date, status, votes, url, author, text_length, has_answer, date_normalized, crawled_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                    """, ('president', s_id, data['number'], data['title'], data['date'], data['status'], data['votes'], data['url'], data['author'], data['text_length'], data.get('has_answer'), date_norm))
+                if data and not isinstance(data, FetchError):
+                    print(f"✨ Found NEW: {s_id} - {data.title[:40]}...")
                     
-                    con.execute("""
-                        INSERT INTO votes_history (petition_id, source, date, votes)
-                        VALUES (?, ?, ?, ?)
-                        ON CONFLICT (petition_id, source, date) DO UPDATE SET votes = EXCLUDED.votes
-                    """, (s_id, 'president', today_str, data['votes']))
+                    con.execute(insert_sql(crawled_at=True), data.db_row())
                     
+                    history.append(('president', pet_id, data.votes))
+                    texts.append(('president', pet_id, data.body, data.answer))
+                    events.append(('president', pet_id, None, data.status))
                     new_count += 1
                     page_new_count += 1
-                    new_petitions_list.append({
-                        "title": data['title'],
-                        "delta": data['votes'],
-                        "total": data['votes'],
-                        "url": data['url']
-                    })
+                    new_petitions_list.append(data.growth(data.votes))
                     time.sleep(1.5)
                 
             print(f"Page {page}: found {page_new_count} new petitions.")
@@ -235,6 +251,9 @@ def sync_president_new(con, today_str, stats, session):
             break
     
     stats["new_petitions"] = new_count
+    record_votes(con, today_str, history)
+    store_texts(con, texts)
+    record_status_events(con, events)
     print(f"✅ Discovery complete. Added {new_count} new petitions.")
     return new_count, new_petitions_list
 
@@ -249,28 +268,25 @@ def sync_cabinet(con, today_str, stats):
     new_count = 0
     votes_delta = 0
     growth_stats = []
+    texts = []
+    events = []
+    history = []
     
-    existing = con.execute("SELECT external_id, votes FROM petitions WHERE source='cabinet'").fetchall()
+    existing = con.execute("SELECT external_id, votes, status FROM petitions WHERE source='cabinet'").fetchall()
     vote_map = {row[0]: row[1] for row in existing}
+    status_map = {row[0]: row[2] for row in existing}
     
     for p in data:
-        p_id = p['id']
+        p_id = p.external_id
         old_votes = vote_map.get(p_id)
-        new_votes = p['votes']
+        new_votes = p.votes
         
         if old_votes is None:
             new_count += 1
-            con.execute("""
-                INSERT OR REPLACE INTO petitions (source, external_id, number, title, date, status, votes, url, author, text_length, has_answer, date_normalized, crawled_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            """, ('cabinet', p_id, p['number'], p['title'], p['date'], p['status'], new_votes, p['url'], None, None, False, p['date'][:10]))
+            con.execute(insert_sql("INSERT OR REPLACE", crawled_at=True), p.db_row())
+            events.append(('cabinet', p_id, None, p.status))
             
-            growth_stats.append({
-                "title": p['title'],
-                "delta": new_votes,
-                "total": new_votes,
-                "url": p['url']
-            })
+            growth_stats.append(p.growth(new_votes))
         else:
             if new_votes != old_votes:
                 delta = new_votes - old_votes
@@ -278,22 +294,21 @@ def sync_cabinet(con, today_str, stats):
                 con.execute("UPDATE petitions SET votes=?, votes_previous=?, updated_at=CURRENT_TIMESTAMP WHERE source='cabinet' AND external_id=?", (new_votes, old_votes, p_id))
                 
                 if delta > 0:
-                    growth_stats.append({
-                        "title": p['title'],
-                        "delta": delta,
-                        "total": new_votes,
-                        "url": p['url']
-                    })
-        # History
-        con.execute("""
-            INSERT INTO votes_history (petition_id, source, date, votes)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT (petition_id, source, date) DO UPDATE SET votes = EXCLUDED.votes
-        """, (p_id, 'cabinet', today_str, new_votes))
+                    growth_stats.append(p.growth(delta))
+            if p.status and p.status != status_map.get(p_id):
+                con.execute("UPDATE petitions SET status=?, updated_at=CURRENT_TIMESTAMP WHERE source='cabinet' AND external_id=?", (p.status, p_id))
+                events.append(('cabinet', p_id, status_map.get(p_id), p.status))
+        texts.append(('cabinet', p_id, p.body, None))
+        history.append(('cabinet', p_id, new_votes))
 
     stats["cabinet_new"] = new_count
     stats["vote_delta"] = stats.get("vote_delta", 0) + votes_delta
     
+    # Unchanged counts only extend their interval in votes_intervals
+    record_votes(con, today_str, history)
+    # Unchanged texts are skipped by checksum, so every run can pass them all
+    store_texts(con, texts)
+    record_status_events(con, events)
     print(f"✅ Cabinet: {new_count} new, {votes_delta} votes delta.")
     return new_count, votes_delta, growth_stats
 
@@ -335,6 +350,15 @@ def main():
         notify_sync_failure("Connection", [str(e)])
         sys.exit(1)
 
+    # Pending schema migrations (migrations.py); a no-op when up to date
+    try:
+        run_migrations(con)
+    except Exception as e:
+        print(f"❌ Schema migration failed: {e}")
+        notify_sync_failure("Schema Migration", [str(e)])
+        con.close()
+        sys.exit(1)
+
     # Step 2: Pre-flight Check
     # Create a single shared session to avoid Akamai flagging excessive TLS handshakes
     session = requests.Session(impersonate="chrome")
@@ -360,6 +384,10 @@ def main():
         pres_delta, pres_status_changes, pres_growth = sync_president_updates(con, today_str, stats, session)
         pres_new, pres_new_list = sync_president_new(con, today_str, stats, session)
         cab_new, cab_delta, cab_growth = sync_cabinet(con, today_str, stats)
+        sync_authors(con)
+        refresh_search_index(con)
+        sync_dedup(con)
+        sync_similar(con)
         
         # Step 5: Post-sync Validation
         postsync_result = run_postsync_validation(con, stats, verbose=True)
@@ -377,25 +405,53 @@ def main():
         
         print("\n--- 4. Saving Daily Stats ---")
         con.execute("""
-            INSERT INTO daily_stats (date, president_new, cabinet_new, total_votes_delta, status_changes)
-            VALUES (?, ?, ?, ?, ?)
+            INSERT INTO daily_stats (date, president_new, cabinet_new, total_votes_delta)
+            VALUES (?, ?, ?, ?)
             ON CONFLICT (date) DO UPDATE SET
                 president_new = daily_stats.president_new + EXCLUDED.president_new,
                 cabinet_new = daily_stats.cabinet_new + EXCLUDED.cabinet_new,
-                total_votes_delta = daily_stats.total_votes_delta + EXCLUDED.total_votes_delta,
-                status_changes = EXCLUDED.status_changes
-        """, (today, pres_new, cab_new, total_delta, json.dumps(pres_status_changes)))
+                total_votes_delta = daily_stats.total_votes_delta + EXCLUDED.total_votes_delta
+        """, (today, pres_new, cab_new, total_delta))
         
         print(f"Saved stats: +{pres_new + cab_new} petitions, +{total_delta} votes.")
         
-        # Step 7: Export JSON
-        print("\n--- 5. Exporting JSON ---")
-        export_analytics_cloud(con, growth_stats=all_growth)
+        # Step 7: Refresh rollups from today's history rows
+        print("\n--- 5. Refreshing Rollups ---")
+        refresh_rollups(con, today_str)
+        refresh_series(con)
+        refresh_forecasts(con, today_str)
+        refresh_funnel_metrics(con)
+        spikes = detect_anomalies(con, today_str)
+        stats["anomalies"] = len(spikes)
+        notify_anomalies(spikes)
+        
+        # Step 8: Pull the changes into the local replica and export from it,
+        # so the export queries don't go over the network
+        print("\n--- 6. Refreshing Local Replica ---")
+        export_con = con
+        try:
+            refresh_replica(con)
+            export_con = open_replica()
+        except Exception as e:
+            print(f"   ⚠️ Replica refresh failed ({e}), exporting from MotherDuck")
+
+        print("\n--- 7. Exporting JSON ---")
+        try:
+            export_analytics_cloud(export_con, growth_stats=all_growth)
+
+            print("\n--- 8. Writing Parquet Snapshots ---")
+            try:
+                write_snapshot(export_con)
+            except Exception as e:
+                print(f"   ⚠️ Snapshot failed: {e}")
+        finally:
+            if export_con is not con:
+                export_con.close()
         
-        # Step 8: Cleanup
+        # Step 9: Cleanup
         cleanup_backup(con)
         
-        # Step 9: Optional success notification
+        # Step 10: Optional success notification
         if args.notify_success:
             stats["new_petitions"] = pres_new + cab_new
             stats["vote_delta"] = total_delta
@@ -2,12 +2,24 @@
 import duckdb
 import requests
 import time
-import json
 import os
 from datetime import datetime, date
-from scraper_detail import fetch_petition_detail, normalize_date
+from scraper_detail import fetch_petition_detail
 from scraper_cabinet import fetch_cabinet_petitions
+from records import FetchError, insert_sql
 from pipeline import export_analytics
+from rollups import refresh_rollups
+from authors import sync_authors
+from search import refresh_search_index
+from dedup import sync_dedup
+from similar import sync_similar
+from forecast import refresh_forecasts
+from series_cache import refresh_series
+from anomalies import detect_anomalies
+from text_store import store_texts
+from status_events import record_status_events, refresh_funnel_metrics
+from votes_store import record_votes
+from migrations import run_migrations
 
 # --- CONFIG ---
 # Get project root (parent of etl/)
@@ -26,7 +38,7 @@ def sync_president_updates(con, today_str):
     
     # Get active petitions
     active_ids = con.execute("""
-        SELECT external_id, votes, status 
+        SELECT external_id, votes, status, text_length
         FROM petitions 
         WHERE source='president' AND status='Триває збір підписів'
     """).fetchall()
@@ -34,12 +46,15 @@ def sync_president_updates(con, today_str):
     print(f"Checking {len(active_ids)} active petitions...")
     
     updates_count = 0
+    skipped_writes = 0
     votes_delta_sum = 0
     status_changes = []
     growth_stats = []
+    texts = []
+    history = []
     
     for row in active_ids:
-        pet_id, old_votes, old_status = row[0], row[1], row[2]
+        pet_id, old_votes, old_status, old_text_length = row
         
         # Fetch fresh data
         data = fetch_petition_detail(pet_id)
@@ -47,17 +62,17 @@ def sync_president_updates(con, today_str):
         if not data:
             continue
             
-        if 'error' in data:
-            if data['error'] == 404:
+        if isinstance(data, FetchError):
+            if data.not_found:
                 print(f"⚠️ ID {pet_id} not found (404). Marking as 'Not Found'.")
                 con.execute("UPDATE petitions SET status='Not Found', updated_at=CURRENT_TIMESTAMP WHERE source='president' AND external_id=?", [pet_id])
                 status_changes.append({"id": pet_id, "from": old_status, "to": "Not Found"})
-            elif data['error'] in (429, 503):
+            elif data.error in (429, 503):
                  print(f"Skipping {pet_id} due to rate limit/error.")
             continue
 
         # Calculate delta
-        new_votes = data.get('votes', 0)
+        new_votes = data.votes or 0
         
         # SAFETY CHECK: If votes dropped to 0 from something, it's likely a scrape fail (unless active -> archive, but even then votes usually stay)
         # President petitions don't usually lose votes.
@@ -65,32 +80,30 @@ def sync_president_updates(con, today_str):
              print(f"⚠️ Suspicious vote drop for {pet_id}: {old_votes} -> {new_votes}. Keeping old votes.")
              new_votes = old_votes
         
-        current_status = data.get('status')
+        current_status = data.status
         delta = new_votes - (old_votes or 0)
+        text_length = data.text_length or 0
         
-        # Update DB
-        con.execute("""
-            UPDATE petitions 
-            SET votes=?, votes_previous=?, status=?, text_length=?, updated_at=CURRENT_TIMESTAMP
-            WHERE source='president' AND external_id=?
-        """, (new_votes, old_votes, current_status, data.get('text_length', 0), pet_id))
+        # Update DB, only if something changed: an unchanged petition keeps
+        # its updated_at and votes_previous
+        if (new_votes, current_status, text_length) != (old_votes, old_status, old_text_length):
+            con.execute("""
+                UPDATE petitions 
+                SET votes=?, votes_previous=?, status=?, text_length=?, updated_at=CURRENT_TIMESTAMP
+                WHERE source='president' AND external_id=?
+            """, (new_votes, old_votes, current_status, text_length, pet_id))
+            updates_count += 1
+        else:
+            skipped_writes += 1
         
-        # Add to history
-        con.execute("""
-            INSERT OR REPLACE INTO votes_history (petition_id, source, date, votes)
-            VALUES (?, ?, ?, ?)
-        """, (pet_id, 'president', today_str, new_votes))
+        # Add to history (an unchanged count only extends its interval)
+        history.append(('president', pet_id, new_votes))
 
-        updates_count += 1
+        texts.append(('president', pet_id, data.body, data.answer))
         votes_delta_sum += delta
         
         if delta > 0:
-            growth_stats.append({
-                "title": data['title'],
-                "delta": delta,
-                "total": new_votes,
-                "url": data['url']
-            })
+            growth_stats.append(data.growth(delta))
         
         if current_status != old_status:
             print(f"🔄 Status change for {pet_id}: {old_status} -> {current_status}")
@@ -98,7 +111,11 @@ def sync_president_updates(con, today_str):
             
         time.sleep(0.5) # Be polite
         
-    print(f"✅ Updated: {updates_count}. Total Vote Delta: {votes_delta_sum}")
+    record_votes(con, today_str, history)
+    store_texts(con, texts)
+    record_status_events(con, [('president', c['id'], c['from'], c['to']) for c in status_changes])
+    print(f"✅ Updated: {updates_count}, unchanged (not written): {skipped_writes}. "
+          f"Total Vote Delta: {votes_delta_sum}")
     return votes_delta_sum, status_changes, growth_stats
 
 def sync_president_new(con, today_str):
@@ -111,6 +128,9 @@ def sync_president_new(con, today_str):
     new_count = 0
     new_petitions_list = []
     processed_ids = set()
+    texts = []
+    events = []
+    history = []
     
     # We scan up to 5 pages. Usually 1-2 is enough if run daily.
     for page in range(1, 6):
@@ -135,33 +155,26 @@ def sync_president_new(con, today_str):
                 processed_ids.add(s_id)
                 
                 # Check DB
-                exists = con.execute("SELECT 1 FROM petitions WHERE source='president' AND external_id=?", [s_id]).fetchone()
+                pet_id = int(s_id)
+                exists = con.execute("SELECT 1 FROM petitions WHERE source='president' AND external_id=?", [pet_id]).fetchone()
                 if exists:
                     continue
                 
                 # It's new!
-                pet_id = int(s_id)
                 data = fetch_petition_detail(pet_id)
                 
-                if data and 'error' not in data:
-                    print(f"✨ Found NEW: {s_id} - {data['title'][:40]}...")
+                if data and not isinstance(data, FetchError):
+                    print(f"✨ Found NEW: {s_id} - {data.title[:40]}...")
                     
-                    date_norm = data.get('date_normalized')
-                    con.execute("""
-                        INSERT INTO petitions (source, external_id, number, title, date, status, votes, url, author, text_length, has_answer, date_normalized, crawled_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                    """, ('president', s_id, data['number'], data['title'], data['date'], data['status'], data['votes'], data['url'], data['author'], data['text_length'], data.get('has_answer'), date_norm))
+                    con.execute(insert_sql(crawled_at=True), data.db_row())
                     
-                    con.execute("INSERT OR REPLACE INTO votes_history VALUES (?, ?, ?, ?)", (s_id, 'president', today_str, data['votes']))
+                    history.append(('president', pet_id, data.votes))
                     
+                    texts.append(('president', pet_id, data.body, data.answer))
+                    events.append(('president', pet_id, None, data.status))
                     new_count += 1
                     page_new_count += 1
-                    new_petitions_list.append({
-                        "title": data['title'],
-                        "delta": data['votes'],
-                        "total": data['votes'],
-                        "url": data['url']
-                    })
+                    new_petitions_list.append(data.growth(data.votes))
                     time.sleep(0.8) # Gentle delay
                 
             print(f"Page {page}: found {page_new_count} new petitions.")
@@ -175,6 +188,9 @@ def sync_president_new(con, today_str):
             print(f"Error on page {page}: {e}")
             break
             
+    record_votes(con, today_str, history)
+    store_texts(con, texts)
+    record_status_events(con, events)
     print(f"✅ Discovery complete. Added {new_count} new petitions.")
     return new_count, new_petitions_list
 
@@ -190,31 +206,28 @@ def sync_cabinet(con, today_str):
     new_count = 0
     votes_delta = 0
     growth_stats = []
+    texts = []
+    events = []
+    history = []
     
     # Get existing map
-    existing = con.execute("SELECT external_id, votes FROM petitions WHERE source='cabinet'").fetchall()
+    existing = con.execute("SELECT external_id, votes, status FROM petitions WHERE source='cabinet'").fetchall()
     vote_map = {row[0]: row[1] for row in existing}
+    status_map = {row[0]: row[2] for row in existing}
     
     for p in data:
-        p_id = p['id']
+        p_id = p.external_id
         old_votes = vote_map.get(p_id)
-        new_votes = p['votes']
+        new_votes = p.votes
         
         if old_votes is None:
             # New
             new_count += 1
-            con.execute("""
-                INSERT OR REPLACE INTO petitions (source, external_id, number, title, date, status, votes, url, author, text_length, has_answer, date_normalized, crawled_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            """, ('cabinet', p_id, p['number'], p['title'], p['date'], p['status'], new_votes, p['url'], None, None, False, p['date'][:10]))
+            con.execute(insert_sql("INSERT OR REPLACE", crawled_at=True), p.db_row())
+            events.append(('cabinet', p_id, None, p.status))
             
             # Add to growth stats as new
-            growth_stats.append({
-                "title": p['title'],
-                "delta": new_votes,
-                "total": new_votes,
-                "url": p['url']
-            })
+            growth_stats.append(p.growth(new_votes))
             
         else:
             # Update
@@ -224,21 +237,25 @@ def sync_cabinet(con, today_str):
                 con.execute("UPDATE petitions SET votes=?, votes_previous=?, updated_at=CURRENT_TIMESTAMP WHERE source='cabinet' AND external_id=?", (new_votes, old_votes, p_id))
                 
                 if delta > 0:
-                    growth_stats.append({
-                        "title": p['title'],
-                        "delta": delta,
-                        "total": new_votes,
-                        "url": p['url']
-                    })
+                    growth_stats.append(p.growth(delta))
+            if p.status and p.status != status_map.get(p_id):
+                con.execute("UPDATE petitions SET status=?, updated_at=CURRENT_TIMESTAMP WHERE source='cabinet' AND external_id=?", (p.status, p_id))
+                events.append(('cabinet', p_id, status_map.get(p_id), p.status))
         
-        # History
-        con.execute("INSERT OR REPLACE INTO votes_history VALUES (?, ?, ?, ?)", (p_id, 'cabinet', today_str, new_votes))
+        texts.append(('cabinet', p_id, p.body, None))
+        history.append(('cabinet', p_id, new_votes))
 
+    # Unchanged counts only extend their interval in votes_intervals
+    record_votes(con, today_str, history)
+    # Unchanged texts are skipped by checksum, so every run can pass them all
+    store_texts(con, texts)
+    record_status_events(con, events)
     print(f"✅ Cabinet: {new_count} new, {votes_delta} votes delta.")
     return new_count, votes_delta, growth_stats
 
 def main():
     con = get_db_connection()
+    run_migrations(con)
     today = date.today()
     today_str = today.isoformat()
     
@@ -252,6 +269,14 @@ def main():
     
     # 3. Cabinet Sync
     cab_new, cab_delta, cab_growth = sync_cabinet(con, today_str)
+
+    # Resolve authors of new petitions + refresh their leaderboard stats,
+    # then index new/changed titles and bodies for search, cluster new near-duplicates
+    # and add new petitions to the similar-petitions index
+    sync_authors(con)
+    refresh_search_index(con)
+    sync_dedup(con)
+    sync_similar(con)
     
     # 4. Aggregation
     total_delta = pres_delta + cab_delta
@@ -263,13 +288,20 @@ def main():
     
     print("\n--- 4. Saving Daily Stats ---")
     con.execute("""
-        INSERT OR REPLACE INTO daily_stats (date, president_new, cabinet_new, total_votes_delta, status_changes)
-        VALUES (?, ?, ?, ?, ?)
-    """, (today, total_new_pres, total_new_cab, total_delta, json.dumps(pres_status_changes)))
+        INSERT OR REPLACE INTO daily_stats (date, president_new, cabinet_new, total_votes_delta)
+        VALUES (?, ?, ?, ?)
+    """, (today, total_new_pres, total_new_cab, total_delta))
     
     print(f"Saved stats: +{total_new_pres + total_new_cab} petitions, +{total_delta} votes.")
 
-    print("\n--- 5. Exporting JSON ---")
+    print("\n--- 5. Refreshing Rollups ---")
+    refresh_rollups(con, today_str)
+    refresh_series(con)
+    refresh_forecasts(con, today_str)
+    refresh_funnel_metrics(con)
+    detect_anomalies(con, today_str)
+
+    print("\n--- 6. Exporting JSON ---")
     export_analytics(con, growth_stats=all_growth) 
     
     con.close()
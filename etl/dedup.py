@@ -0,0 +1,407 @@
+"""
+Near-duplicate petition detection (MinHash + LSH over title shingles).
+
+Many petitions are the same template with a different name in it ("Присвоїти
+звання Герой України посмертно ..."), which inflates category and keyword
+counts. Every petition gets a `cluster_id` (the "source:id" key of one of its
+members); near-duplicates share it, so exports can count distinct clusters
+next to raw rows.
+
+    1. title -> normalized text -> character 3-gram shingles (hashed to 64 bits)
+    2. shingles -> 64 MinHash values (one multiply-shift hash per permutation)
+    3. signature -> 16 LSH bands of 4 values; titles sharing a band bucket are
+       candidates, kept when their estimated Jaccard >= SIMILARITY
+    4. candidate pairs -> connected components = clusters
+
+Everything is vectorized with NumPy, and candidate generation only looks
+inside buckets, so the cost grows ~linearly with the number of titles instead
+of comparing all pairs.
+
+Tables:
+    dedup_docs  - source, petition_id, MinHash signature (BLOB), cluster_id
+    dedup_lsh   - (band, bucket) -> petition, the LSH index for new inserts
+
+New petitions are signed and looked up against dedup_lsh; clusters they
+bridge are merged. Titles are not re-read once signed (they don't change).
+
+Usage:
+    python dedup.py                  # Sign new petitions (local DB)
+    python dedup.py --rebuild        # Rebuild all clusters from scratch
+    python dedup.py --top 10         # Print the largest clusters
+    python dedup.py --cloud ...      # Same, against MotherDuck
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+
+import duckdb
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from typed_schema import SOURCE_TYPE, init_types
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(BASE_DIR, 'petitions.duckdb')
+
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Estimated Jaccard a candidate pair must reach to be merged
+SIMILARITY = 0.45
+# Signatures per NumPy chunk (bounds memory on big rebuilds)
+CHUNK_SIZE = 20000
+# Members of a bucket (the first ones) each petition is compared with, per band
+BUCKET_MATES = 8
+
+# Permutation k is the multiply-shift hash (A[k] * h + B[k]) >> 32 (A odd, mod 2^64)
+_rng = np.random.RandomState(20240501)
+PERM_A = _rng.randint(0, 2**64 - 1, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+PERM_B = _rng.randint(0, 2**64 - 1, size=NUM_PERM, dtype=np.uint64)
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+_APOSTROPHES_RE = re.compile("[’ʼ`‘´']")
+
+
+def normalize_title(title):
+    """Lowercase, apostrophes dropped, punctuation runs -> one space."""
+    text = _APOSTROPHES_RE.sub("", (title or "").lower())
+    return _NON_WORD_RE.sub(" ", text).strip().ljust(SHINGLE_SIZE)
+
+
+def shingle_hashes(texts):
+    """
+    64-bit hashes of every character k-gram of every text, concatenated, plus
+    the offset of each text's first shingle. Texts are at least SHINGLE_SIZE
+    long (normalize_title pads them), so every text has >= 1 shingle.
+    """
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+    codes = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+
+    counts = lengths - SHINGLE_SIZE + 1
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    text_starts = np.zeros(len(texts), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=text_starts[1:])
+
+    # Start position (in `codes`) of every shingle
+    positions = np.arange(offsets[-1], dtype=np.int64) - np.repeat(offsets[:-1] - text_starts, counts)
+
+    h = np.zeros(len(positions), dtype=np.uint64)
+    for j in range(SHINGLE_SIZE):
+        h = h * np.uint64(1000003) + codes[positions + j]
+    # Final avalanche (splitmix64) so nearby code points spread over all bits
+    h ^= h >> np.uint64(30)
+    h *= np.uint64(0xBF58476D1CE4E5B9)
+    h ^= h >> np.uint64(27)
+    h *= np.uint64(0x94D049BB133111EB)
+    h ^= h >> np.uint64(31)
+    return h, offsets
+
+
+def minhash(texts):
+    """(n, NUM_PERM) uint32 MinHash signatures of normalized `texts`."""
+    sigs = np.empty((len(texts), NUM_PERM), dtype=np.uint32)
+    shift = np.uint64(32)
+    for start in range(0, len(texts), CHUNK_SIZE):
+        chunk = texts[start:start + CHUNK_SIZE]
+        h, offsets = shingle_hashes(chunk)
+        for k in range(NUM_PERM):
+            values = (PERM_A[k] * h + PERM_B[k]) >> shift
+            sigs[start:start + len(chunk), k] = np.minimum.reduceat(values, offsets[:-1])
+    return sigs
+
+
+def sign_titles(titles):
+    """
+    Signatures of the distinct normalized titles, plus each title's row in
+    them. Template petitions repeat the exact same text a lot, so they are
+    hashed and clustered once.
+    """
+    distinct, inverse = {}, np.empty(len(titles), dtype=np.int64)
+    for i, title in enumerate(titles):
+        inverse[i] = distinct.setdefault(normalize_title(title), len(distinct))
+    return minhash(list(distinct)), inverse
+
+
+def band_keys(sigs):
+    """(n, BANDS) uint64 bucket keys, one per band of ROWS signature values."""
+    keys = np.zeros((len(sigs), BANDS), dtype=np.uint64)
+    banded = sigs.reshape(len(sigs), BANDS, ROWS).astype(np.uint64)
+    for r in range(ROWS):
+        keys = (keys ^ banded[:, :, r]) * np.uint64(0x100000001B3)
+        keys ^= keys >> np.uint64(29)
+    return keys
+
+
+def similar(sigs, a, b, other=None):
+    """Boolean mask: estimated Jaccard of sigs[a] vs (other or sigs)[b] >= SIMILARITY."""
+    other = sigs if other is None else other
+    out = np.empty(len(a), dtype=bool)
+    for start in range(0, len(a), CHUNK_SIZE * 10):
+        end = start + CHUNK_SIZE * 10
+        matches = (sigs[a[start:end]] == other[b[start:end]]).sum(axis=1)
+        out[start:end] = matches >= SIMILARITY * NUM_PERM
+    return out
+
+
+def candidate_pairs(keys):
+    """
+    Pairs (i, j) of rows sharing a bucket in any band: every row is paired with
+    the first BUCKET_MATES rows of its bucket, so a bucket of m rows yields at
+    most m * BUCKET_MATES pairs (template buckets hold thousands of rows).
+    """
+    firsts, others = [], []
+    positions = np.arange(len(keys))
+    for b in range(keys.shape[1]):
+        order = np.argsort(keys[:, b], kind="stable")
+        sorted_keys = keys[order, b]
+        new_run = np.ones(len(order), dtype=bool)
+        new_run[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        run_start = np.maximum.accumulate(np.where(new_run, positions, 0))
+        for k in range(BUCKET_MATES):
+            mate = run_start + k
+            member = mate < positions
+            if not member.any():
+                break
+            firsts.append(order[mate[member]])
+            others.append(order[member])
+    if not firsts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # The same pair usually shows up in several bands
+    pairs = np.unique(np.concatenate(firsts) * len(keys) + np.concatenate(others))
+    return pairs // len(keys), pairs % len(keys)
+
+
+def connected_components(n, a, b):
+    """Label of each of n nodes (smallest node index in its component)."""
+    labels = np.arange(n, dtype=np.int64)
+    while len(a):
+        la, lb = labels[a], labels[b]
+        low = np.minimum(la, lb)
+        changed = la != lb
+        if not changed.any():
+            break
+        np.minimum.at(labels, la[changed], low[changed])
+        np.minimum.at(labels, lb[changed], low[changed])
+        # Pointer jumping until every node points at its root
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+    return labels
+
+
+def init_dedup_tables(con):
+    """Creates the dedup tables if they don't exist."""
+    init_types(con)
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS dedup_docs (
+            source {SOURCE_TYPE},
+            petition_id INTEGER,
+            sig BLOB,
+            cluster_id VARCHAR,
+            PRIMARY KEY (source, petition_id)
+        )
+    """)
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS dedup_lsh (
+            band SMALLINT,
+            bucket UBIGINT,
+            source {SOURCE_TYPE},
+            petition_id INTEGER
+        )
+    """)
+
+
+def _insert_docs(con, sources, ids, sigs, keys, cluster_ids):
+    """Bulk-inserts signed petitions and their LSH rows (NumPy arrays are scanned directly)."""
+    docs = {
+        "source": np.asarray(sources, dtype=object),
+        "petition_id": np.asarray(ids, dtype=np.int64),
+        # Hex: an object array of bytes would be scanned as VARCHAR
+        "sig": np.array([s.tobytes().hex() for s in sigs], dtype=object),
+        "cluster_id": np.asarray(cluster_ids, dtype=object),
+    }
+    con.execute("INSERT INTO dedup_docs SELECT source, petition_id, unhex(sig), cluster_id FROM docs")
+
+    lsh = {
+        "band": np.tile(np.arange(BANDS, dtype=np.int16), len(sources)),
+        "bucket": keys.reshape(-1),
+        "source": np.repeat(docs["source"], BANDS),
+        "petition_id": np.repeat(docs["petition_id"], BANDS),
+    }
+    con.execute("INSERT INTO dedup_lsh SELECT band, bucket, source, petition_id FROM lsh ORDER BY band, bucket")
+
+
+def rebuild_clusters(con):
+    """Signs every petition and clusters them from scratch. Returns (petitions, clusters)."""
+    init_dedup_tables(con)
+    rows = con.execute("""
+        SELECT source, external_id, title FROM petitions
+        WHERE title IS NOT NULL
+        ORDER BY source, external_id
+    """).fetchall()
+    con.execute("DELETE FROM dedup_lsh")
+    con.execute("DELETE FROM dedup_docs")
+    if not rows:
+        return 0, 0
+
+    sources, ids, titles = zip(*rows)
+    sigs, inverse = sign_titles(titles)
+    keys = band_keys(sigs)
+
+    a, b = candidate_pairs(keys)
+    keep = similar(sigs, a, b)
+    components = connected_components(len(sigs), a[keep], b[keep])[inverse]
+
+    # Cluster id = key of the component's first petition (in source, id order)
+    first = np.full(len(sigs), len(rows), dtype=np.int64)
+    np.minimum.at(first, components, np.arange(len(rows)))
+    cluster_ids = [f"{sources[i]}:{ids[i]}" for i in first[components].tolist()]
+
+    _insert_docs(con, sources, ids, sigs[inverse], keys[inverse], cluster_ids)
+    return len(rows), len(np.unique(components))
+
+
+def add_new_petitions(con):
+    """
+    Signs petitions not in dedup_docs yet and places them: a new petition joins
+    (and may merge) the clusters of similar bucket-mates, or starts its own.
+    Returns (new petitions, clusters merged).
+    """
+    rows = con.execute("""
+        SELECT p.source, p.external_id, p.title
+        FROM petitions p
+        ANTI JOIN dedup_docs d ON d.source = p.source AND d.petition_id = p.external_id
+        WHERE p.title IS NOT NULL
+        ORDER BY p.source, p.external_id
+    """).fetchall()
+    if not rows:
+        return 0, 0
+
+    sources, ids, titles = zip(*rows)
+    sigs, inverse = sign_titles(titles)
+    keys = band_keys(sigs)
+    n = len(sigs)
+
+    # New vs new: same banding as a rebuild, within the batch
+    a, b = candidate_pairs(keys)
+    keep = similar(sigs, a, b)
+    edges = list(zip(a[keep].tolist(), b[keep].tolist()))
+
+    # New vs existing: the first bucket-mates from the LSH table
+    probe = {
+        "row": np.repeat(np.arange(n, dtype=np.int64), BANDS),
+        "band": np.tile(np.arange(BANDS, dtype=np.int16), n),
+        "bucket": keys.reshape(-1),
+    }
+    mates = con.execute(f"""
+        WITH mates AS (
+            SELECT l.band, l.bucket, l.source, l.petition_id
+            FROM dedup_lsh l
+            SEMI JOIN probe p ON p.band = l.band AND p.bucket = l.bucket
+            QUALIFY row_number() OVER (PARTITION BY l.band, l.bucket ORDER BY l.source, l.petition_id)
+                    <= {BUCKET_MATES}
+        )
+        SELECT DISTINCT p.row, d.sig, d.cluster_id
+        FROM probe p
+        JOIN mates m ON m.band = p.band AND m.bucket = p.bucket
+        JOIN dedup_docs d ON d.source = m.source AND d.petition_id = m.petition_id
+    """).fetchall()
+
+    # Nodes: 0..n-1 are the new distinct titles, then one node per existing cluster
+    cluster_nodes = {}
+    if mates:
+        rows_idx = np.array([m[0] for m in mates], dtype=np.int64)
+        mate_sigs = np.frombuffer(b"".join(m[1] for m in mates), dtype=np.uint32).reshape(len(mates), NUM_PERM)
+        for i in np.flatnonzero(similar(sigs, rows_idx, np.arange(len(mates)), other=mate_sigs)):
+            node = cluster_nodes.setdefault(mates[i][2], n + len(cluster_nodes))
+            edges.append((int(rows_idx[i]), node))
+
+    edge_a = np.array([e[0] for e in edges], dtype=np.int64)
+    edge_b = np.array([e[1] for e in edges], dtype=np.int64)
+    labels = connected_components(n + len(cluster_nodes), edge_a, edge_b)
+
+    # A component keeps the smallest existing cluster id it touches, else its first new petition
+    chosen = {}
+    for cluster, node in sorted(cluster_nodes.items()):
+        chosen.setdefault(int(labels[node]), cluster)
+    for i, label in enumerate(labels[inverse].tolist()):
+        chosen.setdefault(label, f"{sources[i]}:{ids[i]}")
+
+    merged = 0
+    for cluster, node in cluster_nodes.items():
+        target = chosen[int(labels[node])]
+        if target != cluster:
+            con.execute("UPDATE dedup_docs SET cluster_id = ? WHERE cluster_id = ?", [target, cluster])
+            merged += 1
+
+    cluster_ids = [chosen[label] for label in labels[inverse].tolist()]
+    _insert_docs(con, sources, ids, sigs[inverse], keys[inverse], cluster_ids)
+    return len(rows), merged
+
+
+def sync_dedup(con):
+    """Called once per sync after petitions were written: clusters new petitions."""
+    init_dedup_tables(con)
+    if con.execute("SELECT COUNT(*) FROM dedup_docs").fetchone()[0] == 0:
+        count, clusters = rebuild_clusters(con)
+        print(f"   ✅ dedup: {count} petitions in {clusters} clusters.")
+    else:
+        count, merged = add_new_petitions(con)
+        print(f"   ✅ dedup: {count} new petitions clustered ({merged} clusters merged).")
+
+
+def largest_clusters(con, limit=10):
+    """Biggest near-duplicate clusters with one sample title each."""
+    rows = con.execute("""
+        SELECT d.cluster_id, COUNT(*) AS size, SUM(p.votes) AS votes, any_value(p.title) AS title
+        FROM dedup_docs d
+        JOIN petitions p ON p.source = d.source AND p.external_id = d.petition_id
+        GROUP BY d.cluster_id
+        HAVING COUNT(*) > 1
+        ORDER BY size DESC, d.cluster_id
+        LIMIT ?
+    """, [limit]).fetchall()
+    return [{"cluster_id": r[0], "size": r[1], "votes": r[2], "title": r[3]} for r in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cluster near-duplicate petitions (MinHash LSH)")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild all clusters from scratch")
+    parser.add_argument("--top", type=int, help="Print the N largest clusters")
+    parser.add_argument("--cloud", action="store_true", help="Run against MotherDuck instead of the local DB")
+    args = parser.parse_args()
+
+    if args.cloud:
+        from cloud_sync import get_motherduck_connection
+        con = get_motherduck_connection()
+    else:
+        print(f"💾 Connecting to local DB: {DB_FILE}")
+        con = duckdb.connect(DB_FILE)
+
+    try:
+        start = time.time()
+        if args.rebuild:
+            count, clusters = rebuild_clusters(con)
+            print(f"✅ {count} petitions in {clusters} clusters.")
+        else:
+            sync_dedup(con)
+        print(f"⏱️ {time.time() - start:.2f}s")
+
+        if args.top:
+            print(f"\n👯 Largest clusters:")
+            for c in largest_clusters(con, args.top):
+                print(f"   {c['size']:>5} × {c['title'][:80]}  ({c['votes']:,} votes)")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
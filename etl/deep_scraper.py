@@ -5,6 +5,7 @@ import random
 import re
 from bs4 import BeautifulSoup
 from pipeline import save_to_db, DB_FILE
+from records import PetitionRecord
 
 # Range to scrape (approx 3000 items from recent history backwards)
 START_ID = 256000
@@ -54,16 +55,16 @@ def parse_single_page(html, pet_id):
     # Votes - tricky, trying regex on the whole body or checking specific classes
     votes = 0
     
-    return {
-        "source": "president",
-        "id": str(pet_id),
-        "number": number,
-        "title": title,
-        "date": date,
-        "status": status,
-        "votes": votes,
-        "url": URL_TEMPLATE.format(pet_id)
-    }
+    return PetitionRecord(
+        source="president",
+        external_id=int(pet_id),
+        number=number,
+        title=title,
+        date=date,
+        status=status,
+        votes=votes,
+        url=URL_TEMPLATE.format(pet_id),
+    )
 
 def run_deep_scrape():
     con = duckdb.connect(DB_FILE)
@@ -100,8 +101,8 @@ def run_deep_scrape():
                     con.execute("DELETE FROM petitions WHERE source='president' AND external_id=?", (str(current_id),))
                     continue
                     
-                if pet['date'] != "Unknown":
-                    print(f"[{current_id}] ✅ Fixed Date: {pet['date']}")
+                if pet.date != "Unknown":
+                    print(f"[{current_id}] ✅ Fixed Date: {pet.date}")
                     batch.append(pet)
                 else:
                     print(f"[{current_id}] ⚠️ Date still not found (HTML mismatch?)")
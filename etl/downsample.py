@@ -0,0 +1,115 @@
+"""
+Multi-resolution history series for the dashboard sparkline.
+
+The raw history has one point per synced day and grows forever. The export
+ships three bounded tiers instead:
+
+    daily    - last 90 days, one point per day
+    weekly   - last 2 years, summed per ISO week (Monday)
+    monthly  - full history, summed per month
+
+Each tier is capped with LTTB (Largest-Triangle-Three-Buckets), which keeps
+the points that preserve the visual shape of the series, so the payload stays
+the same size no matter how long the pipeline has been running.
+"""
+
+from datetime import date, timedelta
+
+DAILY_DAYS = 90
+WEEKLY_DAYS = 730
+
+# Maximum points per tier after LTTB
+TIER_LIMITS = {"daily": 90, "weekly": 104, "monthly": 120}
+
+# Flow fields that are summed when days are merged into a bucket
+SUM_FIELDS = ("president", "cabinet", "total", "pres_new", "cab_new")
+
+
+def lttb(points, threshold, y_key="total"):
+    """
+    Downsamples `points` (dicts sorted by "date") to at most `threshold` points
+    using Largest-Triangle-Three-Buckets. The first and last points are kept;
+    from every bucket in between the point forming the largest triangle with
+    the previously selected point and the average of the next bucket is kept.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    xs = [date.fromisoformat(p["date"]).toordinal() for p in points]
+    ys = [p[y_key] or 0 for p in points]
+
+    sampled = [points[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0  # index of the previously selected point
+
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        # Average of the next bucket (the last point for the final bucket)
+        next_start = end
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        if next_start >= next_end:
+            avg_x, avg_y = xs[-1], ys[-1]
+        else:
+            span = next_end - next_start
+            avg_x = sum(xs[next_start:next_end]) / span
+            avg_y = sum(ys[next_start:next_end]) / span
+
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def bucket(points, key):
+    """Sums SUM_FIELDS of daily points per bucket; `key(date)` returns the bucket start."""
+    buckets = {}
+    for p in points:
+        start = key(date.fromisoformat(p["date"])).isoformat()
+        b = buckets.setdefault(start, {"date": start, "days": 0, **{f: 0 for f in SUM_FIELDS}})
+        b["days"] += 1
+        for f in SUM_FIELDS:
+            b[f] += p.get(f) or 0
+    return [buckets[k] for k in sorted(buckets)]
+
+
+def week_start(d):
+    return d - timedelta(days=d.weekday())
+
+
+def month_start(d):
+    return d.replace(day=1)
+
+
+def build_history_tiers(daily_points):
+    """
+    daily_points: [{"date": "YYYY-MM-DD", "president", "cabinet", "total",
+    "pres_new", "cab_new"}] sorted by date. Windows are anchored at the last
+    date in the data (not the wall clock), so re-exports are deterministic.
+    """
+    if not daily_points:
+        return {"daily": [], "weekly": [], "monthly": [], "days_tracked": 0}
+
+    last = date.fromisoformat(daily_points[-1]["date"])
+    daily_from = (last - timedelta(days=DAILY_DAYS - 1)).isoformat()
+    weekly_from = week_start(last - timedelta(days=WEEKLY_DAYS - 1)).isoformat()
+
+    recent = [p for p in daily_points if p["date"] >= daily_from]
+    weekly = bucket([p for p in daily_points if p["date"] >= weekly_from], week_start)
+    monthly = bucket(daily_points, month_start)
+
+    return {
+        "daily": lttb(recent, TIER_LIMITS["daily"]),
+        "weekly": lttb(weekly, TIER_LIMITS["weekly"]),
+        "monthly": lttb(monthly, TIER_LIMITS["monthly"]),
+        "days_tracked": len(daily_points),
+    }
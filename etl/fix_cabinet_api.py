@@ -8,6 +8,9 @@ import time
 import random
 import json
 
+from authors import init_author_tables
+from typed_schema import normalize_status
+
 API_BASE_URL = "https://petition.kmu.gov.ua/api/petitions/"
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -37,21 +40,15 @@ def fetch_cabinet_data(pet_id):
         
         data = resp.json()
         
-        # Мапінг статусів (Cabinet -> Наша база)
+        # Мапінг статусів (Cabinet -> Наша база): typed_schema.STATUS_ALIASES
         # Кабмін використовує: Unsupported, Approved, Answered, Supported
-        status_map = {
-            'Unsupported': 'Не підтримано',
-            'Answered': 'З відповіддю',
-            'Approved': 'На розгляді',
-            'Supported': 'Триває збір підписів'
-        }
-        raw_status = data.get('status', 'Unknown')
+        raw_status = data.get('status')
         
         return {
             'author': data.get('author'),
             'text_length': len(data.get('content', '')) if data.get('content') else 0,
             'votes': data.get('signaturesNumber', 0),
-            'status': status_map.get(raw_status, raw_status),
+            'status': normalize_status(raw_status) or 'Unknown',
             'has_answer': data.get('answer') is not None or data.get('answeredAt') is not None
         }
     except Exception as e:
@@ -64,6 +61,8 @@ def run_fix():
     print("="*70)
 
     con = duckdb.connect(DB_FILE)
+    # author_id is reset with the author, sync_authors() resolves it again
+    init_author_tables(con)
     
     # Знаходимо всі ID Кабміну, де порожній автор
     ids_to_fix = con.execute("""
@@ -94,7 +93,7 @@ def run_fix():
             # Оновлюємо тільки потрібні поля
             con.execute("""
                 UPDATE petitions 
-                SET author = ?, text_length = ?, votes = ?, status = ?, has_answer = ?
+                SET author = ?, author_id = NULL, text_length = ?, votes = ?, status = ?, has_answer = ?
                 WHERE source = 'cabinet' AND external_id = ?
             """, [data['author'], data['text_length'], data['votes'], data['status'], data['has_answer'], pet_id])
             stats['updated'] += 1
@@ -6,6 +6,9 @@ import requests
 import duckdb
 import json
 
+from authors import init_author_tables
+from typed_schema import normalize_status
+
 API_URL = "https://petition.kmu.gov.ua/api/petitions"
 HEADERS = {
     "User-Agent": "Mozilla/5.0",
@@ -28,14 +31,9 @@ def run_bulk_fix():
         return
 
     con = duckdb.connect(DB_FILE)
+    # author_id is reset with the author, sync_authors() resolves it again
+    init_author_tables(con)
     
-    status_map = {
-        'Unsupported': 'Не підтримано',
-        'Answered': 'З відповіддю',
-        'Approved': 'На розгляді',
-        'Supported': 'Триває збір підписів'
-    }
-
     updated_count = 0
     print("⏳ Оновлення бази даних...")
     
@@ -45,14 +43,14 @@ def run_bulk_fix():
         content = item.get("content", "")
         text_length = len(content) if content else 0
         votes = item.get("signaturesNumber", 0)
-        raw_status = item.get("status", "Unknown")
-        status = status_map.get(raw_status, raw_status)
+        # Unsupported, Approved, Answered, Supported -> typed_schema.STATUSES
+        status = normalize_status(item.get("status")) or "Unknown"
         has_answer = item.get('answer') is not None or item.get('answeredAt') is not None
         
         # Оновлюємо тільки ті петиції, які належать Кабміну і вже є в базі
         con.execute("""
             UPDATE petitions 
-            SET author = ?, text_length = ?, votes = ?, status = ?, has_answer = ?
+            SET author = ?, author_id = NULL, text_length = ?, votes = ?, status = ?, has_answer = ?
             WHERE source = 'cabinet' AND external_id = ?
         """, [author, text_length, votes, status, has_answer, pet_id])
         updated_count += 1
@@ -7,6 +7,7 @@ import requests
 import duckdb
 import time
 import random
+from authors import sync_authors
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0",
@@ -79,6 +80,9 @@ def run_deep_fix():
         # Ввічлива пауза
         time.sleep(random.uniform(0.1, 0.3))
 
+    # Нові автори отримують author_id і потрапляють у лідерборди
+    sync_authors(con)
+
     con.close()
     print(f"\n✅ ГОТОВО! Оновлено авторів для {updated} петицій.")
 
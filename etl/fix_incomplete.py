@@ -11,6 +11,8 @@ import random
 import json
 from datetime import datetime
 
+from typed_schema import normalize_status
+
 BASE_URL = "https://petition.president.gov.ua/petition/"
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -67,19 +69,21 @@ def extract_petition_data(pet_id):
                 data['date'] = text.split(":", 1)[1].strip() if ":" in text else text.replace("Дата оприлюднення", "").strip()
 
         page_text = resp.text
-        data['status'] = "Unknown"
+        raw_status = None
         
         # Порядок важливий: від найбільш специфічних до загальних
         if "З відповіддю" in page_text: 
-            data['status'] = "З відповіддю"
+            raw_status = "З відповіддю"
         elif "На розгляді" in page_text: 
-            data['status'] = "На розгляді"
+            raw_status = "На розгляді"
         elif "Триває збір підписів" in page_text or "Залишилося" in page_text or "Збір підписів триває" in page_text:
-            data['status'] = "Триває збір підписів"
+            raw_status = "Триває збір підписів"
         elif "Не підтримано" in page_text:
-            data['status'] = "Не підтримано"
+            raw_status = "Не підтримано"
         elif "Архів" in page_text: 
-            data['status'] = "Архів"
+            raw_status = "Архів"
+        # Сирий текст сторінки → значення petition_status (typed_schema.STATUSES)
+        data['status'] = normalize_status(raw_status) or "Unknown"
 
         votes_graph = soup.find(class_='petition_votes_graph')
         data['votes'] = int(votes_graph.get('data-votes', 0)) if votes_graph else None
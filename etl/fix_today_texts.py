@@ -1,5 +1,6 @@
 import duckdb
 from scraper_detail import fetch_petition_detail
+from records import PetitionRecord
 import time
 
 DB_FILE = "petitions.duckdb"
@@ -13,8 +14,8 @@ def fix_texts():
         print(f"Checking {s_id}...")
         data = fetch_petition_detail(int(s_id))
         
-        if data and 'text_length' in data and data['text_length'] > 0:
-            new_len = data['text_length']
+        if isinstance(data, PetitionRecord) and data.text_length:
+            new_len = data.text_length
             con.execute("UPDATE petitions SET text_length = ? WHERE source='president' AND external_id = ?", (new_len, s_id))
             print(f"✅ Updated {s_id}: text_length={new_len}")
         else:
@@ -1,5 +1,6 @@
 import duckdb
 from scraper_detail import fetch_petition_detail
+from records import FetchError
 
 def fix_unknown_statuses():
     con = duckdb.connect('petitions.duckdb')
@@ -16,9 +17,11 @@ def fix_unknown_statuses():
         print(f"   Скрапінг ID {pet_id}...")
         data = fetch_petition_detail(pet_id)
         
-        if data and 'status' in data and data['status'] != 'Unknown':
-            con.execute("UPDATE petitions SET status = ? WHERE external_id = ?", (data['status'], str(pet_id)))
-            print(f"      ✅ Новий статус: {data['status']}")
+        # A 404 page gets the 'Not Found' status
+        status = "Not Found" if isinstance(data, FetchError) and data.not_found else getattr(data, 'status', None)
+        if status and status != 'Unknown':
+            con.execute("UPDATE petitions SET status = ? WHERE external_id = ?", (status, str(pet_id)))
+            print(f"      ✅ Новий статус: {status}")
         else:
             print(f"      ⚠️ Не вдалося визначити статус для {pet_id}")
             
@@ -0,0 +1,356 @@
+"""
+Vote-trajectory forecasts for every active petition.
+
+A petition collects signatures for COLLECTION_DAYS after it is published and
+its daily gain usually decays roughly exponentially after the first burst:
+
+    rate(t) = r0 * exp(-k * t)
+
+Every active petition gets this curve fitted to its recent daily gains
+(weighted least squares of log(1 + rate) on the day, recent days weighted
+more), all petitions at once: the history is read into NumPy arrays sorted
+by petition (from the memory-mapped series cache of series_cache.py when it
+has the day, else in one query) and the per-petition sums of the regression
+are np.bincount()s over the petition index, so there is no Python loop per
+petition.
+
+The votes still to come are the closed-form sum of the fitted curve up to
+the collection deadline. The probability of reaching VOTE_THRESHOLD treats
+the log of that sum as normal, with the spread of the fit residuals
+(widened for a far horizon and never below SIGMA_FLOOR).
+
+Tables:
+    petition_forecasts - predicted final votes and P(reaching 25k) per active
+                         petition, recomputed from scratch by every sync
+
+Usage:
+    python forecast.py                   # Refresh for the latest history day (local DB)
+    python forecast.py --top 20          # Refresh, then list the most likely to pass
+    python forecast.py --bench 5000      # Time the fit on synthetic histories
+    python forecast.py --cloud ...       # Same, against MotherDuck
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import date, timedelta
+
+import duckdb
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rollups import VOTE_THRESHOLD
+from votes_store import init_votes_tables, latest_day
+from series_cache import cache_for, window
+from typed_schema import SOURCE_TYPE, STATUS_TYPE, ACTIVE, init_types
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(BASE_DIR, 'petitions.duckdb')
+
+COLLECTION_DAYS = 90
+# Days of history the curve is fitted on, and the half-life of the weights
+WINDOW_DAYS = 30
+HALF_LIFE = 7.0
+# Decay is clipped to [0, MAX_DECAY]: a growing petition is extrapolated at its
+# current rate rather than exponentially
+MAX_DECAY = 1.0
+# Spread of log(remaining votes): floor, and prior when there are < 3 gains to fit
+SIGMA_FLOOR = 0.25
+SIGMA_PRIOR = 1.0
+
+HISTORY_SQL = f"""
+    WITH active AS (
+        SELECT source, external_id AS petition_id, date_normalized
+        FROM petitions
+        WHERE status = '{ACTIVE}'
+    )
+    SELECT dense_rank() OVER (ORDER BY v.source, v.petition_id) - 1 AS g,
+           CAST(v.source AS VARCHAR) AS source, v.petition_id,
+           CAST(v.date - CAST($day AS DATE) AS INTEGER) AS t,
+           v.votes,
+           CAST(COALESCE(a.date_normalized, MIN(v.date) OVER (PARTITION BY v.source, v.petition_id))
+                + {COLLECTION_DAYS} - CAST($day AS DATE) AS INTEGER) AS days_left
+    FROM votes_between(CAST($day AS DATE) - {WINDOW_DAYS}, $day) v
+    JOIN active a ON a.source = v.source AND a.petition_id = v.petition_id
+    WHERE v.votes IS NOT NULL
+    ORDER BY g, t
+"""
+
+ACTIVE_SQL = f"""
+    SELECT (CAST(enum_code(source) AS BIGINT) << 32) | external_id AS key,
+           CAST(source AS VARCHAR) AS source, external_id AS petition_id,
+           COALESCE(CAST(date_normalized - DATE '1970-01-01' AS INTEGER), -1) AS published
+    FROM petitions
+    WHERE status = '{ACTIVE}'
+    ORDER BY key
+"""
+
+
+def init_forecast_tables(con):
+    """Creates the forecast table if it doesn't exist."""
+    init_types(con)
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS petition_forecasts (
+            source {SOURCE_TYPE},
+            petition_id INTEGER,
+            as_of DATE,
+            votes_now INTEGER,
+            deadline DATE,
+            days_left INTEGER,
+            daily_rate DOUBLE,           -- fitted gain per day as of today
+            decay DOUBLE,                -- k of rate(t) = r0 * exp(-k * t)
+            predicted_final INTEGER,
+            p_threshold DOUBLE,          -- probability of reaching VOTE_THRESHOLD by the deadline
+            PRIMARY KEY (source, petition_id)
+        )
+    """)
+
+
+def normal_cdf(z):
+    """Standard normal CDF, vectorized (Abramowitz & Stegun 7.1.26, |error| < 1.5e-7)."""
+    x = np.abs(z) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-x * x)
+    return 0.5 * (1.0 + np.sign(z) * erf)
+
+
+def fit_curves(g, t, votes, n):
+    """
+    Fits rate(t) = r0 * exp(-k * t) to the daily gains of `n` petitions.
+
+    g, t, votes: one entry per history row, sorted by (g, t); t is the day
+    relative to the forecast day (<= 0). Returns per-petition arrays
+    (r0, k, sigma, n_gains, x_mean, x_var, n_eff): the fitted rate today, the
+    decay, the residual spread of log(1 + rate) and what forecast() needs to
+    widen it for the horizon.
+    """
+    same = g[1:] == g[:-1]
+    dt = np.diff(t)
+    ok = same & (dt > 0)
+    gg = g[1:][ok]
+    dt = dt[ok].astype(np.float64)
+    x = t[1:][ok] - dt / 2
+    y = np.log1p(np.maximum(np.diff(votes)[ok], 0) / dt)
+    w = np.exp2(x / HALF_LIFE)
+
+    def total(values):
+        return np.bincount(gg, weights=values, minlength=n)
+
+    sw, swx, swy = total(w), total(w * x), total(w * y)
+    swxx, swxy, sww = total(w * x * x), total(w * x * y), total(w * w)
+    n_gains = np.bincount(gg, minlength=n)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        den = sw * swxx - swx * swx
+        slope = np.where(den > 1e-9 * np.maximum(sw * swxx, 1e-12), (sw * swxy - swx * swy) / den, 0.0)
+        k = np.clip(-slope, 0.0, MAX_DECAY)
+        # Intercept at t = 0 for the (possibly clipped) slope
+        a = np.where(sw > 0, (swy + k * swx) / sw, 0.0)
+        x_mean = np.where(sw > 0, swx / sw, 0.0)
+        x_var = np.where(sw > 0, swxx / sw - x_mean ** 2, 0.0)
+        n_eff = np.where(sww > 0, sw * sw / sww, 0.0)
+
+        resid = y - (a[gg] - k[gg] * x)
+        sigma2 = total(w * resid * resid) / sw
+        # Small-sample correction for the two fitted parameters
+        sigma2 *= n_eff / np.maximum(n_eff - 2, 1)
+    sigma = np.where(n_gains >= 3, np.sqrt(np.nan_to_num(sigma2)), SIGMA_PRIOR)
+    return np.expm1(a), k, sigma, n_gains, x_mean, np.maximum(x_var, 0.0), n_eff
+
+
+def forecast(g, t, votes, days_left, n):
+    """
+    Vectorized forecast for `n` petitions from their sorted history rows.
+    Returns per-petition (votes_now, rate, decay, predicted_final, p_threshold).
+    """
+    last = np.r_[g[1:] != g[:-1], True]
+    votes_now = votes[last].astype(np.float64)
+    horizon = np.maximum(days_left[last], 0).astype(np.float64)
+
+    r0, k, sigma, n_gains, x_mean, x_var, n_eff = fit_curves(g, t, votes, n)
+
+    # sum_{j=1..h} r0 * exp(-k j) = r0 * q (1 - q^h) / (1 - q), q = exp(-k)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        geometric = np.exp(-k) * np.expm1(-k * horizon) / np.expm1(-k)
+    remaining = r0 * np.where(k > 1e-9, geometric, horizon)
+    predicted = votes_now + remaining
+
+    # Uncertainty of the fitted log-rate at the middle of the remaining window
+    # (it grows with the distance from the fitted days), plus the day-to-day
+    # noise, which averages out over the days left
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lever = (horizon / 2 - x_mean) ** 2 / np.where(x_var > 0, x_var, np.inf)
+        spread = sigma * np.sqrt(1 / np.maximum(horizon, 1) + (1 + lever) / np.maximum(n_eff, 1))
+    spread = np.sqrt(spread ** 2 + SIGMA_FLOOR ** 2)
+
+    need = VOTE_THRESHOLD - votes_now
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (np.log(remaining) - np.log(need)) / spread
+    p = np.where(need <= 0, 1.0,
+                 np.where((horizon <= 0) | (remaining <= 0), 0.0, normal_cdf(np.clip(np.nan_to_num(z), -40, 40))))
+    return votes_now, r0, k, predicted, p
+
+
+def history_from_cache(con, cache, day):
+    """
+    The HISTORY_SQL columns, with the series read from the memory-mapped
+    cache (series_cache.py) instead of votes_history.
+    """
+    active = con.execute(ACTIVE_SQL).fetchnumpy()
+    today = date.fromisoformat(day)
+    petition, days, votes = window(cache, active["key"].astype(np.int64), today - timedelta(days=WINDOW_DAYS), today)
+    _, g = np.unique(petition, return_inverse=True)
+    # Rows are grouped by petition: the first row of a group is its first day in the window
+    first_day = days[np.flatnonzero(np.r_[True, petition[1:] != petition[:-1]])] if len(days) else days
+    published = active["published"][petition]
+    started = np.where(published >= 0, published, first_day[g])
+    t0 = (today - date(1970, 1, 1)).days
+    return {
+        "g": g,
+        "source": active["source"][petition],
+        "petition_id": active["petition_id"][petition],
+        "t": days.astype(np.int64) - t0,
+        "votes": votes,
+        "days_left": started + COLLECTION_DAYS - t0,
+    }
+
+
+def refresh_forecasts(con, day=None):
+    """
+    Recomputes petition_forecasts for `day` (default: the latest day in
+    votes_history). Returns the number of petitions forecast.
+    """
+    init_forecast_tables(con)
+    init_votes_tables(con)
+    if day is None:
+        day = latest_day(con)
+        if day is None:
+            return 0
+    day = str(day)
+
+    start = time.perf_counter()
+    # The memory-mapped series when the cache has the day, else the history query
+    cache = cache_for(con, day)
+    if cache is not None:
+        rows = history_from_cache(con, cache, day)
+    else:
+        rows = con.execute(HISTORY_SQL, {"day": day}).fetchnumpy()
+    g = rows["g"].astype(np.int64)
+    if len(g) == 0:
+        con.execute("DELETE FROM petition_forecasts")
+        return 0
+    n = int(g[-1]) + 1
+    t = rows["t"].astype(np.int64)
+    votes = rows["votes"].astype(np.int64)
+    days_left = rows["days_left"].astype(np.int64)
+
+    votes_now, rate, decay, predicted, p = forecast(g, t, votes, days_left, n)
+    last = np.r_[g[1:] != g[:-1], True]
+    batch = {
+        "source": rows["source"][last],
+        "petition_id": rows["petition_id"][last],
+        "votes_now": votes_now.astype(np.int64),
+        "days_left": days_left[last],
+        "daily_rate": np.round(rate, 2),
+        "decay": np.round(decay, 4),
+        "predicted_final": np.round(predicted).astype(np.int64),
+        "p_threshold": np.round(p, 4),
+    }
+    con.execute("DELETE FROM petition_forecasts")
+    con.execute("""
+        INSERT INTO petition_forecasts
+        SELECT source, petition_id, CAST($day AS DATE), votes_now,
+               CAST($day AS DATE) + CAST(days_left AS INTEGER), days_left,
+               daily_rate, decay, predicted_final, p_threshold
+        FROM batch
+    """, {"day": day})
+    elapsed = time.perf_counter() - start
+    print(f"   ✅ petition_forecasts: {n} active petitions ({elapsed * 1000:.0f} ms).")
+    return n
+
+
+def likely_to_pass(con, limit=20):
+    """Active petitions still under the threshold, most likely to reach it first."""
+    return con.execute("""
+        SELECT f.source, f.petition_id, p.title, f.votes_now, f.predicted_final, f.p_threshold, f.deadline
+        FROM petition_forecasts f
+        JOIN petitions p ON p.source = f.source AND p.external_id = f.petition_id
+        WHERE f.votes_now < ?
+        ORDER BY f.p_threshold DESC, f.predicted_final DESC
+        LIMIT ?
+    """, [VOTE_THRESHOLD, limit]).fetchall()
+
+
+def bench(n, days=WINDOW_DAYS, seed=7):
+    """Times refresh_forecasts() on `n` synthetic decaying histories (in-memory DB)."""
+    rng = np.random.default_rng(seed)
+    r0 = rng.lognormal(3, 1.5, n)
+    k = rng.uniform(0, 0.3, n)
+    age = rng.integers(days, COLLECTION_DAYS, n)
+    t = np.arange(days + 1)
+    gains = rng.poisson(r0[:, None] * np.exp(-k[:, None] * (age[:, None] - days + t)))
+    votes = np.cumsum(gains, axis=1)
+
+    con = duckdb.connect()
+    init_types(con)
+    con.execute(f"""
+        CREATE TABLE petitions (source {SOURCE_TYPE}, external_id INTEGER, title VARCHAR, status {STATUS_TYPE},
+                                date_normalized DATE)
+    """)
+    con.execute("CREATE TABLE votes_history (petition_id INTEGER, source VARCHAR, date DATE, votes INTEGER)")
+    ids = np.arange(n, dtype=np.int64)
+    batch = {"petition_id": ids, "age": age}
+    con.execute(f"""
+        INSERT INTO petitions
+        SELECT 'president', petition_id, 'synthetic', '{ACTIVE}', DATE '2026-03-31' - CAST(age AS INTEGER)
+        FROM batch
+    """)
+    batch = {
+        "petition_id": np.repeat(ids, len(t)),
+        "offset": np.tile(days - t, n),
+        "votes": votes.ravel(),
+    }
+    con.execute("""
+        INSERT INTO votes_history
+        SELECT petition_id, 'president', DATE '2026-03-31' - CAST("offset" AS INTEGER), votes FROM batch
+    """)
+    print(f"🧪 {n:,} active petitions × {len(t)} days of history")
+    refresh_forecasts(con, "2026-03-31")
+    count, expected = con.execute("""
+        SELECT COUNT(*), AVG(p_threshold) FROM petition_forecasts
+    """).fetchone()
+    print(f"   {count:,} forecasts, mean P(≥{VOTE_THRESHOLD:,}) = {expected:.3f}")
+    con.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forecast final votes of active petitions")
+    parser.add_argument("--day", help="Forecast as of this day (YYYY-MM-DD), default latest history day")
+    parser.add_argument("--top", type=int, default=0, help="List the N petitions most likely to pass")
+    parser.add_argument("--bench", type=int, metavar="N", help="Benchmark on N synthetic petitions")
+    parser.add_argument("--cloud", action="store_true", help="Run against MotherDuck instead of the local DB")
+    args = parser.parse_args()
+
+    if args.bench:
+        bench(args.bench)
+        return
+
+    if args.cloud:
+        from cloud_sync import get_motherduck_connection
+        con = get_motherduck_connection()
+    else:
+        con = duckdb.connect(DB_FILE)
+
+    try:
+        refresh_forecasts(con, args.day)
+        for r in likely_to_pass(con, args.top) if args.top else []:
+            print(f"   {r[5]:6.1%}  [{r[0]}] {r[2][:70]}  ({r[3]:,} → ~{r[4]:,} by {r[6]})")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
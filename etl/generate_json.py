@@ -1,39 +1,48 @@
-import duckdb
 import os
+import sys
+import argparse
 from dotenv import load_dotenv
-from pipeline import export_analytics, DB_FILE
+from pipeline import export_analytics
+from replica import MAX_AGE_HOURS, open_replica, refresh_replica
 
 # Load .env from project root
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
 
-def get_connection():
+def get_connection(args):
     """
-    Connect to MotherDuck (cloud) if MOTHERDUCK_TOKEN is available,
-    otherwise fall back to local petitions.duckdb.
+    The local replica (replica.py), opened read-only; refreshed from
+    MotherDuck first with --refresh. With --cloud the export queries
+    MotherDuck directly instead.
     """
-    token = os.getenv('MOTHERDUCK_TOKEN', '')
-    if token:
+    if args.cloud or args.refresh:
+        from cloud_sync import get_motherduck_connection
+        cloud = get_motherduck_connection()
+        if args.cloud:
+            return cloud
         try:
-            md_db = 'petitions_prod'
-            print(f"☁️  Connecting to MotherDuck ({md_db})...")
-            con = duckdb.connect(f"md:{md_db}?motherduck_token={token}")
-            # Quick sanity check
-            count = con.execute("SELECT COUNT(*) FROM petitions").fetchone()[0]
-            print(f"   ✅ Connected! {count:,} petitions in cloud DB")
-            return con
-        except Exception as e:
-            print(f"   ⚠️ MotherDuck connection failed: {e}")
-            print(f"   Falling back to local DB...")
-    
-    print(f"💾 Connecting to local DB: {DB_FILE}")
-    con = duckdb.connect(DB_FILE, read_only=True)
-    count = con.execute("SELECT COUNT(*) FROM petitions").fetchone()[0]
-    print(f"   ✅ Connected! {count:,} petitions in local DB")
-    return con
+            refresh_replica(cloud)
+        finally:
+            cloud.close()
+
+    max_age = None if args.allow_stale else args.max_age_hours
+    try:
+        return open_replica(max_age_hours=max_age)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
 
 def run():
-    con = get_connection()
-    export_analytics(con, growth_stats=[])
+    parser = argparse.ArgumentParser(description="Export analytics JSON for the dashboard")
+    parser.add_argument("--force", action="store_true", help="Recompute every block even if inputs are unchanged")
+    parser.add_argument("--rows", action="store_true", help="Ship history/timeline/scatter as arrays of objects instead of columns")
+    parser.add_argument("--refresh", action="store_true", help="Refresh the local replica from MotherDuck first")
+    parser.add_argument("--max-age-hours", type=float, default=MAX_AGE_HOURS, help="Refuse to export from an older replica")
+    parser.add_argument("--allow-stale", action="store_true", help="Export from the replica whatever its age")
+    parser.add_argument("--cloud", action="store_true", help="Query MotherDuck directly instead of the replica")
+    args = parser.parse_args()
+
+    con = get_connection(args)
+    export_analytics(con, growth_stats=[], force=args.force, columnar=not args.rows)
     con.close()
     print("Done!")
 
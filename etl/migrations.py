@@ -0,0 +1,225 @@
+"""
+Versioned schema migrations.
+
+Every schema change is a numbered step in MIGRATIONS. `schema_version`
+records the steps a database has applied; run_migrations() applies the
+pending ones in order and records each as soon as it succeeds, so an
+interrupted run resumes where it stopped. The same runner works on the local
+file and on MotherDuck (the syncs call it right after connecting).
+
+Steps prefer in-place DDL (ADD COLUMN, ADD PRIMARY KEY, ALTER ... TYPE).
+When a table has to be rewritten (DuckDB cannot change the type of a key or
+indexed column), rewrite_table() streams it into a new table in rowid
+chunks, one transaction per chunk with progress output, and swaps the new
+table in with one short transaction; readers see the old table until then.
+
+Each step checks the database first and only does what is missing:
+databases created before schema_version existed start at version 0 and run
+every step once, mostly as no-ops.
+
+Tables:
+    schema_version - version, name, applied_at, seconds
+
+Usage:
+    python migrations.py                # Apply pending migrations (local DB)
+    python migrations.py --status       # Applied and pending steps
+    python migrations.py --cloud ...    # Same, against MotherDuck
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(BASE_DIR, 'petitions.duckdb')
+
+# Rows copied per transaction by rewrite_table()
+CHUNK_ROWS = 500_000
+
+
+def init_version_table(con):
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            seconds DOUBLE
+        )
+    """)
+
+
+def current_version(con):
+    init_version_table(con)
+    return con.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+# --- Helpers for the steps ---
+
+def table_exists(con, table):
+    return con.execute("""
+        SELECT COUNT(*) FROM duckdb_tables()
+        WHERE table_name = ? AND database_name = current_database() AND schema_name = current_schema()
+    """, [table]).fetchone()[0] > 0
+
+
+def has_primary_key(con, table):
+    return con.execute("""
+        SELECT COUNT(*) FROM duckdb_constraints()
+        WHERE table_name = ? AND database_name = current_database() AND schema_name = current_schema()
+          AND constraint_type = 'PRIMARY KEY'
+    """, [table]).fetchone()[0] > 0
+
+
+def index_sql(con, table):
+    """CREATE INDEX statements of the table's explicit indexes."""
+    return [r[0] for r in con.execute("""
+        SELECT sql FROM duckdb_indexes()
+        WHERE table_name = ? AND database_name = current_database() AND schema_name = current_schema()
+    """, [table]).fetchall()]
+
+
+def rewrite_table(con, table, ddl, select, chunk_rows=CHUNK_ROWS):
+    """
+    Rewrites `table` through a new table: `ddl` creates it as `{table}__new`,
+    `select` is the column list it is filled with (evaluated on `table`).
+    Rows are copied in rowid ranges of `chunk_rows`, each range committed on
+    its own; the swap (drop, rename, indexes) is one transaction and fails
+    if the row count changed meanwhile. Returns the number of rows.
+    """
+    new_name = f"{table}__new"
+    indexes = index_sql(con, table)
+    con.execute(f"DROP TABLE IF EXISTS {new_name}")
+    con.execute(ddl)
+    total, low, high = con.execute(f"SELECT COUNT(*), MIN(rowid), MAX(rowid) FROM {table}").fetchone()
+
+    copied = 0
+    start = time.time()
+    for chunk_start in range(low if low is not None else 0, (high if high is not None else -1) + 1, chunk_rows):
+        copied += con.execute(f"""
+            INSERT INTO {new_name} SELECT {select} FROM {table} WHERE rowid >= ? AND rowid < ?
+        """, [chunk_start, chunk_start + chunk_rows]).fetchone()[0]
+        if total > chunk_rows:
+            print(f"      {table}: {copied:,}/{total:,} rows ({time.time() - start:.1f}s)")
+
+    con.execute("BEGIN TRANSACTION")
+    try:
+        now = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        if now != copied:
+            raise RuntimeError(f"{table} changed during the rewrite ({copied:,} rows copied, {now:,} now); re-run")
+        con.execute(f"DROP TABLE {table}")
+        con.execute(f"ALTER TABLE {new_name} RENAME TO {table}")
+        for sql in indexes:
+            con.execute(sql)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        con.execute(f"DROP TABLE IF EXISTS {new_name}")
+        raise
+    return copied
+
+
+# --- Steps ---
+
+def add_petition_sync_columns(con):
+    """Columns the syncs write that the first petitions schema did not have."""
+    if not table_exists(con, "petitions"):
+        return
+    con.execute("ALTER TABLE petitions ADD COLUMN IF NOT EXISTS date_normalized DATE")
+    con.execute("ALTER TABLE petitions ADD COLUMN IF NOT EXISTS votes_previous INTEGER")
+    con.execute("ALTER TABLE petitions ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP")
+
+
+def add_primary_keys(con):
+    """
+    The upserts need petitions (source, external_id) and daily_stats (date)
+    to be keys. Added in place; duplicates make the step fail and must be
+    cleaned up by hand first.
+    """
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            date DATE PRIMARY KEY,
+            president_new INTEGER,
+            cabinet_new INTEGER,
+            total_votes_delta INTEGER,
+            status_changes JSON
+        )
+    """)
+    for table, key in (("petitions", "source, external_id"), ("daily_stats", "date")):
+        if table_exists(con, table) and not has_primary_key(con, table):
+            con.execute(f"ALTER TABLE {table} ADD PRIMARY KEY ({key})")
+            print(f"   ✅ {table}: PRIMARY KEY ({key}) added")
+
+
+def collapse_votes_history(con):
+    """One row per day -> change-only votes_intervals behind a view (votes_store.py)."""
+    from votes_store import init_votes_tables
+    init_votes_tables(con)
+
+
+def type_keys_and_statuses(con):
+    """ENUM source/status and INTEGER petition ids (typed_schema.py)."""
+    from typed_schema import migrate_typed_schema
+    migrate_typed_schema(con)
+
+
+MIGRATIONS = (
+    (1, "petition_sync_columns", add_petition_sync_columns),
+    (2, "primary_keys", add_primary_keys),
+    (3, "votes_intervals", collapse_votes_history),
+    (4, "typed_keys_and_statuses", type_keys_and_statuses),
+)
+
+
+def pending_migrations(con):
+    version = current_version(con)
+    return [m for m in MIGRATIONS if m[0] > version]
+
+
+def run_migrations(con):
+    """Applies the pending MIGRATIONS in order. Returns the number applied."""
+    pending = pending_migrations(con)
+    for version, name, step in pending:
+        print(f"🔧 Migration {version}: {name}...")
+        start = time.time()
+        step(con)
+        seconds = time.time() - start
+        con.execute("INSERT INTO schema_version (version, name, seconds) VALUES (?, ?, ?)",
+                    [version, name, seconds])
+        print(f"   ✅ Migration {version} applied ({seconds:.1f}s)")
+    return len(pending)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations")
+    parser.add_argument("--status", action="store_true", help="Show applied and pending steps only")
+    parser.add_argument("--cloud", action="store_true", help="Run against MotherDuck instead of the local DB")
+    args = parser.parse_args()
+
+    if args.cloud:
+        from cloud_sync import get_motherduck_connection
+        con = get_motherduck_connection()
+    else:
+        con = duckdb.connect(DB_FILE)
+
+    try:
+        if args.status:
+            init_version_table(con)
+            for version, name, applied_at in con.execute(
+                    "SELECT version, name, applied_at FROM schema_version ORDER BY version").fetchall():
+                print(f"   ✅ {version:>3} {name:<28} {applied_at:%Y-%m-%d %H:%M}")
+            for version, name, _ in pending_migrations(con):
+                print(f"   ⏳ {version:>3} {name}")
+            return
+        applied = run_migrations(con)
+        print(f"✅ Schema at version {current_version(con)} ({applied} migrations applied)")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
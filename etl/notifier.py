@@ -200,11 +200,41 @@ def notify_sync_success(stats):
 • New petitions: {stats.get('new_petitions', 0)}
 • Vote delta: +{stats.get('vote_delta', 0):,}
 • Status changes: {stats.get('status_changes', 0)}
+• Unchanged petitions (not rewritten): {stats.get('skipped_writes', 0)}
+• Vote spikes: {stats.get('anomalies', 0)}
 """
     
     send_telegram_message(message)
 
 
+def notify_anomalies(anomalies, limit=10):
+    """
+    Send the vote spikes flagged by anomalies.py to Telegram.
+    
+    Args:
+        anomalies: List of dicts from anomalies.detect_anomalies (biggest z first)
+        limit: Max petitions listed in the message
+    """
+    if not anomalies:
+        return False
+    
+    date_str = datetime.now().strftime("%Y-%m-%d %H:%M")
+    
+    message = f"""📈 *Vote spikes detected: {len(anomalies)}*
+📅 {date_str}
+
+"""
+    for a in anomalies[:limit]:
+        title = (a.get('title') or str(a['id']))[:60]
+        link = f"[{title}]({a['url']})" if a.get('url') else title
+        message += f"• {link}: +{a['gain']:,}/day (usually ~{a['expected']:,}, z={a['z']:.1f})\n"
+    
+    if len(anomalies) > limit:
+        message += f"... and {len(anomalies) - limit} more\n"
+    
+    return send_telegram_message(message)
+
+
 if __name__ == "__main__":
     # Test Telegram notification
     print("Testing Telegram notification...")
@@ -2,86 +2,109 @@ import duckdb
 import json
 import time
 import os
+import hashlib
+import gzip
 from scraper_president import scrape_president_petitions
 from scraper_cabinet import fetch_cabinet_petitions
+from records import PETITION_COLUMNS, db_batch
+from downsample import build_history_tiers
+from authors import init_author_tables, top_authors as author_leaderboard
+from similar import load_index as load_similar_index, similar_to, describe as describe_similar
+from status_events import status_transitions, record_status_events, recent_status_changes
+from migrations import run_migrations
+from typed_schema import SOURCE_TYPE, STATUS_TYPE, ACTIVE, ANSWERED, init_types
+
+try:
+    import brotli
+except ImportError:  # optional: .br siblings are skipped without it
+    brotli = None
 
 # Get project root (parent of etl/)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_FILE = os.path.join(BASE_DIR, 'petitions.duckdb')
-JSON_FILE = os.path.join(BASE_DIR, 'src', 'analytics_data.json')
+# Dashboard data: one content-hashed shard per section + a small manifest.
+# Vite copies public/ into dist/, so these are served as /data/...
+DATA_DIR = os.path.join(BASE_DIR, 'public', 'data')
+SHARD_DIR = os.path.join(DATA_DIR, 'shards')
+MANIFEST_FILE = os.path.join(DATA_DIR, 'manifest.json')
+SECTIONS = ("overview", "daily", "history", "analytics", "insights")
+# Arrays of uniform objects that are shipped as parallel arrays when
+# exporting with columnar=True: (section, key inside the section)
+COLUMNAR_ARRAYS = (("history", "daily"), ("history", "weekly"), ("history", "monthly"),
+                   ("analytics", "timeline"), ("analytics", "scatter"))
+# Bump when the shard layout changes so a previous export is never reused
+MANIFEST_VERSION = 2
 
 def init_db(con):
     """
     Initializes the database schema if it doesn't exist.
     """
     print("Initializing database...")
-    con.execute("""
+    init_types(con)
+    con.execute(f"""
         CREATE SEQUENCE IF NOT EXISTS petition_id_seq;
         CREATE TABLE IF NOT EXISTS petitions (
             internal_id INTEGER DEFAULT nextval('petition_id_seq'),
-            source VARCHAR,
-            external_id VARCHAR,
+            source {SOURCE_TYPE},
+            external_id INTEGER,
             number VARCHAR,
             title VARCHAR,
             date VARCHAR, 
-            status VARCHAR,
+            status {STATUS_TYPE},
             votes INTEGER,
             url VARCHAR,
             author VARCHAR,
             text_length INTEGER,
             has_answer BOOLEAN,
             crawled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            date_normalized DATE,
+            votes_previous INTEGER,
+            updated_at TIMESTAMP,
             PRIMARY KEY (source, external_id)
         );
     """)
+    run_migrations(con)
 
 def save_to_db(con, petitions):
     """
-    Inserts or updates petitions in DuckDB.
+    Inserts or updates petitions (PetitionRecord list) in DuckDB.
     """
     if not petitions:
         print("No petitions to save.")
         return
 
     print(f"Saving {len(petitions)} petitions to DB...")
+
+    # Transitions are diffed against the stored rows before they are replaced
+    events = status_transitions(con, petitions)
+    init_author_tables(con)
+
+    # Upsert in one statement over the batch columns (DuckDB runs executemany()
+    # as one execute per row). Only rows that changed are rewritten: they get
+    # updated_at (the watermark of the incremental rollups, search index and
+    # replicate.py), and a new author string drops the author_id so
+    # sync_authors() resolves it again and refreshes both authors' stats.
+    batch = db_batch(petitions)
+    updates = ",\n            ".join(f"{c} = EXCLUDED.{c}" for c in PETITION_COLUMNS[2:])
+    changed = " OR ".join(f"petitions.{c} IS DISTINCT FROM EXCLUDED.{c}" for c in PETITION_COLUMNS[2:])
+    con.execute(f"""
+        INSERT INTO petitions ({', '.join(PETITION_COLUMNS)}) SELECT * FROM batch
+        ON CONFLICT (source, external_id) DO UPDATE SET
+            {updates},
+            author_id = CASE WHEN petitions.author IS DISTINCT FROM EXCLUDED.author
+                             THEN NULL ELSE petitions.author_id END,
+            updated_at = now()  -- DO UPDATE SET binds CURRENT_TIMESTAMP as a column name
+        WHERE {changed}
+    """)
     
-    # We use INSERT OR REPLACE (Upsert) logic. 
-    # In DuckDB standard SQL, we can use INSERT OR REPLACE INTO or ON CONFLICT
-    
-    # Let's perform bulk insert via appender or executemany.
-    # For simplicity and upsert behavior, we'll loop or use a temp table.
-    # Using 'INSERT OR REPLACE INTO' is supported in DuckDB.
-    
-    for p in petitions:
-        con.execute("""
-            INSERT OR REPLACE INTO petitions (source, external_id, number, title, date, status, votes, url, author, text_length, has_answer)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            p['source'], 
-            p['id'], 
-            p['number'], 
-            p['title'], 
-            p['date'], 
-            p['status'], 
-            p['votes'], 
-            p['url'],
-            p.get('author'),
-            p.get('text_length'),
-            p.get('has_answer')
-        ))
-    
+    record_status_events(con, events)
     print("Saved successfully.")
 
-def export_analytics(con, growth_stats=[]):
-    """
-    Calculates stats and saves to src/analytics_data.json
-    Structure matches the 4-block dashboard design.
-    """
-    print("📊 Generating Analytics JSON...")
-    
+def compute_overview(con):
+    """BLOCK 1: KPI overview + per-platform comparison."""
     # --- BLOCK 1: OVERVIEW ---
     print("   1. Computing Overview...")
-    overview_query = """
+    overview_query = f"""
         SELECT 
             COUNT(*) as total,
             COUNT(*) FILTER (WHERE source='president') as president_count,
@@ -94,7 +117,7 @@ def export_analytics(con, growth_stats=[]):
             MEDIAN(votes) as median_votes,
             
             -- Response rate (approximate based on status)
-            ROUND(COUNT(*) FILTER (WHERE status IN ('З відповіддю', 'Answered')) * 100.0 / COUNT(*), 2) as response_rate
+            ROUND(COUNT(*) FILTER (WHERE status = '{ANSWERED}') * 100.0 / COUNT(*), 2) as response_rate
         FROM petitions
     """
     ov = con.execute(overview_query).fetchone()
@@ -109,6 +132,30 @@ def export_analytics(con, growth_stats=[]):
         "insight": f"Only {ov[3]}% of petitions reach the 25,000 signature threshold. Median votes: {ov[4]}."
     }
 
+    # Platform Comparison
+    print("   1.1 Platform Comparison...")
+    platform_query = f"""
+        SELECT 
+            source,
+            COUNT(*) as total,
+            ROUND(AVG(votes), 0) as avg_votes,
+            MEDIAN(votes) as median_votes,
+            ROUND(COUNT(*) FILTER (WHERE votes >= 25000) * 100.0 / COUNT(*), 2) as success_rate,
+            ROUND(COUNT(*) FILTER (WHERE status = '{ANSWERED}') * 100.0 / COUNT(*), 2) as response_rate
+        FROM petitions
+        GROUP BY source
+    """
+    plat_rows = con.execute(platform_query).fetchall()
+    platform_comparison = [{
+        "source": r[0], "total": r[1], "avg_votes": int(r[2]) if r[2] else 0,
+        "median_votes": r[3], "success_rate": float(r[4]), "response_rate": float(r[5])
+    } for r in plat_rows]
+
+    return {**overview_data, "platform_comparison": platform_comparison}
+
+
+def compute_daily(con, growth_stats):
+    """BLOCK 2: daily dynamics, sparkline history (see downsample.py) and biggest movers."""
     # --- BLOCK 2: DAILY DYNAMICS ---
     print("   2. Computing Daily Dynamics...")
     
@@ -117,25 +164,14 @@ def export_analytics(con, growth_stats=[]):
     
     today_date = time.strftime("%Y-%m-%d")
     
-    # Fetch per-source history using votes_history + daily_stats for new petitions
+    # Per-source history from the daily_source_deltas rollup (one row per day and source,
+    # maintained by the sync scripts) + daily_stats for new petitions
     history_query = """
-        WITH daily_totals AS (
-            SELECT date, source, SUM(votes) as total_votes
-            FROM votes_history
-            GROUP BY date, source
-        ),
-        deltas AS (
-            SELECT 
-                t.date, 
-                t.source,
-                t.total_votes - LAG(t.total_votes) OVER (PARTITION BY t.source ORDER BY t.date) as vote_delta
-            FROM daily_totals t
-        ),
-        source_deltas AS (
+        WITH source_deltas AS (
             SELECT date,
                    COALESCE(SUM(vote_delta) FILTER (WHERE source='president'), 0) as president_delta,
                    COALESCE(SUM(vote_delta) FILTER (WHERE source='cabinet'), 0) as cabinet_delta
-            FROM deltas
+            FROM daily_source_deltas
             WHERE vote_delta IS NOT NULL
             GROUP BY date
         )
@@ -146,7 +182,11 @@ def export_analytics(con, growth_stats=[]):
         LEFT JOIN daily_stats ds ON sd.date = ds.date
         ORDER BY sd.date ASC
     """
-    history_rows = con.execute(history_query).fetchall()
+    try:
+        history_rows = con.execute(history_query).fetchall()
+    except Exception as e:
+        print(f"   ⚠️ History query failed (run `python rollups.py --backfill`?): {e}")
+        history_rows = []
     sparkline_data = [{
         "date": str(h[0]),
         "president": max(h[1], 0),
@@ -160,7 +200,7 @@ def export_analytics(con, growth_stats=[]):
         "new_petitions": 0, 
         "votes_added": sum(g['delta'] for g in growth_stats),
         "biggest_movers": growth_stats[:5],
-        "history": sparkline_data,
+        "history": build_history_tiers(sparkline_data),
         "status_changes": [],
         "last_sync_date": None
     }
@@ -177,6 +217,11 @@ def export_analytics(con, growth_stats=[]):
             "SELECT president_new + cabinet_new, total_votes_delta, date FROM daily_stats ORDER BY date DESC LIMIT 1"
         ).fetchone()
     
+    try:
+        daily_data["status_changes"] = recent_status_changes(con)
+    except Exception as e:
+        print(f"   ⚠️ Status changes query failed: {e}")
+
     if current_stats:
         daily_data["new_petitions"] = current_stats[0]
         daily_data["votes_added"] = current_stats[1]
@@ -186,21 +231,47 @@ def export_analytics(con, growth_stats=[]):
     if not growth_stats:
         print("   ⚠️ growth_stats is empty. Fetching fallback data from DB...")
             
-        # Fetch Biggest Movers from petitions table
+        # Fetch Biggest Movers from the petition_metrics rollup (1-day deltas)
         movers_query = """
-            SELECT title, url, (votes - votes_previous) as delta, votes
-            FROM petitions 
-            WHERE votes_previous IS NOT NULL 
-              AND (votes - votes_previous) > 0
+            SELECT p.title, p.url, m.delta_1d as delta, m.votes_now
+            FROM petition_metrics m
+            JOIN petitions p ON m.petition_id = p.external_id AND m.source = p.source
+            WHERE m.delta_1d > 0
             ORDER BY delta DESC 
             LIMIT 5
         """
-        movers_rows = con.execute(movers_query).fetchall()
+        try:
+            movers_rows = con.execute(movers_query).fetchall()
+        except Exception as e:
+            print(f"   ⚠️ Movers query failed: {e}")
+            movers_rows = []
         daily_data["biggest_movers"] = [
             {"title": r[0], "url": r[1], "delta": r[2], "total": r[3]} 
             for r in movers_rows
         ]
 
+    return daily_data
+
+
+def clustered_petitions_sql(con):
+    """
+    petitions plus a `cluster` column: the near-duplicate cluster from dedup.py,
+    or the petition itself when it has not been clustered (yet).
+    """
+    has_dedup = con.execute(
+        "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = 'dedup_docs'").fetchone()[0]
+    if not has_dedup:
+        print("   ⚠️ No dedup clusters (run `python dedup.py --rebuild`), unique counts = raw counts")
+        return "SELECT *, source || ':' || external_id AS cluster FROM petitions"
+    return """
+        SELECT p.*, COALESCE(d.cluster_id, p.source || ':' || p.external_id) AS cluster
+        FROM petitions p
+        LEFT JOIN dedup_docs d ON d.source = p.source AND d.petition_id = p.external_id
+    """
+
+
+def compute_analytics(con):
+    """BLOCK 3: deep analytics charts."""
     # --- BLOCK 3: DEEP ANALYTICS ---
     print("   3. Computing Deep Analytics...")
     
@@ -241,64 +312,48 @@ def export_analytics(con, growth_stats=[]):
     timeline_data = [{"month": r[0], "president": r[1], "cabinet": r[2]} for r in timeline_rows]
 
     # 3.3 Text Length vs Votes (Scatter sample)
-    # Take a sample of 300 points for performance
+    # Stratified sample (source x vote bin x has_answer) maintained by rollups.py;
+    # the hash order makes the output stable between runs
     scatter_query = """
-        SELECT text_length, votes, source, 
-               CASE WHEN status IN ('З відповіддю', 'Answered') THEN true ELSE false END as has_ans
-        FROM petitions
-        WHERE text_length IS NOT NULL AND votes > 0
-        USING SAMPLE 300
+        SELECT p.text_length, p.votes, s.source, s.has_answer
+        FROM scatter_sample s
+        JOIN petitions p ON p.external_id = s.petition_id AND p.source = s.source
+        ORDER BY s.source, s.vote_bin, s.has_answer, s.sample_key
     """
-    scatter_rows = con.execute(scatter_query).fetchall()
+    try:
+        scatter_rows = con.execute(scatter_query).fetchall()
+    except Exception as e:
+        print(f"   ⚠️ Scatter query failed (run `python rollups.py --backfill`?): {e}")
+        scatter_rows = []
     scatter_data = [{"x": r[0], "y": r[1], "source": r[2], "has_answer": r[3]} for r in scatter_rows]
 
     # 3.4 Status Distribution (per source)
-    # Normalize Cabinet English statuses to Ukrainian equivalents
+    # Both sources share one status ENUM (normalized at ingest, see typed_schema.py)
     print("   3.4 Status Distribution...")
     status_dist_query = """
-        SELECT 
-            CASE status
-                WHEN 'Unsupported' THEN 'Архів'
-                WHEN 'Approved' THEN 'На розгляді'
-                WHEN 'Answered' THEN 'З відповіддю'
-                WHEN 'Supported' THEN 'Збір підписів'
-                WHEN 'Триває збір підписів' THEN 'Збір підписів'
-                WHEN 'Не підтримано' THEN 'Архів'
-                ELSE status
-            END as unified_status,
-            source, 
-            COUNT(*) as count
+        SELECT status, source, COUNT(*) as count
         FROM petitions
         WHERE status IS NOT NULL AND status != 'Unknown'
-        GROUP BY unified_status, source
+        GROUP BY status, source
         ORDER BY count DESC
     """
     status_rows = con.execute(status_dist_query).fetchall()
     status_distribution = [{"status": r[0], "source": r[1], "count": r[2]} for r in status_rows]
 
     # 3.5 Top Authors by total votes
+    # Precomputed per (author, source) by authors.py, names normalized
     print("   3.5 Top Authors...")
-    authors_query = """
-        SELECT author, 
-               COUNT(*) as petition_count,
-               SUM(votes) as total_votes,
-               MAX(votes) as max_votes,
-               ROUND(AVG(votes), 0) as avg_votes
-        FROM petitions
-        WHERE author IS NOT NULL AND author != '' AND LENGTH(author) > 2
-        GROUP BY author
-        ORDER BY total_votes DESC
-        LIMIT 10
-    """
-    authors_rows = con.execute(authors_query).fetchall()
-    top_authors = [{
-        "author": r[0], "petitions": r[1], "total_votes": r[2],
-        "max_votes": r[3], "avg_votes": int(r[4]) if r[4] else 0
-    } for r in authors_rows]
+    try:
+        top_authors = author_leaderboard(con, limit=10)
+        top_authors_by_source = {s: author_leaderboard(con, source=s, limit=10) for s in ("president", "cabinet")}
+    except Exception as e:
+        print(f"   ⚠️ Top authors query failed (run `python authors.py --rebuild`?): {e}")
+        top_authors, top_authors_by_source = [], {}
 
-    # 3.6 Category Breakdown (regex-based)
+    # 3.6 Category Breakdown (regex-based), raw and near-duplicate-collapsed counts
     print("   3.6 Category Breakdown...")
-    categories_query = """
+    clustered = clustered_petitions_sql(con)
+    categories_query = f"""
         SELECT 
             CASE
                 WHEN title ILIKE '%герой%' OR title ILIKE '%героя%' OR title ILIKE '%звання%'
@@ -316,28 +371,31 @@ def export_analytics(con, growth_stats=[]):
                 ELSE 'Інші'
             END as category,
             COUNT(*) as count,
-            ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM petitions), 1) as percentage
-        FROM petitions
+            ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM petitions), 1) as percentage,
+            COUNT(DISTINCT cluster) as unique_count
+        FROM ({clustered})
         GROUP BY category
         ORDER BY count DESC
     """
     cat_rows = con.execute(categories_query).fetchall()
-    categories_data = [{"category": r[0], "count": r[1], "percentage": float(r[2])} for r in cat_rows]
+    categories_data = [{"category": r[0], "count": r[1], "percentage": float(r[2]), "unique": r[3]} for r in cat_rows]
 
-    # 3.7 Vote Velocity (top active petitions, last 7 days from votes_history)
+    # 3.7 Vote Velocity (top active petitions, from the petition_metrics rollup)
     print("   3.7 Vote Velocity...")
-    velocity_query = """
-        SELECT vh.petition_id, p.title, p.url,
-               MIN(vh.votes) as votes_7d_ago,
-               MAX(vh.votes) as votes_now,
-               MAX(vh.votes) - MIN(vh.votes) as growth_7d,
-               COUNT(DISTINCT vh.date) as days_tracked
-        FROM votes_history vh
-        JOIN petitions p ON vh.petition_id = p.external_id AND vh.source = p.source
-        WHERE vh.date >= CURRENT_DATE - INTERVAL '7 days'
-          AND p.status = 'Триває збір підписів'
-        GROUP BY vh.petition_id, p.title, p.url
-        HAVING COUNT(DISTINCT vh.date) >= 2
+    velocity_query = f"""
+        SELECT m.petition_id, p.title, p.url,
+               m.votes_now - m.delta_7d as votes_7d_ago,
+               m.votes_now,
+               m.delta_7d as growth_7d,
+               m.days_tracked_7d,
+               m.daily_rate,
+               m.acceleration,
+               m.projected_threshold_date,
+               m.source
+        FROM petition_metrics m
+        JOIN petitions p ON m.petition_id = p.external_id AND m.source = p.source
+        WHERE p.status = '{ACTIVE}'
+          AND m.days_tracked_7d >= 2
         ORDER BY growth_7d DESC
         LIMIT 10
     """
@@ -347,22 +405,46 @@ def export_analytics(con, growth_stats=[]):
             "id": r[0], "title": r[1], "url": r[2],
             "votes_start": r[3], "votes_current": r[4],
             "growth_7d": r[5], "days_tracked": r[6],
-            "daily_rate": round(r[5] / max(r[6] - 1, 1), 0)
+            "daily_rate": round(r[7] or 0, 0),
+            "acceleration": round(r[8], 1) if r[8] is not None else None,
+            "projected_25k": str(r[9]) if r[9] else None
         } for r in vel_rows]
     except Exception as e:
         print(f"   ⚠️ Vote velocity query failed: {e}")
-        vote_velocity = []
+        vel_rows, vote_velocity = [], []
+
+    # Predicted final votes and P(25k by the deadline), from forecast.py
+    try:
+        forecasts = {(r[0], r[1]): r[2:] for r in con.execute("""
+            SELECT source, petition_id, predicted_final, p_threshold FROM petition_forecasts
+        """).fetchall()}
+        for v, r in zip(vote_velocity, vel_rows):
+            predicted, p = forecasts.get((r[10], r[0]), (None, None))
+            v["predicted_final"] = predicted
+            v["p_25k"] = round(p, 3) if p is not None else None
+    except Exception as e:
+        print(f"   ⚠️ Forecast lookup failed (run `python forecast.py`?): {e}")
+
+    # Similar petitions (campaign siblings) for each of them, from similar.py's index
+    try:
+        index = load_similar_index()
+        for v, r in zip(vote_velocity, vel_rows):
+            hits = similar_to(index, r[10], r[0], k=3) if index else []
+            v["similar"] = [{"title": h["title"], "url": h["url"], "votes": h["votes"], "score": h["score"]}
+                            for h in describe_similar(con, hits)]
+    except Exception as e:
+        print(f"   ⚠️ Similar petitions lookup failed (run `python similar.py --rebuild`?): {e}")
 
     # 3.8 Keywords Top-10 from titles
     print("   3.8 Keywords Top-10...")
     # Extract most frequent meaningful words from titles (>= 4 chars to skip prepositions)
-    keywords_query = """
+    keywords_query = f"""
         WITH words AS (
-            SELECT UNNEST(string_split(LOWER(title), ' ')) as word
-            FROM petitions
+            SELECT UNNEST(string_split(LOWER(title), ' ')) as word, cluster
+            FROM ({clustered})
             WHERE title IS NOT NULL
         )
-        SELECT word, COUNT(*) as freq
+        SELECT word, COUNT(*) as freq, COUNT(DISTINCT cluster) as unique_freq
         FROM words
         WHERE LENGTH(word) >= 4
           AND word NOT IN ('про', 'для', 'від', 'або', 'що', 'який', 'яка', 'яке', 'які',
@@ -376,32 +458,63 @@ def export_analytics(con, growth_stats=[]):
     """
     try:
         kw_rows = con.execute(keywords_query).fetchall()
-        keywords_top10 = [{"word": r[0], "count": r[1]} for r in kw_rows]
+        keywords_top10 = [{"word": r[0], "count": r[1], "unique": r[2]} for r in kw_rows]
     except Exception as e:
         print(f"   ⚠️ Keywords query failed: {e}")
         keywords_top10 = []
 
-    # --- PLATFORM COMPARISON ---
-    print("   3.9 Platform Comparison...")
-    platform_query = """
-        SELECT 
-            source,
-            COUNT(*) as total,
-            ROUND(AVG(votes), 0) as avg_votes,
-            MEDIAN(votes) as median_votes,
-            ROUND(COUNT(*) FILTER (WHERE votes >= 25000) * 100.0 / COUNT(*), 2) as success_rate,
-            ROUND(COUNT(*) FILTER (WHERE status IN ('З відповіддю', 'Answered')) * 100.0 / COUNT(*), 2) as response_rate
-        FROM petitions
-        GROUP BY source
-    """
-    plat_rows = con.execute(platform_query).fetchall()
-    platform_comparison = [{
-        "source": r[0], "total": r[1], "avg_votes": int(r[2]) if r[2] else 0,
-        "median_votes": r[3], "success_rate": float(r[4]), "response_rate": float(r[5])
-    } for r in plat_rows]
+    # 3.9 Funnel (25k -> answer) per creation-month cohort, maintained by status_events.py
+    print("   3.9 Funnel...")
+    try:
+        funnel_rows = con.execute("""
+            SELECT source, cohort, petitions, reached_25k, in_review, answered, answer_rate,
+                   median_days_to_25k, median_days_to_answer
+            FROM funnel_metrics
+            WHERE cohort >= strftime(current_date - INTERVAL 12 MONTH, '%Y-%m')
+            ORDER BY cohort, source
+        """).fetchall()
+        total_rows = con.execute("""
+            SELECT source, SUM(petitions), SUM(reached_25k), SUM(in_review), SUM(answered),
+                   ROUND(SUM(answered) * 100.0 / NULLIF(SUM(reached_25k), 0), 2)
+            FROM funnel_metrics
+            GROUP BY source
+            ORDER BY source
+        """).fetchall()
+        funnel = {
+            "cohorts": [{
+                "source": r[0], "cohort": r[1], "petitions": r[2], "reached_25k": r[3], "in_review": r[4],
+                "answered": r[5], "answer_rate": r[6], "median_days_to_25k": r[7], "median_days_to_answer": r[8]
+            } for r in funnel_rows],
+            "totals": [{
+                "source": r[0], "petitions": int(r[1]), "reached_25k": int(r[2]), "in_review": int(r[3]),
+                "answered": int(r[4]), "answer_rate": float(r[5]) if r[5] is not None else None
+            } for r in total_rows],
+        }
+    except Exception as e:
+        print(f"   ⚠️ Funnel query failed (run `python status_events.py --backfill`?): {e}")
+        funnel = {"cohorts": [], "totals": []}
+
+    analytics_data = {
+        "histogram": histogram_data,
+        "timeline": timeline_data,
+        "scatter": scatter_data,
+        "status_distribution": status_distribution,
+        "top_authors": top_authors,
+        "top_authors_by_source": top_authors_by_source,
+        "categories": categories_data,
+        "vote_velocity": vote_velocity,
+        "keywords_top10": keywords_top10,
+        "funnel": funnel
+    }
+    return analytics_data
 
-    # --- AUTO-INSIGHTS ---
-    print("   3.10 Generating Insights...")
+
+def compute_insights(overview, analytics):
+    """Auto-generated narrative facts derived from the overview and analytics blocks."""
+    print("   4. Generating Insights...")
+    categories_data = analytics["categories"]
+    hist_map = {h["bin"]: h["count"] for h in analytics["histogram"]}
+    platform_comparison = overview["platform_comparison"]
     insights = []
     
     # Insight 1: Military petition dominance
@@ -415,7 +528,7 @@ def export_analytics(con, growth_stats=[]):
     
     # Insight 2: Viral rarity
     viral_count = hist_map.get('25k+', 0)
-    viral_pct = round(viral_count * 100.0 / max(ov[0], 1), 1)
+    viral_pct = round(viral_count * 100.0 / max(overview["total"], 1), 1)
     insights.append({
         "emoji": "🦄",
         "text": f"Only {viral_pct}% of petitions reach the 25,000 signature threshold. Getting viral is exceptionally rare.",
@@ -425,14 +538,14 @@ def export_analytics(con, growth_stats=[]):
     # Insight 3: Median engagement
     insights.append({
         "emoji": "📊",
-        "text": f"The median petition receives only {ov[4]} votes — half of all petitions get less than this.",
+        "text": f"The median petition receives only {overview['median_votes']} votes — half of all petitions get less than this.",
         "type": "median_engagement"
     })
     
     # Insight 4: Response rate
     insights.append({
         "emoji": "📬",
-        "text": f"Only {ov[5]}% of petitions receive an official response — the vast majority go unanswered.",
+        "text": f"Only {overview['response_rate']}% of petitions receive an official response — the vast majority go unanswered.",
         "type": "response_rate"
     })
     
@@ -447,6 +560,46 @@ def export_analytics(con, growth_stats=[]):
             "type": "platform_comparison"
         })
 
+    # Insight 6: Near-duplicate templates (categories carry raw and clustered counts)
+    raw_total = sum(c["count"] for c in categories_data)
+    unique_total = sum(c.get("unique", c["count"]) for c in categories_data)
+    if raw_total and unique_total < raw_total:
+        top_dup = max(categories_data, key=lambda c: c["count"] - c.get("unique", c["count"]))
+        dup_pct = round((raw_total - unique_total) * 100.0 / raw_total, 1)
+        insights.append({
+            "emoji": "👯",
+            "text": f"{dup_pct}% of petitions are near-duplicates of another one; \"{top_dup['category']}\" shrinks from {top_dup['count']:,} to {top_dup['unique']:,} once templates are merged.",
+            "type": "near_duplicates"
+        })
+
+    # Insight 7: Answer rate of successful petitions (funnel_metrics)
+    reached = sum(t["reached_25k"] for t in analytics.get("funnel", {}).get("totals", []))
+    answered = sum(t["answered"] for t in analytics.get("funnel", {}).get("totals", []))
+    if reached:
+        insights.append({
+            "emoji": "🏁",
+            "text": f"{round(answered * 100.0 / reached, 1)}% of the {reached:,} petitions that reached 25,000 signatures have an official answer.",
+            "type": "funnel_answer_rate"
+        })
+
+    return insights
+
+
+def get_db_size_mb(con):
+    """Size of the connected database (local file or MotherDuck), or None if unknown."""
+    try:
+        size = con.execute("""
+            SELECT used_blocks * block_size FROM pragma_database_size()
+            WHERE database_name = current_database()
+        """).fetchone()
+        return round(size[0] / 1024 / 1024, 1) if size and size[0] is not None else None
+    except Exception as e:
+        print(f"   ⚠️ Could not read database size: {e}")
+        return None
+
+
+def compute_pipeline_info(con, overview):
+    """BLOCK 4: pipeline info for the footer."""
     # --- DATA SPAN ---
     span_query = """
         SELECT MIN(date_normalized), MAX(date_normalized)
@@ -456,40 +609,265 @@ def export_analytics(con, growth_stats=[]):
     data_span_start = str(span_row[0])[:4] if span_row[0] else "2015"
     data_span_end = str(span_row[1])[:4] if span_row[1] else "2026"
 
-    analytics_data = {
-        "histogram": histogram_data,
-        "timeline": timeline_data,
-        "scatter": scatter_data,
-        "status_distribution": status_distribution,
-        "top_authors": top_authors,
-        "categories": categories_data,
-        "vote_velocity": vote_velocity,
-        "keywords_top10": keywords_top10
-    }
-
     # --- BLOCK 4: PIPELINE INFO ---
     pipeline_data = {
         "last_updated": time.strftime("%Y-%m-%d %H:%M:%S"),
-        "db_size_mb": 27, # Approx
-        "total_records": ov[0],
+        "db_size_mb": get_db_size_mb(con),
+        "total_records": overview["total"],
         "sources": ["president.gov.ua", "petition.kmu.gov.ua"],
         "data_span": f"{data_span_start}-{data_span_end}",
         "coverage": "~100% of significant petitions"
     }
+    return pipeline_data
+
+
+# Tables each export block reads. A block is recomputed only when the fingerprint
+# of one of its inputs changed since the last export; otherwise the previous
+# JSON is reused. Insights are derived from overview + analytics.
+BLOCK_INPUTS = {
+    "overview": ("petitions",),
+    "daily": ("daily_source_deltas", "daily_stats", "petition_metrics", "petitions", "status_events"),
+    "analytics": ("petitions", "petition_metrics", "scatter_sample", "author_stats", "dedup_docs",
+                  "petition_forecasts", "funnel_metrics"),
+    "insights": ("petitions", "dedup_docs", "funnel_metrics"),
+}
+
+# Cheap per-table statistics: row count + latest change marker (+ a vote checksum,
+# since fill-null backfills do not touch updated_at).
+FINGERPRINT_QUERIES = {
+    "petitions": "SELECT COUNT(*), MAX(updated_at), MAX(crawled_at), SUM(votes) FROM petitions",
+    "daily_stats": """
+        SELECT COUNT(*), MAX(date),
+               (SELECT md5(string_agg(CAST(t AS VARCHAR), '|' ORDER BY t.date))
+                FROM (SELECT * FROM daily_stats ORDER BY date DESC LIMIT 7) t)
+        FROM daily_stats
+    """,
+    "daily_source_deltas": "SELECT COUNT(*), MAX(date), SUM(total_votes) FROM daily_source_deltas",
+    "petition_metrics": "SELECT COUNT(*), MAX(as_of), SUM(votes_now) FROM petition_metrics",
+    "author_stats": "SELECT COUNT(*), SUM(petitions), SUM(total_votes) FROM author_stats",
+    "scatter_sample": "SELECT COUNT(*), md5(string_agg(source || petition_id, ',' ORDER BY source, petition_id)) FROM scatter_sample",
+    "dedup_docs": "SELECT COUNT(*), COUNT(DISTINCT cluster_id) FROM dedup_docs",
+    "petition_forecasts": "SELECT COUNT(*), MAX(as_of), SUM(predicted_final) FROM petition_forecasts",
+    "status_events": "SELECT COUNT(*), MAX(observed_at) FROM status_events",
+    "funnel_metrics": "SELECT COUNT(*), SUM(reached_25k), SUM(answered), SUM(median_days_to_answer) FROM funnel_metrics",
+}
+
+
+def compute_fingerprints(con, growth_stats):
+    """
+    Returns {block: hash} for every export block, built from the statistics
+    of the tables listed in BLOCK_INPUTS.
+    """
+    table_fps = {}
+    for table, query in FINGERPRINT_QUERIES.items():
+        try:
+            table_fps[table] = [str(v) for v in con.execute(query).fetchone()]
+        except Exception:
+            table_fps[table] = ["missing"]
+
+    fingerprints = {}
+    for block, tables in BLOCK_INPUTS.items():
+        parts = [table_fps[t] for t in tables]
+        if block == "daily":
+            # Runtime growth stats from the sync feed the movers table directly
+            parts.append(growth_stats)
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        fingerprints[block] = hashlib.md5(payload.encode('utf-8')).hexdigest()
+    return fingerprints
+
+
+def to_columns(rows):
+    """[{a: 1, b: 2}, {a: 3, b: 4}] -> {"$columns": {a: [1, 3], b: [2, 4]}}"""
+    keys = []
+    for row in rows:
+        keys.extend(k for k in row if k not in keys)
+    return {"$columns": {k: [row.get(k) for row in rows] for k in keys}}
+
+
+def from_columns(value):
+    """Inverse of to_columns; anything else is returned unchanged."""
+    if not isinstance(value, dict) or "$columns" not in value:
+        return value
+    columns = value["$columns"]
+    n = len(next(iter(columns.values()), []))
+    return [{k: col[i] for k, col in columns.items()} for i in range(n)]
+
+
+def encode_columnar(sections):
+    """Returns a copy of `sections` with COLUMNAR_ARRAYS encoded as parallel arrays."""
+    encoded = dict(sections)
+    for section, key in COLUMNAR_ARRAYS:
+        if key in encoded[section]:
+            encoded[section] = {**encoded[section], key: to_columns(encoded[section][key])}
+    return encoded
+
+
+def decode_columnar(sections):
+    """Inverse of encode_columnar (no-op for row-encoded sections)."""
+    decoded = dict(sections)
+    for section, key in COLUMNAR_ARRAYS:
+        if isinstance(decoded.get(section), dict) and key in decoded[section]:
+            decoded[section] = {**decoded[section], key: from_columns(decoded[section][key])}
+    return decoded
+
+
+def load_previous_export():
+    """
+    Reassembles the last export from the manifest and its shards,
+    or returns None if any part is missing/unreadable.
+    """
+    try:
+        with open(MANIFEST_FILE, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MANIFEST_VERSION:
+            return None
+        previous = {"pipeline": manifest["pipeline"]}
+        for section, entry in manifest["sections"].items():
+            with open(os.path.join(DATA_DIR, entry["file"]), encoding='utf-8') as f:
+                previous[section] = json.load(f)
+    except (OSError, ValueError, KeyError):
+        return None
+
+    previous = decode_columnar(previous)
+    # History is shipped as its own shard but computed as part of `daily`
+    if "daily" in previous and "history" in previous:
+        previous["daily"]["history"] = previous.pop("history")
+    return previous
+
+
+def write_shard(section, payload):
+    """
+    Writes a section as minified JSON named by its content hash, plus
+    precompressed copies under shards/gz/ and shards/br/ (the latter only if
+    the brotli package is installed). Compressed copies keep the .json name so
+    the host can serve them with a fixed Content-Encoding per directory.
+    Returns the manifest entry with raw/compressed sizes; existing files with
+    the same hash are left untouched.
+    """
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    digest = hashlib.md5(body).hexdigest()[:10]
+    fname = f"{section}.{digest}.json"
+
+    variants = {"gz": lambda b: gzip.compress(b, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = lambda b: brotli.compress(b, quality=11)
+
+    entry = {"file": f"shards/{fname}", "bytes": len(body)}
+    path = os.path.join(SHARD_DIR, fname)
+    if not os.path.exists(path):
+        with open(path, 'wb') as f:
+            f.write(body)
+    for ext, compress in variants.items():
+        os.makedirs(os.path.join(SHARD_DIR, ext), exist_ok=True)
+        path = os.path.join(SHARD_DIR, ext, fname)
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(compress(body))
+        entry[f"{ext}_bytes"] = os.path.getsize(path)
+    return entry
+
+
+def prune_shards(manifest):
+    """Removes shards (and their compressed copies) the new manifest no longer references."""
+    keep = {os.path.basename(entry["file"]) for entry in manifest["sections"].values()}
+    for root, _, files in os.walk(SHARD_DIR):
+        for fname in files:
+            if fname not in keep:
+                os.remove(os.path.join(root, fname))
+
+
+def summarize_sizes(entries):
+    """Totals raw and compressed shard sizes (KB) for the pipeline block."""
+    sizes = {"raw_kb": round(sum(e["bytes"] for e in entries) / 1024, 1)}
+    for ext in ("gz", "br"):
+        if all(f"{ext}_bytes" in e for e in entries):
+            sizes[f"{ext}_kb"] = round(sum(e[f"{ext}_bytes"] for e in entries) / 1024, 1)
+    return sizes
+
+
+def previous_pipeline_value(previous, key, default=None):
+    return (previous or {}).get("pipeline", {}).get(key, default)
+
+
+def export_analytics(con, growth_stats=[], force=False, columnar=True):
+    """
+    Calculates stats and saves them to public/data/ as one shard per section
+    (overview, daily, history, analytics, insights) plus manifest.json.
+    Structure matches the 4-block dashboard design.
+
+    Blocks whose input fingerprints match the previous export are reused
+    from the existing shards; if nothing changed nothing is rewritten.
+    Pass force=True to recompute everything. With columnar=True the big
+    arrays (COLUMNAR_ARRAYS) are written as parallel arrays.
+    """
+    print("📊 Generating Analytics JSON...")
+
+    fingerprints = compute_fingerprints(con, growth_stats)
+    previous = None if force else load_previous_export()
+    previous_fps = previous_pipeline_value(previous, "fingerprints", {})
+
+    def is_fresh(block):
+        return previous is not None and block in previous and previous_fps.get(block) == fingerprints[block]
+
+    encoding = "columnar" if columnar else "rows"
+    same_encoding = previous_pipeline_value(previous, "encoding", "rows") == encoding
+
+    if same_encoding and all(is_fresh(block) for block in BLOCK_INPUTS):
+        print("⏭️ Inputs unchanged since the last export. Skipping.")
+        return False
+
+    blocks = {}
+    for block, compute in (("overview", compute_overview),
+                           ("daily", lambda c: compute_daily(c, growth_stats)),
+                           ("analytics", compute_analytics)):
+        if is_fresh(block):
+            print(f"   ⏭️ {block}: unchanged, reusing previous export")
+            blocks[block] = previous[block]
+        else:
+            blocks[block] = compute(con)
+
+    if is_fresh("insights"):
+        print("   ⏭️ insights: unchanged, reusing previous export")
+        insights = previous["insights"]
+    else:
+        insights = compute_insights(blocks["overview"], blocks["analytics"])
+
+    pipeline_data = compute_pipeline_info(con, blocks["overview"])
+    pipeline_data["fingerprints"] = fingerprints
+    pipeline_data["encoding"] = encoding
 
     # --- FINAL ASSEMBLY ---
-    output = {
-        "overview": {**overview_data, "platform_comparison": platform_comparison},
-        "daily": daily_data,
-        "analytics": analytics_data,
+    daily = dict(blocks["daily"])
+    sections = {
+        "overview": blocks["overview"],
+        "daily": daily,
+        "history": daily.pop("history", {}),
+        "analytics": blocks["analytics"],
         "insights": insights,
-        "pipeline": pipeline_data
     }
-    
-    with open(JSON_FILE, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
-    
-    print(f"✅ Saved to src/analytics_data.json")
+    if columnar:
+        sections = encode_columnar(sections)
+
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    entries = {name: write_shard(name, sections[name]) for name in SECTIONS}
+    pipeline_data["export_size"] = summarize_sizes(entries.values())
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "pipeline": pipeline_data,
+        "sections": entries,
+    }
+
+    # The manifest is written last so it never points at a missing shard
+    with open(MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+    prune_shards(manifest)
+
+    for name, entry in entries.items():
+        compressed = ", ".join(f"{ext} {entry[f'{ext}_bytes'] / 1024:.1f} KB" for ext in ("gz", "br") if f"{ext}_bytes" in entry)
+        print(f"   {name:<10} {entry['file']} ({entry['bytes'] / 1024:.1f} KB; {compressed})")
+    print(f"   Total: {pipeline_data['export_size']}")
+    print(f"✅ Saved to public/data/manifest.json")
+    return True
 
 def run_pipeline():
     # 1. Connect to DB
@@ -510,19 +888,11 @@ def run_pipeline():
     # 3. Calculate growth and enrich data
     growth_stats = []
     for p in pres_data:
-        str_id = str(p['id'])
-        old_votes = vote_map.get(str_id, 0)
-        new_votes = p['votes']
-        delta = new_votes - old_votes
-        
+        delta = p.votes - vote_map.get(p.external_id, 0)
+
         # Only meaningful growth
         if delta > 0:
-            growth_stats.append({
-                "title": p['title'],
-                "delta": delta,
-                "total": new_votes,
-                "url": p['url']
-            })
+            growth_stats.append(p.growth(delta))
 
     save_to_db(con, pres_data)
 
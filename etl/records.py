@@ -0,0 +1,85 @@
+"""
+Petition records passed from the scrapers to the writers.
+
+The scrapers (scraper_president, scraper_cabinet, scraper_detail) return
+PetitionRecord instead of dicts, and a detail page that could not be read
+comes back as FetchError. The syncs, pipeline.save_to_db() and
+status_events read the records' attributes, so a field is always present
+and always has the same name (external_id, date_normalized; full texts in
+body/answer for text_store.py).
+
+PetitionRecord is a frozen dataclass with __slots__: no per-instance
+__dict__, and db_row() returns the petitions columns (PETITION_COLUMNS
+order) as a plain tuple for a single-row insert_sql(); db_batch() turns a
+whole scrape into columns for one bulk upsert. bench_records.py measures
+both against the dicts they replace.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import numpy as np
+
+# petitions columns written from a record, in db_row() order
+PETITION_COLUMNS = ("source", "external_id", "number", "title", "date", "status", "votes", "url",
+                    "author", "text_length", "has_answer", "date_normalized")
+
+
+def insert_sql(verb="INSERT", crawled_at=False):
+    """
+    INSERT (or INSERT OR REPLACE) of db_row() tuples into petitions;
+    crawled_at=True stamps new rows with CURRENT_TIMESTAMP.
+    """
+    columns = ", ".join(PETITION_COLUMNS) + (", crawled_at" if crawled_at else "")
+    values = ", ".join("?" * len(PETITION_COLUMNS)) + (", CURRENT_TIMESTAMP" if crawled_at else "")
+    return f"{verb} INTO petitions ({columns}) VALUES ({values})"
+
+
+def db_batch(records):
+    """
+    The records' PETITION_COLUMNS as numpy columns, for one
+    `INSERT ... SELECT * FROM batch` instead of an execute per row. A
+    petition listed twice (the pages moved while scraping) keeps its last
+    record: an upsert cannot touch the same row twice.
+    """
+    rows = {(p.source, p.external_id): p.db_row() for p in records}
+    return {column: np.array(values, dtype=object)
+            for column, values in zip(PETITION_COLUMNS, zip(*rows.values()))}
+
+
+@dataclass(frozen=True, slots=True)
+class PetitionRecord:
+    source: str
+    external_id: int
+    number: Optional[str] = None
+    title: Optional[str] = None
+    date: Optional[str] = None              # as published ("15 жовтня 2015", ISO for Cabinet)
+    status: Optional[str] = None            # normalized (typed_schema.STATUSES)
+    votes: Optional[int] = None
+    url: Optional[str] = None
+    author: Optional[str] = None
+    text_length: Optional[int] = None
+    has_answer: Optional[bool] = None
+    date_normalized: Optional[str] = None   # YYYY-MM-DD
+    body: Optional[str] = None              # full texts, for text_store.py only
+    answer: Optional[str] = None
+
+    def db_row(self):
+        """The PETITION_COLUMNS values as a tuple."""
+        return (self.source, self.external_id, self.number, self.title, self.date, self.status, self.votes,
+                self.url, self.author, self.text_length, self.has_answer, self.date_normalized)
+
+    def growth(self, delta):
+        """Entry of the growth_stats list the export shows as movers."""
+        return {"title": self.title, "delta": delta, "total": self.votes, "url": self.url}
+
+
+@dataclass(frozen=True, slots=True)
+class FetchError:
+    """A detail page that could not be read: HTTP status code or exception text."""
+    external_id: int
+    error: Union[int, str]
+
+    @property
+    def not_found(self):
+        return self.error == 404
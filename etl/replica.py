@@ -0,0 +1,170 @@
+"""
+Local read-only replica of the MotherDuck database, for the JSON export and
+ad-hoc analysis.
+
+cloud_sync.py refreshes it after every sync with an incremental pull
+(replicate.py) and runs the export against it, so the export queries read a
+local file instead of going over the network. generate_json.py,
+analytics/demo_analysis.py and notebooks open it with open_replica(), which
+connects read-only and checks when it was last refreshed: past the allowed
+age (MAX_AGE_HOURS by default) it raises instead of serving stale numbers.
+
+Only refresh_replica() writes to the file. DuckDB does not let a writer in
+while another process has the file open, so close notebooks before a
+refresh. After a sync rollback the replica can be ahead of the cloud for
+the rolled back rows: refresh it with --full.
+
+Notebook:
+    from replica import open_replica
+    con = open_replica()                     # read-only, raises if stale
+    con = open_replica(max_age_hours=None)   # whatever is there
+
+Tables (in the replica, besides the replicated ones and replication_state):
+    replica_refreshes - one row per refresh: refreshed_at (UTC), cloud
+                        database, rows copied, seconds
+
+Usage:
+    python replica.py                    # Staleness report
+    python replica.py --refresh          # Pull the changes from MotherDuck
+    python replica.py --refresh --full   # Checksum-diff every table
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timezone
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from replicate import replicate
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPLICA_FILE = os.path.join(BASE_DIR, 'replica', 'petitions.duckdb')
+REPLICA_ALIAS = "replica"
+
+# The cloud sync runs daily; older than this the replica missed a sync
+MAX_AGE_HOURS = 30
+
+
+def utc_now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def refresh_replica(con, path=REPLICA_FILE, full=False):
+    """
+    Pulls what changed in the database of `con` (the MotherDuck connection)
+    into the replica file, creating it on the first run. Returns rows copied.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    cloud = con.execute("SELECT current_database()").fetchone()[0]
+    print(f"🔁 Refreshing replica {path} from {cloud}...")
+    start = time.time()
+    con.execute(f"ATTACH '{path}' AS {REPLICA_ALIAS}")
+    try:
+        rows = replicate(con, cloud, REPLICA_ALIAS, full=full)
+        con.execute(f"""
+            CREATE TABLE IF NOT EXISTS {REPLICA_ALIAS}.replica_refreshes (
+                refreshed_at TIMESTAMP,
+                cloud VARCHAR,
+                rows_copied BIGINT,
+                seconds DOUBLE
+            )
+        """)
+        seconds = time.time() - start
+        con.execute(f"INSERT INTO {REPLICA_ALIAS}.replica_refreshes VALUES (?, ?, ?, ?)",
+                    [utc_now(), cloud, rows, seconds])
+    finally:
+        con.execute(f"USE {cloud}")
+        con.execute(f"DETACH {REPLICA_ALIAS}")
+    print(f"✅ Replica refreshed: {rows:,} rows in {seconds:.1f}s")
+    return rows
+
+
+def replica_status(con):
+    """
+    Staleness of the replica open on `con`: last refresh, its age in hours
+    and the latest sync day and petition update it contains.
+    None if it was never refreshed.
+    """
+    try:
+        refreshed_at, cloud = con.execute("""
+            SELECT refreshed_at, cloud FROM replica_refreshes ORDER BY refreshed_at DESC LIMIT 1
+        """).fetchone() or (None, None)
+    except duckdb.CatalogException:
+        return None
+    if refreshed_at is None:
+        return None
+    data_through = con.execute("SELECT MAX(date) FROM daily_stats").fetchone()[0]
+    latest_update = con.execute("SELECT MAX(COALESCE(updated_at, crawled_at)) FROM petitions").fetchone()[0]
+    return {
+        "refreshed_at": refreshed_at,
+        "age_hours": (utc_now() - refreshed_at).total_seconds() / 3600,
+        "cloud": cloud,
+        "data_through": data_through,
+        "latest_update": latest_update,
+    }
+
+
+def open_replica(max_age_hours=MAX_AGE_HOURS, path=REPLICA_FILE):
+    """
+    Read-only connection to the replica. Raises RuntimeError if there is no
+    replica or its last refresh is older than `max_age_hours` (None: any age).
+    """
+    if not os.path.exists(path):
+        raise RuntimeError(f"no replica at {path}: run `python replica.py --refresh`")
+    con = duckdb.connect(path, read_only=True)
+    status = replica_status(con)
+    if status is None:
+        con.close()
+        raise RuntimeError(f"replica {path} was never refreshed: run `python replica.py --refresh`")
+    print(f"💾 Replica of {status['cloud']}, refreshed {status['age_hours']:.1f}h ago "
+          f"(data through {status['data_through']})")
+    if max_age_hours is not None and status["age_hours"] > max_age_hours:
+        con.close()
+        raise RuntimeError(f"replica is {status['age_hours']:.1f}h old (limit {max_age_hours}h): "
+                           f"run `python replica.py --refresh`")
+    return con
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local read-only replica of the MotherDuck database")
+    parser.add_argument("--refresh", action="store_true", help="Pull the changes from MotherDuck first")
+    parser.add_argument("--full", action="store_true", help="With --refresh: checksum-diff every table")
+    parser.add_argument("--path", default=REPLICA_FILE, help="Replica file")
+    args = parser.parse_args()
+
+    if args.refresh:
+        from cloud_sync import get_motherduck_connection
+        con = get_motherduck_connection()
+        try:
+            refresh_replica(con, args.path, full=args.full)
+        finally:
+            con.close()
+
+    if not os.path.exists(args.path):
+        print(f"⚠️ No replica at {args.path}: run `python replica.py --refresh`")
+        return
+    con = duckdb.connect(args.path, read_only=True)
+    try:
+        status = replica_status(con)
+        if status is None:
+            print(f"⚠️ {args.path} was never refreshed")
+            return
+        flag = "✅" if status["age_hours"] <= MAX_AGE_HOURS else "⚠️"
+        print(f"{flag} Replica of {status['cloud']}: refreshed {status['refreshed_at']:%Y-%m-%d %H:%M} UTC "
+              f"({status['age_hours']:.1f}h ago, limit {MAX_AGE_HOURS}h)")
+        print(f"   Latest sync day: {status['data_through']}, latest petition update: {status['latest_update']}")
+        for table, watermark, rows, replicated_at in con.execute("""
+                SELECT table_name, watermark, rows_sent, replicated_at FROM replication_state ORDER BY table_name
+                """).fetchall():
+            print(f"   {table:<20} {rows:>9,} rows sent {replicated_at:%Y-%m-%d %H:%M}"
+                  f"{f'  (watermark {watermark})' if watermark else ''}")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Incremental replication between the local database and MotherDuck, in either
+direction.
+
+Both databases are attached to one connection (the MotherDuck connection,
+with the local file attached) and rows go catalog to catalog; only what
+changed since the previous run is sent:
+
+  * tables with a change marker (TABLES[...]["watermark"]: updated_at /
+    crawled_at, history dates) send the rows whose marker is >= the one
+    recorded after the previous run, upserted by key in chunks of CHUNK_ROWS
+    (votes_intervals: every interval of a petition with such a row, so
+    intervals split or merged at the source do not linger);
+  * the other tables (rollups rebuilt by every sync, stored texts, search
+    index, LSH buckets) have no such marker: their rows are bucketed by a
+    hash of the key and only the buckets whose checksum differs between the
+    two sides are copied again. A table replicated for
+    the first time, or every table with `--full`, goes through the same
+    diff (which also catches deletions and rows changed without touching
+    their marker).
+
+Every chunk is written in its own transaction and checked before COMMIT: its
+row count and md5 checksum must be the same on both sides, otherwise the
+chunk is rolled back and the run stops.
+
+The destination is migrated first (migrations.py) and must end up at the
+same schema version as the source.
+
+Tables:
+    replication_state - per table, in the destination: last watermark
+                        received, rows sent, time of the run
+
+Usage:
+    python replicate.py push                       # local petitions.duckdb -> MotherDuck
+    python replicate.py pull                       # MotherDuck -> local file
+    python replicate.py pull --local analysis.duckdb
+    python replicate.py push --full                # checksum-diff every table
+    python replicate.py pull --tables petitions,votes_intervals
+"""
+
+import os
+import sys
+import math
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from migrations import run_migrations
+from typed_schema import init_types, use_type_names
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(BASE_DIR, 'petitions.duckdb')
+LOCAL_ALIAS = "local_db"
+
+# Rows per chunk (one transaction, one checksum)
+CHUNK_ROWS = 50_000
+
+# key: columns identifying a row. watermark: expression that grows whenever a
+# row is written; rows at the recorded watermark are sent again, so a day or
+# timestamp that was still being written last time is not lost.
+# group: rows replicated together; a change sends every row of its group.
+# record_votes() splits and rebuilds a petition's intervals, so they are
+# replaced per petition (a rebuild of days before the watermark, i.e. a late
+# backfill of a petition no longer synced, still needs --full).
+# petition_texts has no watermark: a new dictionary recompresses every row
+# without changing stored_at, and the dictionaries it replaced are deleted.
+# text_dicts goes first so a frame never arrives before its dictionary.
+TABLES = {
+    "schema_version": {"key": ("version",)},
+    "petitions": {"key": ("source", "external_id"), "watermark": "COALESCE(updated_at, crawled_at)"},
+    "votes_intervals": {"key": ("petition_id", "source", "valid_from"), "watermark": "last_seen",
+                        "group": ("petition_id", "source")},
+    "daily_stats": {"key": ("date",), "watermark": "date"},
+    "status_events": {"key": ("source", "petition_id", "observed_at"), "watermark": "observed_at"},
+    "daily_source_deltas": {"key": ("date", "source"), "watermark": "date"},
+    "anomalies": {"key": ("date", "source", "petition_id"), "watermark": "date"},
+    "petition_metrics": {"key": ("petition_id", "source")},
+    "scatter_sample": {"key": ("petition_id", "source")},
+    "petition_forecasts": {"key": ("source", "petition_id")},
+    "vote_stats": {"key": ("source", "petition_id")},
+    "funnel_metrics": {"key": ("source", "cohort")},
+    "authors": {"key": ("author_id",)},
+    "author_stats": {"key": ("author_id", "source")},
+    "dedup_docs": {"key": ("source", "petition_id")},
+    "dedup_lsh": {"key": ("band", "source", "petition_id")},
+    "text_dicts": {"key": ("dict_id",)},
+    "petition_texts": {"key": ("source", "petition_id")},
+    "search_docs": {"key": ("source", "petition_id")},
+    "search_postings": {"key": ("term", "source", "petition_id")},
+    "rollup_state": {"key": ("name",)},
+}
+
+
+def init_state_table(con):
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS replication_state (
+            table_name VARCHAR PRIMARY KEY,
+            watermark VARCHAR,
+            rows_sent BIGINT,
+            replicated_at TIMESTAMP
+        )
+    """)
+
+
+def _columns(con, catalog, table):
+    return [r[0] for r in con.execute("""
+        SELECT column_name FROM duckdb_columns()
+        WHERE database_name = ? AND schema_name = 'main' AND table_name = ?
+        ORDER BY column_index
+    """, [catalog, table]).fetchall()]
+
+
+def _schema_version(con, catalog):
+    if not _columns(con, catalog, "schema_version"):
+        return 0
+    return con.execute(f"SELECT COALESCE(MAX(version), 0) FROM {catalog}.schema_version").fetchone()[0]
+
+
+def _create_like(con, src, dst, table):
+    """
+    Creates `table` in `dst` with the source's DDL (named ENUM types, same
+    keys). Sequences used by column defaults are created first.
+    """
+    for name, value in con.execute("""
+        SELECT sequence_name, COALESCE(last_value, start_value) FROM duckdb_sequences()
+        WHERE database_name = ? AND schema_name = 'main'
+    """, [src]).fetchall():
+        con.execute(f"CREATE SEQUENCE IF NOT EXISTS {name} START WITH {value + 1}")
+    ddl = con.execute("""
+        SELECT sql FROM duckdb_tables() WHERE database_name = ? AND schema_name = 'main' AND table_name = ?
+    """, [src, table]).fetchone()[0]
+    con.execute(use_type_names(ddl))
+
+
+def prepare_destination(con, src, dst):
+    """Migrates `dst`, creates the replicated tables it lacks, checks schema versions."""
+    con.execute(f"USE {dst}")
+    init_types(con)
+    run_migrations(con)
+    init_state_table(con)
+    for table in TABLES:
+        if _columns(con, src, table) and not _columns(con, dst, table):
+            _create_like(con, src, dst, table)
+    src_version, dst_version = _schema_version(con, src), _schema_version(con, dst)
+    if src_version != dst_version:
+        raise RuntimeError(f"schema version {src}={src_version}, {dst}={dst_version}: "
+                           f"run `python migrations.py` on {src} first")
+
+
+def _row_checksum(columns):
+    row = ", ".join(f'"{c}"' for c in columns)
+    return f"COUNT(*), bit_xor(md5_number(CAST(ROW({row}) AS VARCHAR)))"
+
+
+def _copy_chunk(con, src, dst, table, columns, key, where):
+    """
+    Replaces the `dst` rows matching `where` with the `src` ones in one
+    transaction, and commits only if both sides then have the same rows.
+    `where` must select the same rows on both sides (keys or key buckets).
+    Returns the number of rows copied.
+    """
+    cols = ", ".join(f'"{c}"' for c in columns)
+    con.execute("BEGIN TRANSACTION")
+    try:
+        con.execute(f"DELETE FROM {dst}.{table} WHERE {where}")
+        con.execute(f"INSERT INTO {dst}.{table} ({cols}) SELECT {cols} FROM {src}.{table} WHERE {where}")
+        expected = con.execute(f"SELECT {_row_checksum(columns)} FROM {src}.{table} WHERE {where}").fetchone()
+        written = con.execute(f"SELECT {_row_checksum(columns)} FROM {dst}.{table} WHERE {where}").fetchone()
+        if expected != written:
+            raise RuntimeError(f"{table}: checksum mismatch after copy ({expected[0]} rows sent, {written[0]} stored)")
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return expected[0]
+
+
+def _copy_chunks(con, src, dst, table, columns, key):
+    """Copies the keys of temp.replication_keys chunk by chunk. Returns the number of rows."""
+    keys = ", ".join(key)
+    chunks = [r[0] for r in con.execute("SELECT DISTINCT chunk FROM replication_keys ORDER BY chunk").fetchall()]
+    rows = 0
+    for chunk in chunks:
+        rows += _copy_chunk(con, src, dst, table, columns, key,
+                            f"({keys}) IN (SELECT {keys} FROM temp.replication_keys WHERE chunk = {chunk})")
+    con.execute("DROP TABLE replication_keys")
+    return rows
+
+
+def diff_table(con, src, dst, table, columns, key):
+    """
+    Copies the key-hash buckets whose checksum differs between `src` and
+    `dst` (rows only in `dst` are deleted). Returns (rows copied, buckets
+    copied, buckets).
+    """
+    keys = ", ".join(key)
+    count = con.execute(f"SELECT COUNT(*) FROM {src}.{table}").fetchone()[0]
+    buckets = max(1, math.ceil(count / CHUNK_ROWS))
+    bucket = f"md5_number(CAST(ROW({keys}) AS VARCHAR)) % {buckets}"
+    sums = {}
+    for catalog in (src, dst):
+        sums[catalog] = {r[0]: r[1:] for r in con.execute(f"""
+            SELECT {bucket} AS bucket, {_row_checksum(columns)} FROM {catalog}.{table} GROUP BY bucket
+        """).fetchall()}
+    changed = sorted(b for b in set(sums[src]) | set(sums[dst]) if sums[src].get(b) != sums[dst].get(b))
+    if not changed:
+        return 0, 0, buckets
+    # Keys of the differing buckets on either side, hashed once
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE replication_keys AS
+        SELECT * FROM (
+            SELECT {keys}, {bucket} AS chunk FROM {src}.{table}
+            UNION
+            SELECT {keys}, {bucket} AS chunk FROM {dst}.{table}
+        )
+        WHERE list_contains(?, chunk)
+    """, [changed])
+    return _copy_chunks(con, src, dst, table, columns, key), len(changed), buckets
+
+
+def send_changes(con, src, dst, table, columns, key, watermark, since):
+    """
+    Replaces in `dst` the rows of every `key` (a table key or a group) that
+    has a `src` row whose watermark is >= `since`, CHUNK_ROWS keys at a time
+    in key order. Returns (rows copied, chunks).
+    """
+    keys = ", ".join(key)
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE replication_keys AS
+        SELECT {keys}, (ROW_NUMBER() OVER (ORDER BY {keys}) - 1) // {CHUNK_ROWS} AS chunk
+        FROM (SELECT DISTINCT {keys} FROM {src}.{table} WHERE {watermark} >= ?)
+    """, [since])
+    chunks = con.execute("SELECT COUNT(DISTINCT chunk) FROM replication_keys").fetchone()[0]
+    return _copy_chunks(con, src, dst, table, columns, key), chunks
+
+
+def replicate_table(con, src, dst, table, full=False):
+    """Brings `dst`.`table` up to date with `src`. Returns the number of rows copied."""
+    spec = TABLES[table]
+    columns = _columns(con, src, table)
+    if not columns:
+        return 0
+    missing = [c for c in columns if c not in _columns(con, dst, table)]
+    if missing:
+        print(f"   ⚠️ {table}: {dst} has no column(s) {', '.join(missing)}, not replicated")
+        columns = [c for c in columns if c not in missing]
+
+    start = time.time()
+    watermark = spec.get("watermark")
+    state = con.execute(f"SELECT watermark FROM {dst}.replication_state WHERE table_name = ?",
+                        [table]).fetchone()
+    # The new watermark is read before copying: rows written meanwhile are sent again next time
+    latest = con.execute(f"SELECT CAST(MAX({watermark}) AS VARCHAR) FROM {src}.{table}").fetchone()[0] \
+        if watermark else None
+
+    if watermark and state and state[0] is not None and not full:
+        rows, chunks = send_changes(con, src, dst, table, columns, spec.get("group", spec["key"]),
+                                    watermark, state[0])
+        how = f"since {state[0]}, {chunks} chunks"
+    else:
+        rows, changed, buckets = diff_table(con, src, dst, table, columns, spec["key"])
+        how = f"{changed}/{buckets} buckets differed"
+
+    con.execute(f"""
+        INSERT OR REPLACE INTO {dst}.replication_state VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+    """, [table, latest, rows])
+    print(f"   ✅ {table}: {rows:,} rows ({how}, {time.time() - start:.1f}s)")
+    return rows
+
+
+def replicate(con, src, dst, tables=None, full=False):
+    """Replicates TABLES (or `tables`) from catalog `src` to catalog `dst`. Returns rows copied."""
+    prepare_destination(con, src, dst)
+    total = 0
+    for table in tables or TABLES:
+        total += replicate_table(con, src, dst, table, full=full)
+    # votes_history / votes_between() live with votes_intervals in the destination
+    from votes_store import init_votes_tables
+    init_votes_tables(con)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental replication between local DuckDB and MotherDuck")
+    parser.add_argument("direction", choices=["push", "pull"], help="push: local -> cloud, pull: cloud -> local")
+    parser.add_argument("--local", default=DB_FILE, help="Local database file")
+    parser.add_argument("--tables", help="Comma-separated subset of the replicated tables")
+    parser.add_argument("--full", action="store_true", help="Checksum-diff every table instead of using watermarks")
+    args = parser.parse_args()
+
+    tables = args.tables.split(",") if args.tables else None
+    unknown = [t for t in tables or [] if t not in TABLES]
+    if unknown:
+        parser.error(f"not replicated: {', '.join(unknown)}")
+
+    from cloud_sync import get_motherduck_connection
+    con = get_motherduck_connection()
+    try:
+        cloud = con.execute("SELECT current_database()").fetchone()[0]
+        con.execute(f"ATTACH '{args.local}' AS {LOCAL_ALIAS}")
+        src, dst = (LOCAL_ALIAS, cloud) if args.direction == "push" else (cloud, LOCAL_ALIAS)
+        print(f"🔁 Replicating {src} -> {dst}{' (full diff)' if args.full else ''}")
+        start = time.time()
+        rows = replicate(con, src, dst, tables, full=args.full)
+        print(f"✅ {rows:,} rows replicated in {time.time() - start:.1f}s")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+"""
+Materialized rollups maintained by the sync scripts.
+
+The export used to re-aggregate the whole `votes_history` table on every run.
+Instead, each sync appends the aggregates for the day it just recorded and
+`export_analytics` reads these small tables directly.
+
+Tables:
+    daily_source_deltas  - total votes and day-over-day delta per (date, source)
+    petition_metrics     - rolling deltas, rate, acceleration and 25k projection
+                           for every petition tracked by the latest sync
+    scatter_sample       - deterministic stratified sample for the
+                           text-length-vs-votes scatter
+    rollup_state         - watermarks of the incrementally maintained rollups
+
+Usage:
+    python rollups.py --backfill            # Rebuild from votes_history (local DB)
+    python rollups.py --backfill --cloud    # Same, against MotherDuck
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import date
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from votes_store import init_votes_tables, latest_day
+from typed_schema import SOURCE_TYPE, ANSWERED
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(BASE_DIR, 'petitions.duckdb')
+
+VOTE_THRESHOLD = 25000
+
+# Scatter sample: the SAMPLE_PER_STRATUM petitions with the smallest seeded
+# hash in every (source, vote bin, has_answer) stratum. The hash of a petition
+# never changes, so the sample is stable between runs and only moves when
+# petitions enter or leave a stratum.
+SAMPLE_SEED = 'scatter-v1'
+SAMPLE_PER_STRATUM = 15
+SAMPLE_STRATA_SQL = """
+    SELECT source, external_id AS petition_id,
+           CASE
+               WHEN votes < 100 THEN '0-100'
+               WHEN votes < 1000 THEN '100-1k'
+               WHEN votes < 10000 THEN '1k-10k'
+               WHEN votes < 25000 THEN '10k-25k'
+               ELSE '25k+'
+           END AS vote_bin,
+           status = '{answered}' AS has_answer,
+           md5_number('{seed}:' || source || ':' || external_id) AS sample_key,
+           COALESCE(updated_at, crawled_at) AS changed_at  -- syncs bump updated_at, inserts set crawled_at
+    FROM petitions
+    WHERE text_length IS NOT NULL AND votes > 0
+""".format(seed=SAMPLE_SEED, answered=ANSWERED)
+
+
+def init_rollup_tables(con):
+    """Creates rollup tables if they don't exist."""
+    init_votes_tables(con)
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS daily_source_deltas (
+            date DATE,
+            source {SOURCE_TYPE},
+            total_votes BIGINT,
+            vote_delta BIGINT,
+            PRIMARY KEY (date, source)
+        )
+    """)
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS petition_metrics (
+            petition_id INTEGER,
+            source {SOURCE_TYPE},
+            as_of DATE,
+            votes_now INTEGER,
+            delta_1d INTEGER,
+            delta_7d INTEGER,
+            delta_30d INTEGER,
+            days_tracked_7d INTEGER,
+            daily_rate DOUBLE,
+            acceleration DOUBLE,
+            days_to_threshold INTEGER,
+            projected_threshold_date DATE,
+            PRIMARY KEY (petition_id, source)
+        )
+    """)
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS scatter_sample (
+            petition_id INTEGER,
+            source {SOURCE_TYPE},
+            vote_bin VARCHAR,
+            has_answer BOOLEAN,
+            sample_key UHUGEINT,
+            PRIMARY KEY (petition_id, source)
+        )
+    """)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            name VARCHAR PRIMARY KEY,
+            refreshed_at TIMESTAMP
+        )
+    """)
+
+
+def get_watermark(con, name):
+    """Last change timestamp a rollup has consumed, or None if never refreshed."""
+    row = con.execute("SELECT refreshed_at FROM rollup_state WHERE name = ?", [name]).fetchone()
+    return row[0] if row else None
+
+
+def set_watermark(con, name, refreshed_at):
+    con.execute("INSERT OR REPLACE INTO rollup_state (name, refreshed_at) VALUES (?, ?)", [name, refreshed_at])
+
+
+def refresh_daily_source_deltas(con, day):
+    """
+    Recomputes the (day, source) rows from that day's votes_history rows only.
+    The delta is taken against the latest earlier day already in the rollup,
+    so the cost does not depend on how much history has been collected.
+    """
+    con.execute("""
+        INSERT OR REPLACE INTO daily_source_deltas (date, source, total_votes, vote_delta)
+        SELECT t.date, t.source, t.total_votes,
+               t.total_votes - (
+                   SELECT d.total_votes FROM daily_source_deltas d
+                   WHERE d.source = t.source AND d.date < t.date
+                   ORDER BY d.date DESC LIMIT 1
+               )
+        FROM (
+            SELECT date, source, SUM(votes) AS total_votes
+            FROM votes_between(?, ?)
+            GROUP BY date, source
+        ) t
+    """, [day, day])
+
+    # Re-running an older day (e.g. a late backfill) shifts the baseline
+    # of the next recorded day, so fix that single row as well.
+    con.execute("""
+        UPDATE daily_source_deltas AS n
+        SET vote_delta = n.total_votes - d.total_votes
+        FROM daily_source_deltas d
+        WHERE d.date = ? AND n.source = d.source
+          AND n.date = (
+              SELECT MIN(x.date) FROM daily_source_deltas x
+              WHERE x.source = d.source AND x.date > d.date
+          )
+    """, [day])
+
+
+def backfill_daily_source_deltas(con):
+    """Rebuilds daily_source_deltas from the full votes_history."""
+    con.execute("DELETE FROM daily_source_deltas")
+    con.execute("""
+        INSERT INTO daily_source_deltas (date, source, total_votes, vote_delta)
+        SELECT date, source, total_votes,
+               total_votes - LAG(total_votes) OVER (PARTITION BY source ORDER BY date)
+        FROM (
+            SELECT date, source, SUM(votes) AS total_votes
+            FROM votes_history
+            GROUP BY date, source
+        )
+    """)
+    return con.execute("SELECT COUNT(*) FROM daily_source_deltas").fetchone()[0]
+
+
+def refresh_petition_metrics(con, day):
+    """
+    Recomputes petition_metrics for the petitions that got a history row on `day`.
+
+    Only the last 30 days of history of those petitions are read. Each lookback
+    (1/7/14/30 days) takes the latest row at or before that date; petitions
+    tracked for a shorter time fall back to their first row in the window.
+    Rows of petitions that are no longer tracked are dropped.
+    """
+    latest = con.execute("SELECT MAX(as_of) FROM petition_metrics").fetchone()[0]
+    if latest is not None and str(latest) > str(day):
+        print(f"   ⚠️ petition_metrics is already at {latest}, skipping refresh for {day}.")
+        return
+
+    con.execute("DELETE FROM petition_metrics WHERE as_of < ?", [day])
+    con.execute("""
+        INSERT OR REPLACE INTO petition_metrics
+        WITH params AS (
+            SELECT CAST(? AS DATE) AS day, ? AS threshold
+        ),
+        recent AS (
+            SELECT vh.petition_id, vh.source, vh.date, vh.votes
+            FROM votes_between(CAST(? AS DATE) - 30, ?) vh
+            WHERE (vh.petition_id, vh.source) IN (
+                SELECT petition_id, source FROM votes_between(?, ?)
+            )
+        ),
+        points AS (
+            SELECT petition_id, source,
+                   arg_max(votes, date) AS votes_now,
+                   arg_max(votes, date) FILTER (WHERE date <= params.day - 1) AS votes_1d,
+                   arg_max(votes, date) FILTER (WHERE date <= params.day - 7) AS votes_7d,
+                   max(date) FILTER (WHERE date <= params.day - 7) AS date_7d,
+                   arg_max(votes, date) FILTER (WHERE date <= params.day - 14) AS votes_14d,
+                   arg_max(votes, date) FILTER (WHERE date <= params.day - 30) AS votes_30d,
+                   arg_min(votes, date) AS votes_first,
+                   min(date) AS first_date,
+                   count(*) FILTER (WHERE date >= params.day - 7) AS days_tracked_7d
+            FROM recent, params
+            GROUP BY petition_id, source
+        ),
+        rates AS (
+            SELECT *,
+                   votes_now - COALESCE(votes_7d, votes_first) AS delta_7d,
+                   (votes_now - COALESCE(votes_7d, votes_first))
+                       / NULLIF(params.day - COALESCE(date_7d, first_date), 0) AS daily_rate,
+                   (votes_7d - votes_14d) / 7.0 AS prev_daily_rate
+            FROM points, params
+        ),
+        projections AS (
+            SELECT *,
+                   CASE
+                       WHEN votes_now >= params.threshold THEN 0
+                       WHEN daily_rate > 0 THEN CAST(CEIL((params.threshold - votes_now) / daily_rate) AS INTEGER)
+                   END AS days_to_threshold
+            FROM rates, params
+        )
+        SELECT petition_id, source, params.day, votes_now,
+               votes_now - votes_1d,
+               delta_7d,
+               votes_now - COALESCE(votes_30d, votes_first),
+               days_tracked_7d,
+               daily_rate,
+               daily_rate - prev_daily_rate,
+               days_to_threshold,
+               params.day + days_to_threshold
+        FROM projections, params
+    """, [day, VOTE_THRESHOLD, day, day, day, day])
+
+
+def backfill_petition_metrics(con):
+    """Rebuilds petition_metrics for the latest day in votes_history."""
+    con.execute("DELETE FROM petition_metrics")
+    last_day = latest_day(con)
+    if last_day is not None:
+        refresh_petition_metrics(con, last_day)
+    return con.execute("SELECT COUNT(*) FROM petition_metrics").fetchone()[0]
+
+
+def rebuild_scatter_sample(con, strata=None):
+    """
+    Recomputes the scatter sample from the full petitions table, either for
+    every stratum or only for the given (source, vote_bin, has_answer) tuples.
+    """
+    where = ""
+    params = [SAMPLE_PER_STRATUM]
+    if strata is not None:
+        if not strata:
+            return
+        where = "WHERE (source, vote_bin, has_answer) IN (" + ", ".join(["(?, ?, ?)"] * len(strata)) + ")"
+        params = [v for stratum in strata for v in stratum] + params
+        con.execute(f"DELETE FROM scatter_sample {where}", params[:-1])
+    else:
+        con.execute("DELETE FROM scatter_sample")
+
+    con.execute(f"""
+        INSERT INTO scatter_sample (petition_id, source, vote_bin, has_answer, sample_key)
+        SELECT petition_id, source, vote_bin, has_answer, sample_key
+        FROM ({SAMPLE_STRATA_SQL}) s
+        {where}
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY source, vote_bin, has_answer ORDER BY sample_key) <= ?
+    """, params)
+
+
+def refresh_scatter_sample(con):
+    """
+    Incrementally maintains scatter_sample from petitions changed since the
+    last refresh (bottom-k by seeded hash per stratum).
+
+    The new sample of a stratum is the bottom-k of its current members plus
+    the changed petitions that now fall into it. When a sampled petition
+    leaves its stratum (votes moved to another bin, got an answer, lost its
+    text), the next-smallest member is unknown, so that stratum alone is
+    rebuilt from the full table.
+    """
+    watermark = get_watermark(con, "scatter_sample")
+    latest = con.execute("SELECT MAX(COALESCE(updated_at, crawled_at)) FROM petitions").fetchone()[0]
+
+    if watermark is None:
+        rebuild_scatter_sample(con)
+        set_watermark(con, "scatter_sample", latest)
+        return
+    if latest is None or latest <= watermark:
+        return
+
+    # Sampled petitions whose stratum changed (or that are no longer eligible)
+    left = con.execute(f"""
+        SELECT DISTINCT ss.source, ss.vote_bin, ss.has_answer
+        FROM scatter_sample ss
+        JOIN petitions p ON p.external_id = ss.petition_id AND p.source = ss.source
+        LEFT JOIN ({SAMPLE_STRATA_SQL}) s ON s.petition_id = ss.petition_id AND s.source = ss.source
+        WHERE COALESCE(p.updated_at, p.crawled_at) > ?
+          AND (s.petition_id IS NULL OR s.vote_bin != ss.vote_bin OR s.has_answer != ss.has_answer)
+    """, [watermark]).fetchall()
+
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE scatter_candidates AS
+        SELECT s.petition_id, s.source, s.vote_bin, s.has_answer, s.sample_key
+        FROM ({SAMPLE_STRATA_SQL}) s
+        WHERE s.changed_at > ?
+        UNION
+        SELECT s.petition_id, s.source, s.vote_bin, s.has_answer, s.sample_key
+        FROM ({SAMPLE_STRATA_SQL}) s
+        JOIN scatter_sample ss ON s.petition_id = ss.petition_id AND s.source = ss.source
+    """, [watermark])
+    con.execute("DELETE FROM scatter_sample")
+    con.execute("""
+        INSERT INTO scatter_sample
+        SELECT petition_id, source, vote_bin, has_answer, sample_key
+        FROM scatter_candidates
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY source, vote_bin, has_answer ORDER BY sample_key) <= ?
+    """, [SAMPLE_PER_STRATUM])
+    con.execute("DROP TABLE scatter_candidates")
+
+    rebuild_scatter_sample(con, strata=left)
+    set_watermark(con, "scatter_sample", latest)
+
+
+def refresh_rollups(con, day):
+    """
+    Called once per sync after votes_history has been written for `day`.
+    Falls back to a full backfill the first time (empty rollup tables).
+    """
+    init_rollup_tables(con)
+
+    is_empty = con.execute("SELECT COUNT(*) FROM daily_source_deltas").fetchone()[0] == 0
+    if is_empty:
+        print("   daily_source_deltas is empty, running backfill...")
+        rows = backfill_daily_source_deltas(con)
+        print(f"   ✅ Backfilled {rows} (date, source) rows.")
+    else:
+        refresh_daily_source_deltas(con, day)
+        print(f"   ✅ daily_source_deltas refreshed for {day}.")
+
+    refresh_petition_metrics(con, day)
+    count = con.execute("SELECT COUNT(*) FROM petition_metrics").fetchone()[0]
+    print(f"   ✅ petition_metrics refreshed: {count} petitions.")
+
+    refresh_scatter_sample(con)
+    count = con.execute("SELECT COUNT(*) FROM scatter_sample").fetchone()[0]
+    print(f"   ✅ scatter_sample refreshed: {count} petitions.")
+
+
+def backfill(con):
+    """Rebuilds every rollup table from scratch."""
+    init_rollup_tables(con)
+
+    start = time.time()
+    rows = backfill_daily_source_deltas(con)
+    print(f"✅ daily_source_deltas: {rows} rows ({time.time() - start:.2f}s)")
+
+    start = time.time()
+    rows = backfill_petition_metrics(con)
+    print(f"✅ petition_metrics: {rows} rows ({time.time() - start:.2f}s)")
+
+    start = time.time()
+    con.execute("DELETE FROM rollup_state WHERE name = 'scatter_sample'")
+    refresh_scatter_sample(con)
+    rows = con.execute("SELECT COUNT(*) FROM scatter_sample").fetchone()[0]
+    print(f"✅ scatter_sample: {rows} rows ({time.time() - start:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain materialized rollup tables")
+    parser.add_argument("--backfill", action="store_true", help="Rebuild all rollups from history")
+    parser.add_argument("--day", help="Refresh a single day (YYYY-MM-DD), default today")
+    parser.add_argument("--cloud", action="store_true", help="Run against MotherDuck instead of the local DB")
+    args = parser.parse_args()
+
+    if args.cloud:
+        from cloud_sync import get_motherduck_connection
+        con = get_motherduck_connection()
+    else:
+        print(f"💾 Connecting to local DB: {DB_FILE}")
+        con = duckdb.connect(DB_FILE)
+
+    try:
+        if args.backfill:
+            backfill(con)
+        else:
+            refresh_rollups(con, args.day or date.today().isoformat())
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
 import requests
 import json
+from dataclasses import asdict
+
+from records import PetitionRecord
+from text_store import html_to_text
+from typed_schema import normalize_status, parse_id
 
 API_URL = "https://petition.kmu.gov.ua/api/petitions"
 
@@ -20,17 +25,20 @@ def fetch_cabinet_petitions():
         
         petitions = []
         for item in data_list:
-            petitions.append({
-                "source": "cabinet",
-                "id": str(item.get("id")),
-                "number": item.get("code"),
-                "title": item.get("title"),
-                "date": item.get("createdAt"), # ISO format
-                "status": item.get("status"),
-                "votes": item.get("signaturesNumber"),
-                "url": f"https://petition.kmu.gov.ua/kmu/petition/{item.get('id')}",
-                "content": item.get("content")
-            })
+            created = item.get("createdAt")  # ISO format
+            petitions.append(PetitionRecord(
+                source="cabinet",
+                external_id=parse_id(item.get("id")),
+                number=item.get("code"),
+                title=item.get("title"),
+                date=created,
+                status=normalize_status(item.get("status")),
+                votes=item.get("signaturesNumber"),
+                url=f"https://petition.kmu.gov.ua/kmu/petition/{item.get('id')}",
+                has_answer=False,
+                date_normalized=created[:10] if created else None,
+                body=html_to_text(item.get("content")),
+            ))
             
         return petitions
 
@@ -40,4 +48,4 @@ def fetch_cabinet_petitions():
 
 if __name__ == "__main__":
     data = fetch_cabinet_petitions()
-    print(json.dumps(data[:3], indent=2, ensure_ascii=False))
+    print(json.dumps([asdict(p) for p in data[:3]], indent=2, ensure_ascii=False))
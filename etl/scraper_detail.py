@@ -6,6 +6,8 @@ import random
 import re
 from datetime import datetime
 
+from records import PetitionRecord, FetchError
+
 # --- CONFIG & HEADERS ---
 BASE_URL = "https://petition.president.gov.ua/petition/"
 HEADERS = {
@@ -72,7 +74,7 @@ def extract_status(soup, page_text):
 def fetch_petition_detail(pet_id, session=None, attempt=1, max_attempts=3):
     """
     Fetches a single petition by ID.
-    Returns dict or None if 404/Error.
+    Returns a PetitionRecord, or a FetchError (404, HTTP status, exception).
     """
     if session is None:
         session = requests.Session(impersonate="chrome")
@@ -84,7 +86,7 @@ def fetch_petition_detail(pet_id, session=None, attempt=1, max_attempts=3):
         
         # Handle 404 cleanly
         if resp.status_code == 404:
-            return {"id": str(pet_id), "status": "Not Found", "error": 404}
+            return FetchError(int(pet_id), 404)
             
         # Rate limits
         if resp.status_code in (429, 503):
@@ -94,39 +96,32 @@ def fetch_petition_detail(pet_id, session=None, attempt=1, max_attempts=3):
                 time.sleep(wait_time)
                 return fetch_petition_detail(pet_id, session, attempt + 1, max_attempts)
             else:
-                return {"id": str(pet_id), "error": resp.status_code}
+                return FetchError(int(pet_id), resp.status_code)
 
         if resp.status_code != 200:
-            return {"id": str(pet_id), "error": resp.status_code}
+            return FetchError(int(pet_id), resp.status_code)
             
         # Parse
         soup = BeautifulSoup(resp.text, 'html.parser')
         h1 = soup.find('h1')
         
         if not h1 or "Такої сторінки не існує" in h1.get_text():
-            return {"id": str(pet_id), "status": "Not Found", "error": 404}
-
-        data = {
-            'source': 'president',
-            'id': str(pet_id),
-            'title': h1.get_text(strip=True),
-            'url': url
-        }
+            return FetchError(int(pet_id), 404)
 
         # Number
         num_tag = soup.find(class_='pet_number')
-        data['number'] = num_tag.get_text(strip=True) if num_tag else None
+        number = num_tag.get_text(strip=True) if num_tag else None
 
         # Dates & Author
         date_tags = soup.find_all(class_='pet_date')
-        data['author'] = None
-        data['date'] = None
+        author = None
+        date_text = None
         for dt in date_tags:
             text = dt.get_text(strip=True)
             if "Автор" in text or "ініціатор" in text:
-                data['author'] = text.split(":", 1)[1].strip() if ":" in text else text.replace("Автор (ініціатор)", "").strip()
+                author = text.split(":", 1)[1].strip() if ":" in text else text.replace("Автор (ініціатор)", "").strip()
             elif "Дата оприлюднення" in text:
-                data['date'] = text.split(":", 1)[1].strip() if ":" in text else text.replace("Дата оприлюднення", "").strip()
+                date_text = text.split(":", 1)[1].strip() if ":" in text else text.replace("Дата оприлюднення", "").strip()
 
         # Status
         # 1. Try legacy class-based status
@@ -144,7 +139,6 @@ def fetch_petition_detail(pet_id, session=None, attempt=1, max_attempts=3):
                 elif "З відповіддю" in st_text: status_text = "З відповіддю"
                 elif "Архів" in st_text: status_text = "Архів"
         
-        data['status'] = status_text
 
         # Votes
         votes_tag = soup.find(class_='pet_votes_num')
@@ -158,7 +152,7 @@ def fetch_petition_detail(pet_id, session=None, attempt=1, max_attempts=3):
              if txt_div:
                  votes_tag = txt_div.find('span')
 
-        data['votes'] = clean_votes(votes_tag.get_text(strip=True)) if votes_tag else 0
+        votes = clean_votes(votes_tag.get_text(strip=True)) if votes_tag else 0
 
         # Text length
         # New structure: text is usually in #pet-tab-1
@@ -168,16 +162,27 @@ def fetch_petition_detail(pet_id, session=None, attempt=1, max_attempts=3):
         if not article:
              article = soup.find('article', class_='article')
              
-        data['text_length'] = len(article.get_text(strip=True)) if article else 0
-        
-        # Legacy field (ignored but kept for schema)
-        data['has_answer'] = (data['status'] == "З відповіддю")
-        
-        # Normalized date
-        data['date_normalized'] = normalize_date(data.get('date'))
-
-        return data
+        answer_tab = soup.find(id='pet-tab-2')
+
+        return PetitionRecord(
+            source='president',
+            external_id=int(pet_id),
+            number=number,
+            title=h1.get_text(strip=True),
+            date=date_text,
+            status=status_text,
+            votes=votes,
+            url=url,
+            author=author,
+            text_length=len(article.get_text(strip=True)) if article else 0,
+            # Legacy field (ignored but kept for schema)
+            has_answer=(status_text == "З відповіддю"),
+            date_normalized=normalize_date(date_text),
+            # Full texts go to text_store.py (compressed), not to the petitions table
+            body=article.get_text("\n", strip=True) if article else None,
+            answer=(answer_tab.get_text("\n", strip=True) or None) if answer_tab else None,
+        )
 
     except Exception as e:
         print(f"💥 Error scraping ID {pet_id}: {e}")
-        return {"id": str(pet_id), "error": str(e)}
+        return FetchError(int(pet_id), str(e))
@@ -4,6 +4,11 @@ import time
 import json
 import re
 import random
+from dataclasses import asdict
+
+from records import PetitionRecord
+from scraper_detail import normalize_date
+from typed_schema import normalize_status, parse_id
 
 BASE_URL = "https://petition.president.gov.ua"
 # Specific URL for 'continuing' petitions (active) - Corrected to root pagination to avoid login
@@ -54,7 +59,7 @@ def scrape_president_petitions(max_pages=1, start_page=1, status="active"):
                     if not link_tag: continue
                     
                     href = link_tag['href']
-                    pet_id = href.split("/")[-1]
+                    pet_id = parse_id(href.split("/")[-1])
                     title = link_tag.get_text(strip=True)
                     
                     number_tag = item.select_one(".pet_number")
@@ -71,19 +76,18 @@ def scrape_president_petitions(max_pages=1, start_page=1, status="active"):
                     raw_votes = counts_tag.get_text(strip=True) if counts_tag else "0"
                     votes = clean_votes(raw_votes)
 
-                    all_petitions.append({
-                        "source": "president",
-                        "id": pet_id,
-                        "number": number_text,
-                        "title": title,
-                        "date": date_text,
-                        "status": status_text,
-                        "votes": votes,
-                        "url": BASE_URL + href,
-                        "author": None,  # Not available on list page
-                        "text_length": None,  # Not available on list page
-                        "has_answer": None  # Not available on list page
-                    })
+                    # author, text_length, has_answer: not available on list page
+                    all_petitions.append(PetitionRecord(
+                        source="president",
+                        external_id=pet_id,
+                        number=number_text,
+                        title=title,
+                        date=date_text,
+                        status=normalize_status(status_text),
+                        votes=votes,
+                        url=BASE_URL + href,
+                        date_normalized=normalize_date(date_text),
+                    ))
                 except Exception as e:
                     print(f"Error parsing item: {e}")
                     continue
@@ -105,4 +109,4 @@ if __name__ == "__main__":
     data = scrape_president_petitions(max_pages=2)
     print(f"Total collected: {len(data)}")
     if data:
-        print(json.dumps(data[0], indent=2, ensure_ascii=False))
+        print(json.dumps(asdict(data[0]), indent=2, ensure_ascii=False))
@@ -0,0 +1,345 @@
+"""
+Full-text search over petitions (BM25), on the title and the stored body.
+
+A standalone inverted index kept in DuckDB tables, maintained by the sync
+scripts, so it works the same locally and on MotherDuck and updates
+incrementally (the `fts` extension can only rebuild its index from scratch).
+
+Tables:
+    search_docs      - one row per indexed petition with its length in terms
+    search_postings  - (term, petition) -> term frequency, plus the document
+                       length and filter columns (status, created date) so a
+                       query is answered from the postings of its terms alone
+
+Bodies are read from petition_texts (text_store.py), so a petition is
+re-indexed when its row in petitions changes or store_texts() stores a new
+body for it.
+
+Tokenization is one SQL expression (tokens_sql()) shared by indexing and
+querying: lowercase, apostrophes unified, split on non-letters, stopwords
+and 1-letter tokens dropped, then a light Ukrainian suffix stemmer
+("тарифів" / "тарифи" / "тарифами" -> "тариф"). tokenize() is its Python
+twin for similar.py, which tokenizes whole texts in Python; the tests check
+that both give the same terms.
+
+Usage:
+    python search.py "тарифи на газ"                       # Query (local DB)
+    python search.py "герой україни" --source president --status "На розгляді"
+    python search.py "екологія" --from 2022-01-01 --to 2023-12-31 --limit 5
+    python search.py --rebuild                            # Rebuild the index
+    python search.py --cloud ...                          # Same, against MotherDuck
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+
+import duckdb
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rollups import init_rollup_tables, get_watermark, set_watermark
+from text_store import init_text_tables, iter_texts
+from typed_schema import SOURCE_TYPE, STATUS_TYPE, normalize_status
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(BASE_DIR, 'petitions.duckdb')
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = (
+    'та', 'і', 'й', 'в', 'у', 'на', 'до', 'з', 'із', 'зі', 'за', 'про', 'для', 'від',
+    'або', 'чи', 'що', 'як', 'не', 'по', 'при', 'під', 'над', 'між', 'через', 'щодо',
+    'який', 'яка', 'яке', 'які', 'його', 'її', 'їх', 'це', 'цей', 'ця', 'ці', 'також',
+    'the', 'and', 'for', 'with', 'of', 'to', 'in',
+)
+
+# Inflectional endings, longest first. A stem keeps at least 3 letters.
+SUFFIXES = (
+    'ськими', 'цькими', 'ського', 'ському', 'ською', 'ській',
+    'ями', 'ами', 'ові', 'еві', 'ого', 'ому', 'ими', 'іми', 'ють', 'ать', 'ять',
+    'ість', 'ості',
+    'ів', 'їв', 'ах', 'ях', 'ам', 'ям', 'ом', 'ем', 'им', 'ім', 'их', 'іх', 'ій', 'ий', 'ої', 'ою', 'ею', 'єю',
+    'ти', 'ть',
+    'а', 'я', 'о', 'е', 'є', 'у', 'ю', 'і', 'и', 'ї', 'й', 'ь',
+)
+
+# Rows of (source, petition_id, title, filter columns) to index; the body is added from petition_texts
+DOC_TEXT_SQL = """
+    SELECT p.source, p.external_id AS petition_id, p.title, p.status, p.date_normalized AS created,
+           GREATEST(COALESCE(p.updated_at, p.crawled_at), t.stored_at) AS changed_at
+    FROM petitions p
+    LEFT JOIN petition_texts t ON t.source = p.source AND t.petition_id = p.external_id
+    WHERE p.title IS NOT NULL
+"""
+
+# Latest change the index has to catch up with
+CHANGED_AT_SQL = """
+    SELECT GREATEST((SELECT MAX(COALESCE(updated_at, crawled_at)) FROM petitions),
+                    (SELECT MAX(stored_at) FROM petition_texts))
+"""
+
+
+def tokens_sql(text_expr):
+    """SQL producing one `term` row per token of `text_expr` (use in FROM with LATERAL/UNNEST)."""
+    stopwords = ", ".join("'" + w + "'" for w in STOPWORDS)
+    suffixes = "|".join(SUFFIXES)
+    return f"""
+        SELECT regexp_replace(tok, '^(.{{3,}}?)({suffixes})$', '\\1') AS term
+        FROM (
+            SELECT UNNEST(regexp_split_to_array(
+                regexp_replace(lower({text_expr}), '[’ʼ`‘´'']', '', 'g'),
+                '[^\\p{{L}}\\p{{N}}]+'
+            )) AS tok
+        )
+        WHERE length(tok) > 1 AND tok NOT IN ({stopwords})
+    """
+
+
+_STEM_RE = re.compile(f"^(.{{3,}}?)({'|'.join(SUFFIXES)})$")
+_APOSTROPHES_RE = re.compile("[’ʼ`‘´']")
+# Letters and numbers, i.e. \p{L}\p{N} (str.isalnum) without the underscore of \w
+_SPLIT_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text):
+    """Python twin of tokens_sql(), for texts tokenized in Python (similar.py)."""
+    # "İ" is the one letter Python lowercases to two characters (i + U+0307); DuckDB gives "i"
+    text = _APOSTROPHES_RE.sub("", (text or "").replace("İ", "i").lower())
+    return [_STEM_RE.sub(r"\1", tok) for tok in _SPLIT_RE.findall(text)
+            if len(tok) > 1 and tok not in STOPWORDS]
+
+
+def init_search_tables(con):
+    """Creates the index tables if they don't exist."""
+    init_rollup_tables(con)
+    init_text_tables(con)
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS search_docs (
+            source {SOURCE_TYPE},
+            petition_id INTEGER,
+            doc_len INTEGER,
+            PRIMARY KEY (source, petition_id)
+        )
+    """)
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS search_postings (
+            term VARCHAR,
+            source {SOURCE_TYPE},
+            petition_id INTEGER,
+            tf INTEGER,
+            doc_len INTEGER,
+            status {STATUS_TYPE},
+            created DATE
+        )
+    """)
+    con.execute("CREATE INDEX IF NOT EXISTS search_postings_term_idx ON search_postings (term)")
+
+
+def index_documents(con, since=None):
+    """
+    (Re)indexes petitions changed after `since` (all petitions if None).
+    Returns the number of documents indexed.
+    """
+    where = "WHERE changed_at > ?" if since is not None else ""
+    params = [since] if since is not None else []
+
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE search_titles AS
+        SELECT source, petition_id, title, status, created FROM ({DOC_TEXT_SQL}) {where}
+    """, params)
+    count = con.execute("SELECT COUNT(*) FROM search_titles").fetchone()[0]
+    if count == 0:
+        con.execute("DROP TABLE search_titles")
+        return 0
+
+    # Bodies are zstd frames: decompressed here and handed back as NumPy columns
+    ids = None
+    if since is not None:
+        ids = [r[0] for r in con.execute("SELECT DISTINCT petition_id FROM search_titles").fetchall()]
+    bodies = [(t["source"], t["id"], t["body"]) for t in iter_texts(con, ids=ids, columns=("body",)) if t["body"]]
+    con.execute(f"CREATE OR REPLACE TEMP TABLE search_bodies (source {SOURCE_TYPE}, petition_id INTEGER, body VARCHAR)")
+    if bodies:
+        columns = list(zip(*bodies))
+        body_rows = {
+            "source": np.array(columns[0], dtype=object),
+            "petition_id": np.array(columns[1], dtype=np.int64),
+            "body": np.array(columns[2], dtype=object),
+        }
+        con.execute("INSERT INTO search_bodies SELECT source, petition_id, body FROM body_rows")
+    con.execute("""
+        CREATE OR REPLACE TEMP TABLE search_batch AS
+        SELECT source, petition_id, concat_ws(chr(10), t.title, b.body) AS text, t.status, t.created
+        FROM search_titles t
+        LEFT JOIN search_bodies b USING (source, petition_id)
+    """)
+    con.execute("DROP TABLE search_titles")
+    con.execute("DROP TABLE search_bodies")
+
+    if since is None:
+        con.execute("DELETE FROM search_postings")
+        con.execute("DELETE FROM search_docs")
+    else:
+        con.execute("""
+            DELETE FROM search_postings WHERE (source, petition_id) IN (SELECT source, petition_id FROM search_batch)
+        """)
+        con.execute("""
+            DELETE FROM search_docs WHERE (source, petition_id) IN (SELECT source, petition_id FROM search_batch)
+        """)
+
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE search_terms AS
+        SELECT b.source, b.petition_id, t.term
+        FROM search_batch b, LATERAL ({tokens_sql('b.text')}) t
+    """)
+    con.execute("""
+        INSERT INTO search_docs
+        SELECT b.source, b.petition_id, COUNT(t.term)
+        FROM search_batch b
+        LEFT JOIN search_terms t USING (source, petition_id)
+        GROUP BY ALL
+    """)
+    con.execute("""
+        INSERT INTO search_postings
+        SELECT t.term, t.source, t.petition_id, COUNT(*), d.doc_len, b.status, b.created
+        FROM search_terms t
+        JOIN search_batch b USING (source, petition_id)
+        JOIN search_docs d USING (source, petition_id)
+        GROUP BY ALL
+        ORDER BY t.term
+    """)
+    con.execute("DROP TABLE search_terms")
+    con.execute("DROP TABLE search_batch")
+    return count
+
+
+def refresh_search_index(con):
+    """Called once per sync after petitions and texts were written: indexes new/changed petitions."""
+    init_search_tables(con)
+
+    watermark = get_watermark(con, "search_index")
+    latest = con.execute(CHANGED_AT_SQL).fetchone()[0]
+    if latest is not None and watermark is not None and latest <= watermark:
+        print("   ✅ search index up to date.")
+        return
+
+    count = index_documents(con, since=watermark)
+    set_watermark(con, "search_index", latest)
+    print(f"   ✅ search index: {count} petitions (re)indexed.")
+
+
+def search(con, query, source=None, status=None, date_from=None, date_to=None, limit=20):
+    """
+    BM25-ranked petitions matching any term of `query`.
+
+    Filters: source ('president'/'cabinet'), status (one status string or a
+    list, English aliases accepted), date_from/date_to (inclusive, on date_normalized).
+    Returns [{"score", "source", "id", "title", "status", "votes", "date", "url"}].
+    """
+    terms = [r[0] for r in con.execute(f"""
+        SELECT DISTINCT term FROM ({tokens_sql('CAST($query AS VARCHAR)')}) ORDER BY term
+    """, {"query": query or ""}).fetchall()]
+    if not terms:
+        return []
+
+    # Constant IN list (not list_contains) so the term index / zonemaps are used
+    term_list = ", ".join(["?"] * len(terms))
+    filters, params = [], [*terms, BM25_K1, BM25_K1, BM25_B, BM25_B]
+    if source:
+        filters.append("h.source = ?")
+        params.append(source)
+    if status:
+        filters.append("list_contains(?, h.status)")
+        statuses = [status] if isinstance(status, str) else list(status)
+        params.append([normalize_status(s) for s in statuses])
+    if date_from:
+        filters.append("h.created >= CAST(? AS DATE)")
+        params.append(date_from)
+    if date_to:
+        filters.append("h.created <= CAST(? AS DATE)")
+        params.append(date_to)
+    where = ("WHERE " + " AND ".join(filters)) if filters else ""
+    params.append(limit)
+
+    rows = con.execute(f"""
+        WITH hits AS (
+            SELECT * FROM search_postings WHERE term IN ({term_list})
+        ),
+        corpus AS (
+            SELECT COUNT(*) AS n, AVG(doc_len) AS avgdl FROM search_docs
+        ),
+        df AS (
+            SELECT term, COUNT(*) AS df FROM hits GROUP BY term
+        ),
+        top AS (
+            SELECT h.source, h.petition_id,
+                   SUM(ln(1 + (corpus.n - df.df + 0.5) / (df.df + 0.5))
+                       * h.tf * (? + 1)
+                       / (h.tf + ? * (1 - ? + ? * h.doc_len / corpus.avgdl))) AS score
+            FROM hits h
+            JOIN df USING (term)
+            CROSS JOIN corpus
+            {where}
+            GROUP BY h.source, h.petition_id
+            ORDER BY score DESC, h.petition_id
+            LIMIT ?
+        )
+        SELECT t.score, p.source, p.external_id, p.title, p.status, p.votes, p.date_normalized, p.url
+        FROM top t
+        JOIN petitions p ON p.source = t.source AND p.external_id = t.petition_id
+        ORDER BY t.score DESC, t.petition_id
+    """, params).fetchall()
+
+    return [{
+        "score": round(r[0], 3), "source": r[1], "id": r[2], "title": r[3],
+        "status": r[4], "votes": r[5], "date": str(r[6]) if r[6] else None, "url": r[7]
+    } for r in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search petitions (BM25) / maintain the search index")
+    parser.add_argument("query", nargs="?", help="Search query")
+    parser.add_argument("--source", choices=["president", "cabinet"], help="Only this source")
+    parser.add_argument("--status", action="append", help="Only this status (repeatable)")
+    parser.add_argument("--from", dest="date_from", help="Created on/after YYYY-MM-DD")
+    parser.add_argument("--to", dest="date_to", help="Created on/before YYYY-MM-DD")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index from scratch")
+    parser.add_argument("--cloud", action="store_true", help="Run against MotherDuck instead of the local DB")
+    args = parser.parse_args()
+
+    if args.cloud:
+        from cloud_sync import get_motherduck_connection
+        con = get_motherduck_connection()
+    else:
+        con = duckdb.connect(DB_FILE)
+
+    try:
+        if args.rebuild:
+            init_search_tables(con)
+            con.execute("DELETE FROM rollup_state WHERE name = 'search_index'")
+            start = time.time()
+            refresh_search_index(con)
+            print(f"⏱️ {time.time() - start:.2f}s")
+
+        if args.query:
+            start = time.time()
+            results = search(con, args.query, source=args.source, status=args.status,
+                             date_from=args.date_from, date_to=args.date_to, limit=args.limit)
+            elapsed = (time.time() - start) * 1000
+            print(f"🔎 {len(results)} results for '{args.query}' ({elapsed:.1f} ms)")
+            for r in results:
+                print(f"   {r['score']:>7.3f}  [{r['source']}] {r['title'][:80]}  ({r['votes']:,} votes, {r['status']})")
+        elif not args.rebuild:
+            parser.print_help()
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+On-disk cache of the daily vote series, memory-mapped by the time-series
+jobs instead of re-reading votes_history.
+
+The series are stored CSR-style: petitions sorted by (source, id), and the
+points of petition i (one per synced day, days ascending) at
+offsets[i]:offsets[i + 1] of two contiguous int32 arrays. series() returns
+slices of the memory-mapped arrays (no copy); window() gathers a date range
+of many petitions at once with a vectorized bisection over their segments.
+Opening the cache maps the files, so it costs the same whatever the length
+of the history.
+
+Each sync merges the new days in: only the votes_between() rows from the
+cached `through` day on are read (that day again, a re-run of a sync
+overwrites it) and spliced into the arrays with one scatter. The number of
+points the cache keeps before that day is checked against votes_intervals
+first; any difference (a backfill) triggers a full rebuild, and so does a
+cache built from another database (local and cloud syncs share indexes/).
+
+Files (under indexes/series/, not committed):
+    meta.json    - database it was built from, through day, petition and
+                   point counts
+    keys.i64     - (source code << 32) | petition id, ascending
+    offsets.i64  - n + 1 segment bounds
+    days.i32     - day of each point (days since 1970-01-01)
+    votes.i32    - votes of each point
+
+Usage:
+    python series_cache.py                     # Merge the new days in (local DB)
+    python series_cache.py --rebuild           # Full build
+    python series_cache.py --show president 123456
+    python series_cache.py --cloud ...         # Same, against MotherDuck
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import date, timedelta
+
+import duckdb
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from votes_store import init_votes_tables, latest_day
+from typed_schema import SOURCES
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(BASE_DIR, 'petitions.duckdb')
+SERIES_DIR = os.path.join(BASE_DIR, 'indexes', 'series')
+CACHE_VERSION = 1
+
+EPOCH = date(1970, 1, 1)
+ARRAYS = (("keys.i64", np.int64), ("offsets.i64", np.int64), ("days.i32", np.int32), ("votes.i32", np.int32))
+
+POINTS_SQL = """
+    SELECT (CAST(enum_code(source) AS BIGINT) << 32) | petition_id AS key,
+           CAST(date - DATE '1970-01-01' AS INTEGER) AS day, votes
+    FROM {source}
+    WHERE votes IS NOT NULL
+    ORDER BY key, day
+"""
+
+
+def day_number(day):
+    """Date or ISO string -> days since 1970-01-01 (the unit of days.i32)."""
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return (day - EPOCH).days
+
+
+def petition_key(source, petition_id):
+    return (SOURCES.index(source) << 32) | int(petition_id)
+
+
+def _paths(cache_dir):
+    return {name: os.path.join(cache_dir, name) for name in ("meta.json",) + tuple(n for n, _ in ARRAYS)}
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(_paths(cache_dir)["meta.json"]) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("version") == CACHE_VERSION else None
+
+
+def _database(con):
+    return con.execute("SELECT current_database()").fetchone()[0]
+
+
+def _save(cache_dir, database, through, keys, offsets, days, votes):
+    """Writes the arrays through temporary files, meta.json last."""
+    os.makedirs(cache_dir, exist_ok=True)
+    paths = _paths(cache_dir)
+    meta_path = paths["meta.json"]
+    if os.path.exists(meta_path):
+        # A cache without meta.json is treated as missing while the arrays are swapped
+        os.remove(meta_path)
+    for (name, dtype), values in zip(ARRAYS, (keys, offsets, days, votes)):
+        np.asarray(values, dtype=dtype).tofile(paths[name] + ".tmp")
+        os.replace(paths[name] + ".tmp", paths[name])
+    with open(meta_path, 'w') as f:
+        json.dump({"version": CACHE_VERSION, "database": database, "through": str(through),
+                   "petitions": len(keys), "points": int(offsets[-1]),
+                   "built_at": time.strftime("%Y-%m-%dT%H:%M:%S")}, f)
+    _cache.pop(cache_dir, None)
+
+
+def _read_points(con, source, params=None):
+    rows = con.execute(POINTS_SQL.format(source=source), params or []).fetchnumpy()
+    return (rows["key"].astype(np.int64), rows["day"].astype(np.int32), rows["votes"].astype(np.int32))
+
+
+def build_cache(con, cache_dir=SERIES_DIR):
+    """Full build from votes_history. Returns the number of points."""
+    init_votes_tables(con)
+    through = latest_day(con)
+    if through is None:
+        return 0
+    keys, days, votes = _read_points(con, "votes_history")
+    unique, counts = np.unique(keys, return_counts=True)
+    _save(cache_dir, _database(con), through, unique, np.r_[0, np.cumsum(counts)], days, votes)
+    return len(days)
+
+
+def merge_points(keys, offsets, days, votes, since, new_keys, new_days, new_votes):
+    """
+    CSR arrays with every point from day `since` on replaced by the new
+    points (sorted by key and day). Returns (keys, offsets, days, votes).
+    """
+    owner = np.repeat(np.arange(len(keys)), np.diff(offsets))
+    # Days ascend within a segment, so the kept points are a prefix of it
+    keep = np.flatnonzero(days < since)
+    kept = np.bincount(owner[keep], minlength=len(keys))
+
+    all_keys = np.union1d(keys, new_keys)
+    old_at = np.searchsorted(all_keys, keys)
+    new_at = np.searchsorted(all_keys, new_keys)
+    kept_all = np.zeros(len(all_keys), dtype=np.int64)
+    kept_all[old_at] = kept
+    new_counts = np.bincount(new_at, minlength=len(all_keys))
+    out_offsets = np.r_[0, np.cumsum(kept_all + new_counts)]
+
+    out_days = np.empty(out_offsets[-1], dtype=np.int32)
+    out_votes = np.empty(out_offsets[-1], dtype=np.int32)
+    position = out_offsets[old_at[owner[keep]]] + keep - offsets[owner[keep]]
+    out_days[position] = days[keep]
+    out_votes[position] = votes[keep]
+    rank = np.arange(len(new_keys)) - np.r_[0, np.cumsum(new_counts)[:-1]][new_at]
+    position = out_offsets[new_at] + kept_all[new_at] + rank
+    out_days[position] = new_days
+    out_votes[position] = new_votes
+    return all_keys, out_offsets, out_days, out_votes
+
+
+def update_cache(con, cache_dir=SERIES_DIR):
+    """
+    Merges the days from the cached `through` day on into the cache.
+    Returns the number of new points, or None if the cache has to be rebuilt
+    (missing, built from another database, or its older days no longer
+    match votes_intervals).
+    """
+    init_votes_tables(con)
+    meta = _read_meta(cache_dir)
+    through = latest_day(con)
+    if meta is None or through is None or meta["database"] != _database(con):
+        return None
+    since = date.fromisoformat(meta["through"])
+    if through < since:
+        return None
+
+    cache = load_series(cache_dir)
+    kept = int(np.count_nonzero(cache["days"] < day_number(since)))
+    expected = con.execute("""
+        SELECT COALESCE(SUM(LEAST(last_seen, CAST(? AS DATE) - 1) - valid_from + 1), 0)
+        FROM votes_intervals
+        WHERE valid_from < CAST(? AS DATE) AND votes IS NOT NULL
+    """, [since, since]).fetchone()[0]
+    if kept != expected:
+        return None
+
+    new_keys, new_days, new_votes = _read_points(con, "votes_between(CAST(? AS DATE), CAST(? AS DATE))",
+                                                 [since, through])
+    merged = merge_points(cache["keys"], cache["offsets"], cache["days"], cache["votes"],
+                          day_number(since), new_keys, new_days, new_votes)
+    _save(cache_dir, _database(con), through, *merged)
+    return len(new_days)
+
+
+def refresh_series(con, cache_dir=SERIES_DIR, rebuild=False):
+    """Called once per sync after votes_history has been written: merges the new days (builds if needed)."""
+    start = time.time()
+    added = None if rebuild else update_cache(con, cache_dir)
+    if added is None:
+        points = build_cache(con, cache_dir)
+        print(f"   ✅ series cache built: {points:,} points ({time.time() - start:.1f}s).")
+    else:
+        print(f"   ✅ series cache: {added:,} points merged ({time.time() - start:.1f}s).")
+
+
+_cache = {}
+
+
+def load_series(cache_dir=SERIES_DIR):
+    """
+    Memory-maps the cache. Cached per process (until the next write);
+    returns None if there is no cache.
+    """
+    if cache_dir in _cache:
+        return _cache[cache_dir]
+    meta = _read_meta(cache_dir)
+    if meta is None:
+        return None
+    paths = _paths(cache_dir)
+    sizes = {"keys.i64": meta["petitions"], "offsets.i64": meta["petitions"] + 1,
+             "days.i32": meta["points"], "votes.i32": meta["points"]}
+    series = {"meta": meta, "through": date.fromisoformat(meta["through"])}
+    for name, dtype in ARRAYS:
+        # np.memmap refuses empty files
+        series[name.split(".")[0]] = (np.memmap(paths[name], dtype=dtype, mode='r', shape=(sizes[name],))
+                                      if sizes[name] else np.zeros(0, dtype=dtype))
+    _cache[cache_dir] = series
+    return series
+
+
+def cache_for(con, day, cache_dir=SERIES_DIR):
+    """The cache if it was built from the database of `con` and has `day`, else None."""
+    cache = load_series(cache_dir)
+    if cache is None or cache["meta"]["database"] != _database(con) or str(cache["through"]) < str(day):
+        return None
+    return cache
+
+
+def series(cache, source, petition_id):
+    """(days, votes) of one petition: views of the memory-mapped arrays, empty if not cached."""
+    key = petition_key(source, petition_id)
+    i = np.searchsorted(cache["keys"], key)
+    if i == len(cache["keys"]) or cache["keys"][i] != key:
+        return cache["days"][:0], cache["votes"][:0]
+    lo, hi = cache["offsets"][i], cache["offsets"][i + 1]
+    return cache["days"][lo:hi], cache["votes"][lo:hi]
+
+
+def _lower_bound(days, lo, hi, value):
+    """First position in [lo, hi) of every segment whose day is >= value (vectorized bisection)."""
+    lo, hi = lo.copy(), hi.copy()
+    while True:
+        active = lo < hi
+        if not active.any():
+            return lo
+        mid = (lo + hi) // 2
+        below = np.zeros(len(lo), dtype=bool)
+        below[active] = days[mid[active]] < value
+        lo = np.where(active & below, mid + 1, lo)
+        hi = np.where(active & ~below, mid, hi)
+
+
+def window(cache, keys, day_from, day_to):
+    """
+    Points of the petitions `keys` (petition_key() values) between two days,
+    inclusive. Returns (petition, days, votes): `petition` indexes `keys`,
+    rows are sorted by petition and day; petitions without points are absent.
+    """
+    at = np.searchsorted(cache["keys"], keys)
+    found = at < len(cache["keys"])
+    found[found] = cache["keys"][at[found]] == keys[found]
+    petitions = np.flatnonzero(found)
+    lo, hi = cache["offsets"][at[found]], cache["offsets"][at[found] + 1]
+    start = _lower_bound(cache["days"], lo, hi, day_number(day_from))
+    end = _lower_bound(cache["days"], start, hi, day_number(day_to) + 1)
+
+    lengths = end - start
+    petition = np.repeat(petitions, lengths)
+    index = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(start, lengths)
+    return petition, np.asarray(cache["days"][index]), np.asarray(cache["votes"][index])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory-mapped cache of the daily vote series")
+    parser.add_argument("--rebuild", action="store_true", help="Full build instead of merging the new days")
+    parser.add_argument("--show", nargs=2, metavar=("SOURCE", "ID"), help="Print one petition's series")
+    parser.add_argument("--cloud", action="store_true", help="Run against MotherDuck instead of the local DB")
+    args = parser.parse_args()
+
+    if args.show:
+        cache = load_series()
+        if cache is None:
+            print("⚠️ No series cache yet: run `python series_cache.py`")
+            return
+        days, votes = series(cache, args.show[0], args.show[1])
+        for d, v in zip(days, votes):
+            print(f"   {EPOCH + timedelta(days=int(d))}  {v:>9,}")
+        return
+
+    if args.cloud:
+        from cloud_sync import get_motherduck_connection
+        con = get_motherduck_connection()
+    else:
+        con = duckdb.connect(DB_FILE)
+
+    try:
+        refresh_series(con, rebuild=args.rebuild)
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
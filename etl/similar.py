@@ -0,0 +1,370 @@
+"""
+"Similar petitions" index: TF-IDF vectors + approximate nearest neighbours.
+
+Every petition (title, plus the start of its body when text_store.py has it)
+becomes a TF-IDF vector over the stemmed terms of search.tokenize(). The
+sparse vector is folded into DIM dense dimensions with signed feature
+hashing (each term lands on HASHES dimensions with a ±1 sign), a sparse
+random projection that keeps cosine similarity, so it fits a NumPy array.
+
+Vectors are grouped by an IVF index: spherical k-means centroids, every
+vector stored in the list of its nearest centroid. A query scores the
+centroids, then only the vectors of the NPROBE closest lists.
+
+Files (under indexes/similar/, not committed):
+    meta.json      - dimensions, document count used for IDF, list count
+    centroids.npy  - (nlist, DIM) float32
+    df.npy         - document frequency per hashed term bucket (for IDF)
+    vectors.f16    - (n, DIM) float16, appended to by incremental updates
+    lists.i32      - IVF list of every vector, appended likewise
+    keys.txt       - "source:id" of every vector, one per line
+
+New petitions are vectorized with the IDF and centroids of the last full
+build and appended; `--rebuild` refreshes both (run it when the archive grew
+a lot since the last one).
+
+Usage:
+    python similar.py                          # Add new petitions (local DB)
+    python similar.py --rebuild                # Full build
+    python similar.py --like president 123456  # Petitions similar to one petition
+    python similar.py --query "тарифи на газ"  # Petitions similar to a text
+    python similar.py --cloud ...              # Same, against MotherDuck
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from collections import Counter
+
+import duckdb
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from search import tokenize
+from text_store import init_text_tables, iter_texts
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(BASE_DIR, 'petitions.duckdb')
+INDEX_DIR = os.path.join(BASE_DIR, 'indexes', 'similar')
+
+DIM = 256
+HASHES = 2
+DF_BUCKETS = 1 << 20
+# Body text is truncated and down-weighted: the title says what the petition is about
+BODY_CHARS = 2000
+BODY_WEIGHT = 0.5
+# IVF parameters
+KMEANS_SAMPLE = 30000
+KMEANS_ITERATIONS = 12
+NPROBE = 16
+BATCH = 20000
+
+
+def n_lists(n):
+    """~sqrt(n) lists keeps both the centroid scan and the probed lists short."""
+    return int(min(max(np.sqrt(n), 1), 4096))
+
+
+def _term_hashes(terms, cache):
+    """(df bucket, HASHES dims, HASHES signs) per term, from a stable hash (not Python's salted hash())."""
+    buckets = np.empty(len(terms), dtype=np.int32)
+    dims = np.empty((len(terms), HASHES), dtype=np.int16)
+    signs = np.empty((len(terms), HASHES), dtype=np.int8)
+    for i, term in enumerate(terms):
+        if term not in cache:
+            digest = hashlib.blake2b(term.encode('utf-8'), digest_size=16).digest()
+            values = [int.from_bytes(digest[4 * j:4 * j + 4], 'little') for j in range(HASHES + 1)]
+            cache[term] = (values[0] % DF_BUCKETS,
+                           [v % DIM for v in values[1:]],
+                           [1 if v & (1 << 31) else -1 for v in values[1:]])
+        buckets[i], dims[i], signs[i] = cache[term]
+    return buckets, dims, signs
+
+
+def term_entries(docs, cache):
+    """
+    docs: [(title, body)] -> one entry per (doc, distinct term): doc index,
+    df bucket, hashed dims/signs and tf (body terms count BODY_WEIGHT each).
+    """
+    doc_idx, terms, tf = [], [], []
+    for d, (title, body) in enumerate(docs):
+        counts = Counter(tokenize(title))
+        if body:
+            for term, c in Counter(tokenize(body[:BODY_CHARS])).items():
+                counts[term] += c * BODY_WEIGHT
+        doc_idx.extend([d] * len(counts))
+        terms.extend(counts)
+        tf.extend(counts.values())
+    buckets, dims, signs = _term_hashes(terms, cache)
+    return {"doc": np.array(doc_idx, dtype=np.int64), "bucket": buckets, "dims": dims, "signs": signs,
+            "tf": np.array(tf, dtype=np.float32)}
+
+
+def vectorize(docs, df=None, n_docs=None):
+    """
+    (len(docs), DIM) float32 unit vectors, built BATCH docs at a time. With
+    df/n_docs None, document frequencies are counted over `docs` themselves
+    (and returned for storage).
+    """
+    cache = {}
+    chunks = [term_entries(docs[start:start + BATCH], cache) for start in range(0, len(docs), BATCH)]
+    if df is None:
+        df = np.zeros(DF_BUCKETS, dtype=np.int32)
+        for entries in chunks:
+            df += np.bincount(entries["bucket"], minlength=DF_BUCKETS).astype(np.int32)
+        n_docs = len(docs)
+
+    vectors = np.zeros((len(docs), DIM), dtype=np.float32)
+    for start, entries in zip(range(0, len(docs), BATCH), chunks):
+        size = min(BATCH, len(docs) - start)
+        idf = np.log((1 + n_docs) / (1 + df[entries["bucket"]])) + 1
+        weights = (1 + np.log(entries["tf"])) * idf
+        flat = np.zeros(size * DIM)
+        for j in range(HASHES):
+            flat += np.bincount(entries["doc"] * DIM + entries["dims"][:, j],
+                                weights=weights * entries["signs"][:, j], minlength=size * DIM)
+        vectors[start:start + size] = flat.reshape(size, DIM)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms > 0, norms, 1)
+    return vectors, df, n_docs
+
+
+def assign_lists(vectors, centroids):
+    """Nearest centroid (max dot product) of every vector, in batches."""
+    lists = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), BATCH):
+        lists[start:start + BATCH] = np.argmax(vectors[start:start + BATCH] @ centroids.T, axis=1)
+    return lists
+
+
+def train_centroids(vectors, nlist, seed=0):
+    """Spherical k-means on a sample of the vectors."""
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), size=min(len(vectors), KMEANS_SAMPLE), replace=False)]
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        lists = assign_lists(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, lists, sample)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        # Empty lists are re-seeded with random sample vectors
+        sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+        norms[empty] = 1
+        centroids = sums / norms
+    return centroids.astype(np.float32)
+
+
+def _paths(index_dir):
+    return {name: os.path.join(index_dir, name)
+            for name in ("meta.json", "centroids.npy", "df.npy", "vectors.f16", "lists.i32", "keys.txt")}
+
+
+def _load_docs(con, skip=None):
+    """[(key, title, body)] of petitions with a title, bodies from petition_texts when stored."""
+    init_text_tables(con)
+    rows = con.execute("""
+        SELECT source || ':' || external_id, title FROM petitions
+        WHERE title IS NOT NULL
+        ORDER BY source, external_id
+    """).fetchall()
+    if skip:
+        rows = [r for r in rows if r[0] not in skip]
+    wanted = {r[0] for r in rows}
+    # Incremental runs only decompress the bodies of the new petitions
+    ids = [key.split(":", 1)[1] for key in wanted] if skip else None
+    bodies = {}
+    for item in iter_texts(con, ids=ids, columns=("body",), batch_size=5000):
+        key = f"{item['source']}:{item['id']}"
+        if key in wanted and item["body"]:
+            bodies[key] = item["body"][:BODY_CHARS]
+    return [(key, title, bodies.get(key)) for key, title in rows]
+
+
+def build_index(con, index_dir=INDEX_DIR):
+    """Full build over all petitions. Returns the number of vectors."""
+    docs = _load_docs(con)
+    if not docs:
+        return 0
+    vectors, df, n_docs = vectorize([(t, b) for _, t, b in docs])
+    centroids = train_centroids(vectors, n_lists(len(vectors)))
+    lists = assign_lists(vectors, centroids)
+
+    os.makedirs(index_dir, exist_ok=True)
+    paths = _paths(index_dir)
+    np.save(paths["centroids.npy"], centroids)
+    np.save(paths["df.npy"], df)
+    vectors.astype(np.float16).tofile(paths["vectors.f16"])
+    lists.tofile(paths["lists.i32"])
+    with open(paths["keys.txt"], 'w', encoding='utf-8') as f:
+        f.write("".join(key + "\n" for key, _, _ in docs))
+    # meta.json last: an index without it is treated as missing
+    with open(paths["meta.json"], 'w') as f:
+        json.dump({"dim": DIM, "hashes": HASHES, "n_docs_idf": n_docs, "nlist": len(centroids),
+                   "built_at": time.strftime("%Y-%m-%dT%H:%M:%S")}, f)
+    _cache.clear()
+    return len(docs)
+
+
+def add_new(con, index_dir=INDEX_DIR):
+    """Appends petitions that are not in the index yet. Returns the number added."""
+    paths = _paths(index_dir)
+    with open(paths["keys.txt"], encoding='utf-8') as f:
+        indexed = set(f.read().split())
+    docs = _load_docs(con, skip=indexed)
+    if not docs:
+        return 0
+
+    with open(paths["meta.json"]) as f:
+        meta = json.load(f)
+    vectors, _, _ = vectorize([(t, b) for _, t, b in docs],
+                              df=np.load(paths["df.npy"]), n_docs=meta["n_docs_idf"])
+    lists = assign_lists(vectors, np.load(paths["centroids.npy"]))
+
+    # keys.txt is appended last, so a crash in between at worst re-adds a petition
+    with open(paths["vectors.f16"], 'ab') as f:
+        vectors.astype(np.float16).tofile(f)
+    with open(paths["lists.i32"], 'ab') as f:
+        lists.tofile(f)
+    with open(paths["keys.txt"], 'a', encoding='utf-8') as f:
+        f.write("".join(key + "\n" for key, _, _ in docs))
+    _cache.clear()
+    return len(docs)
+
+
+def sync_similar(con, index_dir=INDEX_DIR):
+    """Called once per sync after petitions were written: adds new petitions (builds the index if missing)."""
+    start = time.time()
+    if not os.path.exists(_paths(index_dir)["meta.json"]):
+        count = build_index(con, index_dir)
+        print(f"   ✅ similar index built: {count} petitions ({time.time() - start:.1f}s).")
+    else:
+        count = add_new(con, index_dir)
+        print(f"   ✅ similar index: {count} new petitions added.")
+
+
+_cache = {}
+
+
+def load_index(index_dir=INDEX_DIR):
+    """
+    Memory-maps the index and groups vector ids by list. Cached per process;
+    returns None if there is no index.
+    """
+    if index_dir in _cache:
+        return _cache[index_dir]
+    paths = _paths(index_dir)
+    if not os.path.exists(paths["meta.json"]):
+        return None
+    with open(paths["meta.json"]) as f:
+        meta = json.load(f)
+    with open(paths["keys.txt"], encoding='utf-8') as f:
+        keys = f.read().split()
+    n = len(keys)
+    vectors = np.memmap(paths["vectors.f16"], dtype=np.float16, mode='r', shape=(n, meta["dim"]))
+    lists = np.fromfile(paths["lists.i32"], dtype=np.int32, count=n)
+    order = np.argsort(lists, kind="stable")
+    offsets = np.searchsorted(lists[order], np.arange(meta["nlist"] + 1))
+    index = {
+        "meta": meta, "keys": keys, "positions": {k: i for i, k in enumerate(keys)},
+        "vectors": vectors, "centroids": np.load(paths["centroids.npy"]),
+        "df": np.load(paths["df.npy"]), "order": order, "offsets": offsets,
+    }
+    _cache[index_dir] = index
+    return index
+
+
+def search_vector(index, vector, k=10, nprobe=NPROBE, exclude=None):
+    """Top-k (key, cosine) for a unit vector, scanning the nprobe closest lists."""
+    probe = np.argsort(index["centroids"] @ vector)[::-1][:nprobe]
+    offsets, order = index["offsets"], index["order"]
+    candidates = np.concatenate([order[offsets[l]:offsets[l + 1]] for l in probe])
+    if exclude is not None:
+        candidates = candidates[candidates != exclude]
+    if len(candidates) == 0:
+        return []
+    # Sorted ids read the memory-mapped vectors front to back
+    candidates = np.sort(candidates)
+    scores = index["vectors"][candidates].astype(np.float32) @ vector
+    top = np.argsort(scores)[::-1][:k]
+    ids = candidates[top]
+    return [(index["keys"][i], float(scores[t])) for i, t in zip(ids, top)]
+
+
+def similar_to(index, source, petition_id, k=10, nprobe=NPROBE):
+    """Petitions most similar to an indexed petition ([] if it is not indexed)."""
+    position = index["positions"].get(f"{source}:{petition_id}")
+    if position is None:
+        return []
+    vector = index["vectors"][position].astype(np.float32)
+    return search_vector(index, vector, k, nprobe, exclude=position)
+
+
+def similar_to_text(index, text, k=10, nprobe=NPROBE):
+    """Petitions most similar to free text."""
+    vector, _, _ = vectorize([(text, None)], df=index["df"], n_docs=index["meta"]["n_docs_idf"])
+    return search_vector(index, vector[0], k, nprobe)
+
+
+def describe(con, hits):
+    """Attaches title / url / votes to (key, score) hits."""
+    if not hits:
+        return []
+    rows = con.execute("""
+        SELECT source || ':' || external_id, title, url, votes, status FROM petitions
+        WHERE list_contains(?, source || ':' || external_id)
+    """, [[key for key, _ in hits]]).fetchall()
+    info = {r[0]: r[1:] for r in rows}
+    return [{
+        "source": key.split(":", 1)[0], "id": key.split(":", 1)[1], "score": round(score, 3),
+        "title": info[key][0], "url": info[key][1], "votes": info[key][2], "status": info[key][3],
+    } for key, score in hits if key in info]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Similar petitions (TF-IDF + IVF approximate nearest neighbours)")
+    parser.add_argument("--rebuild", action="store_true", help="Full build over all petitions")
+    parser.add_argument("--like", nargs=2, metavar=("SOURCE", "ID"), help="Petitions similar to this one")
+    parser.add_argument("--query", help="Petitions similar to this text")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--cloud", action="store_true", help="Run against MotherDuck instead of the local DB")
+    args = parser.parse_args()
+
+    if args.cloud:
+        from cloud_sync import get_motherduck_connection
+        con = get_motherduck_connection()
+    else:
+        con = duckdb.connect(DB_FILE)
+
+    try:
+        if args.rebuild:
+            start = time.time()
+            count = build_index(con)
+            print(f"✅ Indexed {count:,} petitions in {time.time() - start:.1f}s")
+        elif not (args.like or args.query):
+            sync_similar(con)
+
+        if args.like or args.query:
+            index = load_index()
+            if index is None:
+                print("❌ No index yet, run with --rebuild first.")
+                return
+            start = time.perf_counter()
+            if args.like:
+                hits = similar_to(index, args.like[0], args.like[1], args.k)
+            else:
+                hits = similar_to_text(index, args.query, args.k)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"🔗 {len(hits)} similar petitions ({elapsed:.1f} ms)")
+            for h in describe(con, hits):
+                print(f"   {h['score']:.3f}  [{h['source']}] {h['title'][:80]}  ({h['votes']:,} votes)")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ import time
 import random
 import argparse
 from scraper_detail import fetch_petition_detail
+from records import FetchError, insert_sql
 
 DB_FILE = "petitions.duckdb"
 
@@ -49,29 +50,23 @@ def backfill_smart(start_id, end_id):
         # SCRAPE
         data = fetch_petition_detail(pet_id)
         
-        if not data or 'error' in data:
-            if data and data.get('error') == 404:
+        if not data or isinstance(data, FetchError):
+            if data and data.not_found:
                 pass # 404 is normal for gaps
             stats['skipped'] += 1
         else:
             if s_id in needs_update_ids:
                 # UPDATE
-                date_norm = data.get('date_normalized')
-                fields = ['number', 'title', 'date', 'status', 'votes', 'url', 'author', 'text_length', 'has_answer']
+                fields = ['number', 'title', 'date', 'status', 'votes', 'url', 'author', 'text_length', 'has_answer',
+                          'date_normalized']
                 set_clause = ", ".join([f"{f} = ?" for f in fields])
-                set_clause += ", date_normalized = ?"
-                params = [data.get(f) for f in fields]
-                params.append(date_norm)
+                params = [getattr(data, f) for f in fields]
                 params.extend(['president', s_id])
                 con.execute(f"UPDATE petitions SET {set_clause} WHERE source=? AND external_id=?", params)
                 stats['updated'] += 1
             else:
                 # INSERT
-                date_norm = data.get('date_normalized')
-                con.execute("""
-                    INSERT INTO petitions (source, external_id, number, title, date, status, votes, url, author, text_length, has_answer, date_normalized)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, ('president', s_id, data['number'], data['title'], data['date'], data['status'], data['votes'], data['url'], data['author'], data['text_length'], data['has_answer'], date_norm))
+                con.execute(insert_sql(), data.db_row())
                 stats['inserted'] += 1
         
         if stats['checked'] % 10 == 0:
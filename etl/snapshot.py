@@ -0,0 +1,184 @@
+"""
+Parquet snapshots of petitions and the votes history, for consumers that
+should not need a database connection.
+
+    snapshots/petitions.parquet
+    snapshots/votes_history/year=2026/month=3/data.parquet
+
+Files are zstd-compressed. petitions is sorted by source and id, and each
+history month by source, date and petition, so the row-group min/max
+statistics let readers skip row groups by source and date; the
+year=/month= directories let them skip whole months. source and status
+are written as plain strings: Parquet statistics of an ENUM column cover
+its whole dictionary and would never exclude anything. For example:
+
+    SELECT * FROM read_parquet('snapshots/votes_history/*/*/*.parquet', hive_partitioning = true)
+    WHERE source = 'cabinet' AND date >= DATE '2026-03-01'
+
+Only what changed is rewritten. Every month has a checksum of its slice of
+votes_intervals (each interval clipped to the month, so extending an open
+interval only touches the current month) and petitions one of the whole
+table; they are kept in snapshots/_state.json and a month or table is
+written again only when its checksum moved. A day's sync rewrites the
+current month and petitions, and a backfill rewrites the months it
+filled. Each file is written next to its target and renamed over it, so
+readers never see half a file.
+
+Usage:
+    python snapshot.py                      # Snapshot the local DB
+    python snapshot.py --full               # Rewrite every file
+    python snapshot.py --out /tmp/snap      # Other target directory
+    python snapshot.py --cloud              # Snapshot MotherDuck
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(BASE_DIR, 'petitions.duckdb')
+SNAPSHOT_DIR = os.path.join(BASE_DIR, 'snapshots')
+STATE_VERSION = 1
+
+ROW_GROUP_SIZE = 100_000
+PARQUET_OPTIONS = f"FORMAT parquet, COMPRESSION zstd, ROW_GROUP_SIZE {ROW_GROUP_SIZE}"
+
+# Checksum of each month's history: the intervals overlapping the month,
+# clipped to it
+MONTH_CHECKSUMS_SQL = """
+    WITH months AS (
+        SELECT i.*, CAST(m AS DATE) AS month_start,
+               CAST(m + INTERVAL 1 MONTH - INTERVAL 1 DAY AS DATE) AS month_end
+        FROM votes_intervals i,
+             UNNEST(range(date_trunc('month', valid_from), date_trunc('month', last_seen) + INTERVAL 1 DAY,
+                          INTERVAL 1 MONTH)) AS r(m)
+    )
+    SELECT strftime(month_start, '%Y-%m') AS month, COUNT(*),
+           bit_xor(md5_number(CAST(ROW(petition_id, source, GREATEST(valid_from, month_start),
+                                       LEAST(last_seen, month_end), votes) AS VARCHAR)))
+    FROM months
+    GROUP BY month
+"""
+
+
+def load_state(out_dir):
+    try:
+        with open(os.path.join(out_dir, "_state.json"), encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get("version") == STATE_VERSION:
+            return state
+    except (OSError, ValueError):
+        pass
+    return {"version": STATE_VERSION, "petitions": None, "months": {}}
+
+
+def save_state(out_dir, state):
+    path = os.path.join(out_dir, "_state.json")
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def copy_to_parquet(con, query, path):
+    """Writes `query` to `path` through a temporary file renamed over it."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    con.execute(f"COPY ({query}) TO '{tmp}' ({PARQUET_OPTIONS})")
+    os.replace(tmp, path)
+
+
+def petitions_checksum(con):
+    count, digest = con.execute("SELECT COUNT(*), bit_xor(md5_number(CAST(p AS VARCHAR))) FROM petitions p").fetchone()
+    return f"{count}:{digest}"
+
+
+def month_checksums(con):
+    return {month: f"{count}:{digest}" for month, count, digest in con.execute(MONTH_CHECKSUMS_SQL).fetchall()}
+
+
+def month_path(out_dir, month):
+    year, number = month.split("-")
+    return os.path.join(out_dir, "votes_history", f"year={year}", f"month={int(number)}", "data.parquet")
+
+
+def write_month(con, out_dir, month):
+    year, number = (int(x) for x in month.split("-"))
+    first = f"{year:04d}-{number:02d}-01"
+    copy_to_parquet(con, f"""
+        SELECT CAST(source AS VARCHAR) AS source, petition_id, date, votes
+        FROM votes_between(DATE '{first}', CAST(DATE '{first}' + INTERVAL 1 MONTH - INTERVAL 1 DAY AS DATE))
+        ORDER BY source, date, petition_id
+    """, month_path(out_dir, month))
+
+
+def write_snapshot(con, out_dir=SNAPSHOT_DIR, full=False):
+    """
+    Brings the Parquet snapshot in `out_dir` up to date with the database of
+    `con` (only reads it). Returns the number of files rewritten.
+    """
+    start = time.time()
+    if full:
+        shutil.rmtree(os.path.join(out_dir, "votes_history"), ignore_errors=True)
+        state = {"version": STATE_VERSION, "petitions": None, "months": {}}
+    else:
+        state = load_state(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    written = 0
+
+    checksum = petitions_checksum(con)
+    if checksum != state["petitions"] or not os.path.exists(os.path.join(out_dir, "petitions.parquet")):
+        copy_to_parquet(con, """
+            SELECT * REPLACE (CAST(source AS VARCHAR) AS source, CAST(status AS VARCHAR) AS status)
+            FROM petitions ORDER BY source, external_id
+        """, os.path.join(out_dir, "petitions.parquet"))
+        state["petitions"] = checksum
+        written += 1
+        print("   ✅ petitions.parquet written")
+
+    months = month_checksums(con)
+    for month in sorted(months):
+        if months[month] == state["months"].get(month) and os.path.exists(month_path(out_dir, month)):
+            continue
+        write_month(con, out_dir, month)
+        state["months"][month] = months[month]
+        written += 1
+        print(f"   ✅ votes_history {month} written")
+    for month in sorted(set(state["months"]) - set(months)):
+        shutil.rmtree(os.path.dirname(month_path(out_dir, month)), ignore_errors=True)
+        del state["months"][month]
+        print(f"   🗑️ votes_history {month} removed (no rows left)")
+
+    save_state(out_dir, state)
+    print(f"✅ Snapshot {out_dir}: {written} files rewritten, "
+          f"{len(months) + 1 - written} unchanged ({time.time() - start:.1f}s)")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write Parquet snapshots of petitions and votes history")
+    parser.add_argument("--out", default=SNAPSHOT_DIR, help="Target directory")
+    parser.add_argument("--full", action="store_true", help="Rewrite every file")
+    parser.add_argument("--cloud", action="store_true", help="Snapshot MotherDuck instead of the local DB")
+    args = parser.parse_args()
+
+    if args.cloud:
+        from cloud_sync import get_motherduck_connection
+        con = get_motherduck_connection()
+    else:
+        con = duckdb.connect(DB_FILE, read_only=True)
+
+    try:
+        write_snapshot(con, args.out, full=args.full)
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Status transitions of petitions and the funnel metrics derived from them.
+
+Every sync path (cloud_sync, daily_sync, pipeline.run_pipeline) records the
+status changes it observes with record_status_events(): one bulk insert per
+run into the append-only `status_events` table. A new petition gets an event
+from NULL to its first status. An event repeating a petition's latest
+recorded status is dropped, so re-scanning the same pages is harmless.
+
+`funnel_metrics` is maintained on top of it (and the vote history) per source
+and monthly cohort of the petition's creation date:
+    petitions -> reached 25k -> answered, with the answer rate of the
+    petitions that reached 25k, the median days to 25k and the median days
+    from review to answer.
+Only the cohorts of petitions changed since the last refresh are recomputed.
+
+Tables:
+    status_events  - (source, petition_id, from_status, to_status, observed_at)
+    funnel_metrics - one row per (source, cohort month)
+
+Usage:
+    python status_events.py --backfill         # Seed events from daily_stats JSON + current statuses
+    python status_events.py                    # Refresh funnel_metrics (local DB)
+    python status_events.py --cloud ...        # Same, against MotherDuck
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import duckdb
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rollups import VOTE_THRESHOLD, init_rollup_tables, get_watermark, set_watermark
+from typed_schema import SOURCE_TYPE, STATUS_TYPE, IN_REVIEW, ANSWERED, parse_id, status_sql
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(BASE_DIR, 'petitions.duckdb')
+
+def init_status_tables(con):
+    """Creates the event and funnel tables if they don't exist."""
+    init_rollup_tables(con)
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS status_events (
+            source {SOURCE_TYPE},
+            petition_id INTEGER,
+            from_status {STATUS_TYPE},   -- NULL for the first status of a new petition
+            to_status {STATUS_TYPE},
+            observed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS funnel_metrics (
+            source {SOURCE_TYPE},
+            cohort VARCHAR,              -- 'YYYY-MM' of date_normalized
+            petitions INTEGER,
+            reached_25k INTEGER,
+            in_review INTEGER,
+            answered INTEGER,            -- answered petitions among those that reached 25k
+            answer_rate DOUBLE,          -- answered / reached_25k, %
+            median_days_to_25k DOUBLE,   -- creation -> first history day at 25k (crossings seen by the syncs)
+            median_days_to_answer DOUBLE, -- review -> answer, from status_events
+            PRIMARY KEY (source, cohort)
+        )
+    """)
+
+
+def record_status_events(con, events):
+    """
+    Appends observed transitions in one insert.
+    `events`: iterable of (source, petition_id, from_status, to_status).
+    Returns the number of events stored.
+    """
+    events = [e for e in events if e[2] != e[3]]
+    if not events:
+        return 0
+    init_status_tables(con)
+    source, petition_id, from_status, to_status = (np.array(col, dtype=object) for col in zip(*events))
+    batch = {
+        "source": source,
+        "petition_id": np.array([parse_id(i) for i in petition_id], dtype=np.int64),
+        "from_status": from_status,
+        "to_status": to_status,
+    }
+    before = con.execute("SELECT COUNT(*) FROM status_events").fetchone()[0]
+    con.execute("""
+        INSERT INTO status_events (source, petition_id, from_status, to_status, observed_at)
+        SELECT DISTINCT b.source, b.petition_id, b.from_status, b.to_status, CURRENT_TIMESTAMP
+        FROM batch b
+        LEFT JOIN (
+            SELECT source, petition_id, arg_max(to_status, observed_at) AS latest
+            FROM status_events
+            WHERE (source, petition_id) IN (SELECT source, petition_id FROM batch)
+            GROUP BY ALL
+        ) e ON e.source = b.source AND e.petition_id = b.petition_id
+        WHERE e.latest IS DISTINCT FROM b.to_status
+    """)
+    return con.execute("SELECT COUNT(*) FROM status_events").fetchone()[0] - before
+
+
+def status_transitions(con, petitions):
+    """
+    Events for a batch about to be upserted: `petitions` is a list of
+    records.PetitionRecord (scraper output). Petitions not in the DB yet get
+    an event from NULL. A petition listed twice keeps its last record, as
+    in records.db_batch(). Call before the rows are written.
+    """
+    if not petitions:
+        return []
+    petitions = list({(p.source, p.external_id): p for p in petitions}.values())
+    batch = {
+        "source": np.array([p.source for p in petitions], dtype=object),
+        "petition_id": np.array([parse_id(p.external_id) for p in petitions], dtype=np.int64),
+        "status": np.array([p.status for p in petitions], dtype=object),
+    }
+    return con.execute("""
+        SELECT DISTINCT b.source, b.petition_id, p.status, b.status
+        FROM batch b
+        LEFT JOIN petitions p ON p.source = b.source AND p.external_id = b.petition_id
+        WHERE b.status IS NOT NULL AND p.status IS DISTINCT FROM b.status
+    """).fetchall()
+
+
+def backfill_status_events(con):
+    """
+    Seeds status_events for the time before it existed: the transitions kept
+    as JSON in daily_stats.status_changes (president only), then a NULL ->
+    status event for every petition, dated at its crawl, with its earliest
+    known status. Returns the number of events.
+    """
+    init_status_tables(con)
+    con.execute("DELETE FROM status_events")
+    # The JSON kept the raw scraped statuses
+    con.execute(f"""
+        INSERT INTO status_events
+        SELECT 'president', CAST(c->>'id' AS INTEGER), {status_sql("(c->>'from')")}, {status_sql("(c->>'to')")},
+               CAST(d.date AS TIMESTAMP)
+        FROM daily_stats d, UNNEST(CAST(d.status_changes AS JSON[])) AS t(c)
+        WHERE d.status_changes IS NOT NULL
+          AND (c->>'from') IS DISTINCT FROM (c->>'to')
+    """)
+    con.execute("""
+        INSERT INTO status_events
+        SELECT p.source, p.external_id, NULL,
+               COALESCE(e.first_from, p.status),
+               LEAST(COALESCE(p.crawled_at, e.first_at), COALESCE(e.first_at, p.crawled_at))
+        FROM petitions p
+        LEFT JOIN (
+            SELECT source, petition_id, arg_min(from_status, observed_at) AS first_from,
+                   MIN(observed_at) AS first_at
+            FROM status_events
+            GROUP BY ALL
+        ) e ON e.source = p.source AND e.petition_id = p.external_id
+        WHERE COALESCE(e.first_from, p.status) IS NOT NULL
+    """)
+    return con.execute("SELECT COUNT(*) FROM status_events").fetchone()[0]
+
+
+def refresh_funnel_metrics(con, full=False):
+    """
+    Recomputes funnel_metrics for the cohorts of petitions changed (or with a
+    new status event) since the last refresh; all cohorts if `full` or the
+    first time. Returns the number of cohorts refreshed.
+    """
+    init_status_tables(con)
+    watermark = None if full else get_watermark(con, "funnel_metrics")
+    latest = con.execute("""
+        SELECT GREATEST(
+            (SELECT MAX(COALESCE(updated_at, crawled_at)) FROM petitions),
+            (SELECT MAX(observed_at) FROM status_events)
+        )
+    """).fetchone()[0]
+    if latest is not None and watermark is not None and latest <= watermark:
+        print("   ✅ funnel_metrics up to date.")
+        return 0
+
+    con.execute("""
+        CREATE OR REPLACE TEMP TABLE funnel_cohorts AS
+        SELECT DISTINCT source, strftime(date_normalized, '%Y-%m') AS cohort
+        FROM petitions
+        WHERE date_normalized IS NOT NULL
+          AND (CAST($since AS TIMESTAMP) IS NULL
+               OR COALESCE(updated_at, crawled_at) > $since
+               OR (source, external_id) IN (
+                   SELECT source, petition_id FROM status_events WHERE observed_at > $since
+               ))
+    """, {"since": watermark})
+    con.execute("""
+        DELETE FROM funnel_metrics
+        WHERE (source, cohort) IN (SELECT source, cohort FROM funnel_cohorts)
+    """)
+    con.execute(f"""
+        INSERT INTO funnel_metrics
+        WITH cohort_petitions AS (
+            SELECT p.source, p.external_id AS petition_id, c.cohort, p.date_normalized, p.votes, p.status
+            FROM petitions p
+            JOIN funnel_cohorts c ON c.source = p.source AND c.cohort = strftime(p.date_normalized, '%Y-%m')
+        ),
+        crossings AS (
+            -- read from the intervals: the first day of a run is the first day of its count
+            SELECT v.source, v.petition_id,
+                   MIN(v.valid_from) FILTER (WHERE v.votes >= $threshold) AS crossed_on
+            FROM votes_intervals v
+            JOIN cohort_petitions cp ON cp.source = v.source AND cp.petition_id = v.petition_id
+            GROUP BY ALL
+            -- only crossings the syncs saw happen: tracked below the threshold first
+            HAVING arg_min(v.votes, v.valid_from) < $threshold
+        ),
+        answers AS (
+            SELECT source, petition_id,
+                   MIN(observed_at) FILTER (WHERE to_status = '{IN_REVIEW}') AS review_at,
+                   MIN(observed_at) FILTER (WHERE to_status = '{ANSWERED}') AS answer_at
+            FROM status_events
+            WHERE (source, petition_id) IN (SELECT source, petition_id FROM cohort_petitions)
+            GROUP BY ALL
+        )
+        SELECT cp.source, cp.cohort,
+               COUNT(*),
+               COUNT(*) FILTER (WHERE cp.votes >= $threshold),
+               COUNT(*) FILTER (WHERE cp.status = '{IN_REVIEW}'),
+               COUNT(*) FILTER (WHERE cp.votes >= $threshold AND cp.status = '{ANSWERED}'),
+               ROUND(COUNT(*) FILTER (WHERE cp.votes >= $threshold AND cp.status = '{ANSWERED}')
+                     * 100.0 / NULLIF(COUNT(*) FILTER (WHERE cp.votes >= $threshold), 0), 2),
+               MEDIAN(c.crossed_on - cp.date_normalized),
+               MEDIAN(date_diff('day', a.review_at, a.answer_at)) FILTER (WHERE a.answer_at > a.review_at)
+        FROM cohort_petitions cp
+        LEFT JOIN crossings c ON c.source = cp.source AND c.petition_id = cp.petition_id
+        LEFT JOIN answers a ON a.source = cp.source AND a.petition_id = cp.petition_id
+        GROUP BY cp.source, cp.cohort
+    """, {"threshold": VOTE_THRESHOLD})
+    count = con.execute("SELECT COUNT(*) FROM funnel_cohorts").fetchone()[0]
+    con.execute("DROP TABLE funnel_cohorts")
+    set_watermark(con, "funnel_metrics", latest)
+    print(f"   ✅ funnel_metrics: {count} cohorts refreshed.")
+    return count
+
+
+def recent_status_changes(con, limit=20):
+    """Transitions of the latest day with any (new petitions excluded), newest first."""
+    rows = con.execute("""
+        SELECT e.source, e.petition_id, p.title, p.url, e.from_status, e.to_status, e.observed_at
+        FROM status_events e
+        LEFT JOIN petitions p ON p.source = e.source AND p.external_id = e.petition_id
+        WHERE e.from_status IS NOT NULL
+          AND CAST(e.observed_at AS DATE) = (
+              SELECT MAX(CAST(observed_at AS DATE)) FROM status_events WHERE from_status IS NOT NULL
+          )
+        ORDER BY e.observed_at DESC, e.petition_id
+        LIMIT ?
+    """, [limit]).fetchall()
+    return [{
+        "source": r[0], "id": r[1], "title": r[2], "url": r[3],
+        "from": r[4], "to": r[5], "date": str(r[6].date())
+    } for r in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Status transition events and funnel metrics")
+    parser.add_argument("--backfill", action="store_true", help="Re-seed status_events, then rebuild the funnel")
+    parser.add_argument("--cloud", action="store_true", help="Run against MotherDuck instead of the local DB")
+    args = parser.parse_args()
+
+    if args.cloud:
+        from cloud_sync import get_motherduck_connection
+        con = get_motherduck_connection()
+    else:
+        con = duckdb.connect(DB_FILE)
+
+    try:
+        start = time.time()
+        if args.backfill:
+            count = backfill_status_events(con)
+            print(f"✅ status_events: {count} events seeded.")
+        refresh_funnel_metrics(con, full=args.backfill)
+        print(f"⏱️ {time.time() - start:.2f}s")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
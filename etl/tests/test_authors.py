@@ -0,0 +1,47 @@
+import os
+import sys
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from authors import sync_authors
+from pipeline import init_db, save_to_db
+from records import PetitionRecord
+
+
+def test_rewritten_author_refreshes_both_authors():
+    con = duckdb.connect()
+    init_db(con)
+    con.execute("""
+        INSERT INTO petitions (source, external_id, author, votes) VALUES
+            ('cabinet', 1, 'Іван Петренко', 100), ('cabinet', 2, 'Іван Петренко', 50)
+    """)
+    sync_authors(con)
+
+    # What fix_cabinet_api.py does
+    con.execute("UPDATE petitions SET author = 'Олена Коваль', author_id = NULL WHERE external_id = 2")
+    sync_authors(con)
+
+    assert con.execute("""
+        SELECT a.display_name, s.petitions, s.total_votes
+        FROM author_stats s JOIN authors a USING (author_id) ORDER BY a.display_name
+    """).fetchall() == [("Іван Петренко", 1, 100), ("Олена Коваль", 1, 50)]
+    con.close()
+
+
+def test_listing_upsert_with_a_new_author_refreshes_both_authors():
+    con = duckdb.connect()
+    init_db(con)
+    save_to_db(con, [PetitionRecord("cabinet", 1, author="Іван Петренко", votes=100),
+                     PetitionRecord("cabinet", 2, author="Іван Петренко", votes=50)])
+    sync_authors(con)
+
+    save_to_db(con, [PetitionRecord("cabinet", 2, author="Олена Коваль", votes=50)])
+    sync_authors(con)
+
+    assert con.execute("""
+        SELECT a.display_name, s.petitions, s.total_votes
+        FROM author_stats s JOIN authors a USING (author_id) ORDER BY a.display_name
+    """).fetchall() == [("Іван Петренко", 1, 100), ("Олена Коваль", 1, 50)]
+    con.close()
@@ -0,0 +1,55 @@
+import os
+import sys
+from datetime import date
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import init_db, save_to_db
+from records import PetitionRecord
+from replicate import replicate
+from search import refresh_search_index, search
+from text_store import load_text, store_texts
+from votes_store import record_votes
+
+
+def test_resplit_intervals_replace_the_old_ones(tmp_path):
+    con = duckdb.connect(str(tmp_path / "src.duckdb"))
+    init_db(con)
+    record_votes(con, "2026-01-01", [("president", 1, 100)])
+    record_votes(con, "2026-01-02", [("president", 1, 100)])
+    con.execute(f"ATTACH '{tmp_path / 'dst.duckdb'}' AS dst")
+    replicate(con, "src", "dst", tables=["votes_intervals"])
+
+    # Same-day re-run with another count splits the interval at the source
+    con.execute("USE src")
+    record_votes(con, "2026-01-02", [("president", 1, 120)])
+    replicate(con, "src", "dst", tables=["votes_intervals"])
+
+    assert con.execute("SELECT date, votes FROM dst.votes_history ORDER BY date").fetchall() == [
+        (date(2026, 1, 1), 100), (date(2026, 1, 2), 120)]
+    con.close()
+
+
+def test_pipeline_upserts_and_texts_reach_the_destination(tmp_path):
+    con = duckdb.connect(str(tmp_path / "src.duckdb"))
+    init_db(con)
+    save_to_db(con, [PetitionRecord("president", 1, title="Про тарифи", votes=10),
+                     PetitionRecord("president", 2, title="Про ліси", votes=20)])
+    save_to_db(con, [PetitionRecord("president", 3, title="Про дороги", votes=30)])
+    con.execute(f"ATTACH '{tmp_path / 'dst.duckdb'}' AS dst")
+    replicate(con, "src", "dst")
+
+    con.execute("USE src")
+    save_to_db(con, [PetitionRecord("president", 1, title="Про тарифи", votes=15)])
+    store_texts(con, [("president", 2, "Заборонити вирубку лісів", None)])
+    refresh_search_index(con)
+    replicate(con, "src", "dst")
+
+    assert con.execute("SELECT external_id, votes FROM dst.petitions ORDER BY 1").fetchall() == [
+        (1, 15), (2, 20), (3, 30)]
+    con.execute("USE dst")
+    assert load_text(con, "president", 2)["body"] == "Заборонити вирубку лісів"
+    assert [r["id"] for r in search(con, "вирубка")] == [2]
+    con.close()
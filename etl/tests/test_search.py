@@ -0,0 +1,53 @@
+import os
+import sys
+
+import duckdb
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import init_db
+from search import refresh_search_index, search, tokenize, tokens_sql
+from text_store import store_texts
+
+TEXTS = [
+    "Тарифи на газ для населення",
+    "Присвоїти звання Герой України (посмертно)",
+    "Про в'їзд та м’ясо, ʼєдність і обʼєкти",
+    "İstanbul, ÀÉÎÕÜ та ǅemal",
+    "snake_case, COVID-19, 5G, №22/123-еп, ½ ставки, Ⅻ століття",
+    "   ",
+]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_python_tokenizer_matches_sql(text):
+    con = duckdb.connect()
+    sql = [r[0] for r in con.execute(f"SELECT term FROM ({tokens_sql('CAST($t AS VARCHAR)')})",
+                                     {"t": text}).fetchall()]
+    con.close()
+    assert tokenize(text) == sql
+
+
+def titles(results):
+    return [r["title"] for r in results]
+
+
+def test_bodies_are_indexed_and_reindexed_when_stored_again():
+    con = duckdb.connect()
+    init_db(con)
+    con.execute("""
+        INSERT INTO petitions (source, external_id, title, status) VALUES
+            ('president', 1, 'Про тарифи', 'Архів'), ('president', 2, 'Про ліси', 'Архів')
+    """)
+    store_texts(con, [("president", 1, "Знизити ціни на газ для населення", None)])
+    refresh_search_index(con)
+    assert titles(search(con, "газ")) == ["Про тарифи"]
+    assert titles(search(con, "ліси")) == ["Про ліси"]
+
+    store_texts(con, [("president", 1, "Знизити ціни на електроенергію", None),
+                      ("president", 2, "Заборонити вирубку лісів і продаж газу", None)])
+    refresh_search_index(con)
+    assert titles(search(con, "газ")) == ["Про ліси"]
+    assert titles(search(con, "електроенергія")) == ["Про тарифи"]
+    con.close()
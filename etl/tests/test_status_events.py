@@ -0,0 +1,23 @@
+import os
+import sys
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import init_db, save_to_db
+from records import PetitionRecord
+
+
+def test_petition_listed_twice_gets_one_event():
+    con = duckdb.connect()
+    init_db(con)
+    save_to_db(con, [PetitionRecord("president", 1, status="Триває збір підписів")])
+    save_to_db(con, [PetitionRecord("president", 1, status="На розгляді"),
+                     PetitionRecord("president", 1, status="Архів")])
+
+    assert con.execute("SELECT status FROM petitions").fetchall() == [("Архів",)]
+    assert con.execute("""
+        SELECT from_status, to_status FROM status_events WHERE from_status IS NOT NULL
+    """).fetchall() == [("Триває збір підписів", "Архів")]
+    con.close()
@@ -0,0 +1,111 @@
+import os
+import sys
+from datetime import date
+
+import duckdb
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from votes_store import init_votes_tables, record_votes
+
+
+@pytest.fixture
+def con():
+    con = duckdb.connect()
+    init_votes_tables(con)
+    yield con
+    con.close()
+
+
+def record(con, day, votes):
+    record_votes(con, f"2026-01-{day:02d}", [("president", 1, votes)])
+
+
+def history(con):
+    return con.execute("SELECT date, votes FROM votes_history ORDER BY date").fetchall()
+
+
+def intervals(con):
+    return con.execute("SELECT valid_from, last_seen, votes FROM votes_intervals ORDER BY valid_from").fetchall()
+
+
+def days(*pairs):
+    return [(date(2026, 1, day), votes) for day, votes in pairs]
+
+
+def four_days(con):
+    for day in range(1, 5):
+        record(con, day, 100)
+
+
+def test_unchanged_days_extend_one_interval(con):
+    four_days(con)
+    assert intervals(con) == [(date(2026, 1, 1), date(2026, 1, 4), 100)]
+
+
+def test_rerun_of_first_day_changes_only_that_day(con):
+    four_days(con)
+    record(con, 1, 90)
+    assert history(con) == days((1, 90), (2, 100), (3, 100), (4, 100))
+    assert len(intervals(con)) == 2
+
+
+def test_rerun_of_middle_day_changes_only_that_day(con):
+    four_days(con)
+    record(con, 2, 90)
+    assert history(con) == days((1, 100), (2, 90), (3, 100), (4, 100))
+    assert len(intervals(con)) == 3
+
+
+def test_rerun_of_last_day_changes_only_that_day(con):
+    four_days(con)
+    record(con, 4, 120)
+    assert history(con) == days((1, 100), (2, 100), (3, 100), (4, 120))
+    assert intervals(con) == [(date(2026, 1, 1), date(2026, 1, 3), 100), (date(2026, 1, 4), date(2026, 1, 4), 120)]
+
+
+def test_same_day_twice_keeps_the_last_count(con):
+    record(con, 1, 100)
+    record(con, 2, 110)
+    record(con, 2, 120)
+    record(con, 2, 130)
+    assert history(con) == days((1, 100), (2, 130))
+
+
+def test_backfill_of_an_earlier_day(con):
+    record(con, 3, 100)
+    record(con, 4, 100)
+    record(con, 1, 80)
+    record(con, 2, 100)
+    assert history(con) == days((1, 80), (2, 100), (3, 100), (4, 100))
+    assert intervals(con) == [(date(2026, 1, 1), date(2026, 1, 1), 80), (date(2026, 1, 2), date(2026, 1, 4), 100)]
+
+
+def test_unsynced_days_are_not_filled(con):
+    record(con, 1, 100)
+    record(con, 5, 100)
+    assert history(con) == days((1, 100), (5, 100))
+    assert intervals(con) == [(date(2026, 1, 1), date(2026, 1, 1), 100), (date(2026, 1, 5), date(2026, 1, 5), 100)]
+
+
+def test_backfill_into_a_gap_joins_the_intervals(con):
+    record(con, 1, 100)
+    record(con, 3, 100)
+    record(con, 2, 100)
+    assert history(con) == days((1, 100), (2, 100), (3, 100))
+    assert intervals(con) == [(date(2026, 1, 1), date(2026, 1, 3), 100)]
+
+
+def test_legacy_table_keeps_its_gaps():
+    con = duckdb.connect()
+    con.execute("""
+        CREATE TABLE votes_history (petition_id VARCHAR, source VARCHAR, date DATE, votes INTEGER,
+                                    PRIMARY KEY (petition_id, source, date))
+    """)
+    con.executemany("INSERT INTO votes_history VALUES ('1', 'president', ?, ?)",
+                    [(f"2026-01-{day:02d}", votes) for day, votes in ((1, 100), (2, 100), (5, 100), (6, 120))])
+    init_votes_tables(con)
+    assert history(con) == days((1, 100), (2, 100), (5, 100), (6, 120))
+    assert len(intervals(con)) == 3
+    con.close()
@@ -0,0 +1,328 @@
+"""
+Compressed storage for petition bodies and answers.
+
+The scrapers see the full text of every petition (and the official answer,
+once there is one) but `petitions` only keeps `text_length`. The texts live
+in a separate table so `petitions` stays narrow and fast to scan:
+
+    petition_texts  - source, petition_id, body / answer as zstd frames (BLOB),
+                      raw lengths, crc32 of the raw texts, dict_id
+    text_dicts      - zstd dictionaries, trained on stored texts
+
+Petitions are short and share a lot of boilerplate ("Шановний пане
+Президенте", "Прошу присвоїти звання ..."), which a trained dictionary
+captures: each text is compressed on its own (random access, no shared
+frames) but still gets most of the ratio of compressing them together.
+Texts stored before the first dictionary exists use dict_id 0 (plain zstd);
+the first dictionary is trained automatically once TRAIN_MIN_TEXTS texts are
+stored, and everything is recompressed with it.
+
+Reads are lazy: only the requested columns of the requested rows are
+fetched, and frames are decompressed as rows are consumed.
+
+Usage:
+    python text_store.py --stats             # Compression ratio (local DB)
+    python text_store.py --bench             # Bulk decompress throughput
+    python text_store.py --train             # Retrain the dictionary + recompress
+    python text_store.py --show president 123456
+    python text_store.py --cloud ...         # Same, against MotherDuck
+"""
+
+import os
+import sys
+import time
+import zlib
+import argparse
+
+import duckdb
+import numpy as np
+import zstandard
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from typed_schema import SOURCE_TYPE, init_types, parse_id
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(BASE_DIR, 'petitions.duckdb')
+
+ZSTD_LEVEL = 12
+DICT_SIZE = 64 * 1024
+# Texts needed before the first dictionary is trained / samples used to train
+TRAIN_MIN_TEXTS = 500
+TRAIN_SAMPLES = 20000
+NO_DICT = 0
+
+
+def init_text_tables(con):
+    """Creates the text tables if they don't exist."""
+    init_types(con)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS text_dicts (
+            dict_id INTEGER PRIMARY KEY,
+            trained_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            samples INTEGER,
+            dict_data BLOB
+        )
+    """)
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS petition_texts (
+            source {SOURCE_TYPE},
+            petition_id INTEGER,
+            dict_id INTEGER,
+            body BLOB,
+            body_len INTEGER,
+            answer BLOB,
+            answer_len INTEGER,
+            checksum UBIGINT,
+            stored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (source, petition_id)
+        )
+    """)
+
+
+def _dictionary(con, dict_id):
+    if dict_id == NO_DICT:
+        return None
+    data = con.execute("SELECT dict_data FROM text_dicts WHERE dict_id = ?", [dict_id]).fetchone()[0]
+    return zstandard.ZstdCompressionDict(data)
+
+
+def _compressor(con, dict_id):
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=_dictionary(con, dict_id))
+
+
+def current_dict_id(con):
+    return con.execute("SELECT COALESCE(MAX(dict_id), ?) FROM text_dicts", [NO_DICT]).fetchone()[0]
+
+
+def html_to_text(content):
+    """Cabinet API `content` is HTML; keep the text, one block per line."""
+    if not content:
+        return None
+    if "<" not in content:
+        return content.strip() or None
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(content, 'html.parser').get_text("\n", strip=True) or None
+
+
+def text_checksum(body, answer):
+    return zlib.crc32(f"{body or ''}\x00{answer or ''}".encode('utf-8'))
+
+
+def _compress(compressor, text):
+    if not text:
+        return None, 0
+    raw = text.encode('utf-8')
+    return compressor.compress(raw), len(raw)
+
+
+def _write_rows(con, batch):
+    """
+    Bulk upsert of (source, petition_id, dict_id, body, body_len, answer,
+    answer_len, checksum) tuples. The rows are handed to DuckDB as NumPy
+    columns; frames travel hex-encoded because an object array of bytes
+    would be scanned as VARCHAR. stored_at only moves when the texts change
+    (not on a recompression), so search.py re-indexes changed bodies only.
+    """
+    if not batch:
+        return
+    columns = list(zip(*batch))
+    text_rows = {
+        "source": np.array(columns[0], dtype=object),
+        "petition_id": np.array([parse_id(i) for i in columns[1]], dtype=np.int64),
+        "dict_id": np.array(columns[2], dtype=np.int32),
+        "body": np.array([b.hex() if b is not None else None for b in columns[3]], dtype=object),
+        "body_len": np.array(columns[4], dtype=np.int32),
+        "answer": np.array([b.hex() if b is not None else None for b in columns[5]], dtype=object),
+        "answer_len": np.array(columns[6], dtype=np.int32),
+        "checksum": np.array(columns[7], dtype=np.uint64),
+    }
+    con.execute("""
+        INSERT OR REPLACE INTO petition_texts
+            (source, petition_id, dict_id, body, body_len, answer, answer_len, checksum, stored_at)
+        SELECT r.source, r.petition_id, r.dict_id, unhex(r.body), r.body_len, unhex(r.answer), r.answer_len,
+               r.checksum, COALESCE(t.stored_at, CURRENT_TIMESTAMP)
+        FROM text_rows r
+        LEFT JOIN petition_texts t
+               ON t.source = r.source AND t.petition_id = r.petition_id AND t.checksum = r.checksum
+    """)
+
+
+def store_texts(con, rows):
+    """
+    Upserts [(source, petition_id, body, answer)]. Rows whose texts did not
+    change since they were stored (same crc32) are skipped. Returns the number
+    of rows written.
+    """
+    init_text_tables(con)
+    rows = [r for r in rows if r[2] or r[3]]
+    if not rows:
+        return 0
+
+    keys = [f"{r[0]}:{r[1]}" for r in rows]
+    stored = dict(con.execute("""
+        SELECT source || ':' || petition_id, checksum FROM petition_texts
+        WHERE list_contains(?, source || ':' || petition_id)
+    """, [keys]).fetchall())
+
+    dict_id = current_dict_id(con)
+    compressor = _compressor(con, dict_id)
+    batch = []
+    for key, (source, petition_id, body, answer) in zip(keys, rows):
+        checksum = text_checksum(body, answer)
+        if stored.get(key) == checksum:
+            continue
+        body_z, body_len = _compress(compressor, body)
+        answer_z, answer_len = _compress(compressor, answer)
+        batch.append((source, petition_id, dict_id, body_z, body_len, answer_z, answer_len, checksum))
+
+    _write_rows(con, batch)
+
+    if dict_id == NO_DICT and con.execute("SELECT COUNT(*) FROM petition_texts").fetchone()[0] >= TRAIN_MIN_TEXTS:
+        train_dictionary(con)
+    return len(batch)
+
+
+def iter_texts(con, source=None, ids=None, columns=("body", "answer"), batch_size=1000):
+    """
+    Yields {"source", "id", <columns>} with decompressed texts, reading and
+    decompressing `batch_size` rows at a time. Only `columns` are fetched.
+    """
+    filters, params = [], []
+    if source:
+        filters.append("source = ?")
+        params.append(source)
+    if ids is not None:
+        filters.append("list_contains(?, petition_id)")
+        params.append([parse_id(i) for i in ids])
+    where = ("WHERE " + " AND ".join(filters)) if filters else ""
+    blobs = ", ".join(columns)
+
+    decompressors = {}
+    cursor = con.cursor()
+    cursor.execute(f"SELECT source, petition_id, dict_id, {blobs} FROM petition_texts {where}", params)
+    while True:
+        chunk = cursor.fetchmany(batch_size)
+        if not chunk:
+            break
+        for row in chunk:
+            if row[2] not in decompressors:
+                decompressors[row[2]] = zstandard.ZstdDecompressor(dict_data=_dictionary(con, row[2]))
+            decompressor = decompressors[row[2]]
+            item = {"source": row[0], "id": row[1]}
+            for name, blob in zip(columns, row[3:]):
+                item[name] = decompressor.decompress(blob).decode('utf-8') if blob is not None else None
+            yield item
+    cursor.close()
+
+
+def load_text(con, source, petition_id):
+    """Body and answer of one petition, or None if not stored."""
+    return next(iter_texts(con, source=source, ids=[petition_id]), None)
+
+
+def train_dictionary(con, samples=TRAIN_SAMPLES):
+    """
+    Trains a new dictionary on a sample of the stored texts and recompresses
+    every row with it. Returns the new dict_id.
+    """
+    init_text_tables(con)
+    texts = [t for item in iter_texts(con) for t in (item["body"], item["answer"]) if t]
+    if len(texts) > samples:
+        step = len(texts) / samples
+        texts = [texts[int(i * step)] for i in range(samples)]
+    if not texts:
+        return current_dict_id(con)
+
+    dictionary = zstandard.train_dictionary(DICT_SIZE, [t.encode('utf-8') for t in texts], level=ZSTD_LEVEL)
+    dict_id = current_dict_id(con) + 1
+    con.execute("INSERT INTO text_dicts (dict_id, samples, dict_data) VALUES (?, ?, ?)",
+                [dict_id, len(texts), dictionary.as_bytes()])
+
+    # Recompress everything with the new dictionary
+    compressor = _compressor(con, dict_id)
+    batch = []
+    for item in iter_texts(con):
+        body_z, body_len = _compress(compressor, item["body"])
+        answer_z, answer_len = _compress(compressor, item["answer"])
+        checksum = text_checksum(item["body"], item["answer"])
+        batch.append((item["source"], item["id"], dict_id, body_z, body_len, answer_z, answer_len, checksum))
+    _write_rows(con, batch)
+    con.execute("DELETE FROM text_dicts WHERE dict_id NOT IN (SELECT DISTINCT dict_id FROM petition_texts)")
+    print(f"   ✅ zstd dictionary #{dict_id} trained on {len(texts)} texts, {len(batch)} rows recompressed.")
+    return dict_id
+
+
+def storage_stats(con):
+    """Raw vs stored bytes of the texts (dictionary size included in stored)."""
+    row = con.execute("""
+        SELECT COUNT(*), COUNT(answer),
+               COALESCE(SUM(body_len), 0) + COALESCE(SUM(answer_len), 0),
+               COALESCE(SUM(octet_length(body)), 0) + COALESCE(SUM(octet_length(answer)), 0)
+        FROM petition_texts
+    """).fetchone()
+    dict_bytes = con.execute("SELECT COALESCE(SUM(octet_length(dict_data)), 0) FROM text_dicts").fetchone()[0]
+    stored = row[3] + dict_bytes
+    return {
+        "texts": row[0], "answers": row[1], "raw_bytes": row[2],
+        "stored_bytes": stored, "dict_bytes": dict_bytes,
+        "ratio": round(row[2] / stored, 2) if stored else None,
+    }
+
+
+def bench_decompress(con):
+    """Decompresses every stored text once; returns (texts, raw MB, seconds)."""
+    start = time.perf_counter()
+    count, raw = 0, 0
+    for item in iter_texts(con, batch_size=10000):
+        for text in (item["body"], item["answer"]):
+            if text:
+                count += 1
+                raw += len(text.encode('utf-8'))
+    return count, raw / 1024 / 1024, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compressed petition texts (zstd + trained dictionary)")
+    parser.add_argument("--stats", action="store_true", help="Print the compression ratio")
+    parser.add_argument("--bench", action="store_true", help="Measure bulk decompress throughput")
+    parser.add_argument("--train", action="store_true", help="Retrain the dictionary and recompress all texts")
+    parser.add_argument("--show", nargs=2, metavar=("SOURCE", "ID"), help="Print one petition's texts")
+    parser.add_argument("--cloud", action="store_true", help="Run against MotherDuck instead of the local DB")
+    args = parser.parse_args()
+
+    if args.cloud:
+        from cloud_sync import get_motherduck_connection
+        con = get_motherduck_connection()
+    else:
+        con = duckdb.connect(DB_FILE)
+
+    try:
+        init_text_tables(con)
+        if args.train:
+            start = time.time()
+            train_dictionary(con)
+            print(f"⏱️ {time.time() - start:.2f}s")
+        if args.stats or not (args.train or args.bench or args.show):
+            s = storage_stats(con)
+            print(f"🗜️ {s['texts']:,} petitions ({s['answers']:,} with answers): "
+                  f"{s['raw_bytes'] / 1024 / 1024:.1f} MB raw -> {s['stored_bytes'] / 1024 / 1024:.1f} MB stored "
+                  f"(ratio {s['ratio']}, dictionary {s['dict_bytes'] / 1024:.0f} KB)")
+        if args.bench:
+            count, mb, seconds = bench_decompress(con)
+            print(f"⚡ Decompressed {count:,} texts ({mb:.1f} MB) in {seconds:.2f}s "
+                  f"= {mb / seconds if seconds else 0:.0f} MB/s, {count / seconds if seconds else 0:,.0f} texts/s")
+        if args.show:
+            item = load_text(con, args.show[0], args.show[1])
+            if not item:
+                print("❌ No stored text for this petition.")
+            else:
+                print(item["body"])
+                if item["answer"]:
+                    print("\n--- Відповідь ---\n" + item["answer"])
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
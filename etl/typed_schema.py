@@ -0,0 +1,309 @@
+"""
+Typed keys and statuses.
+
+`source`, `status` and the petition ids used to be VARCHAR everywhere: every
+status filter and every join between petitions, votes_intervals and the
+rollups compared multi-byte strings, and the Cabinet API's English statuses
+were only mapped onto the President site's Ukrainian ones at export time
+(a CASE in pipeline.py). Now:
+
+    petition_source  ENUM of SOURCES
+    petition_status  ENUM of STATUSES (the President site's wording)
+    petition ids     INTEGER (petitions.external_id and every petition_id)
+
+The scrapers normalize at ingest: normalize_status() maps Cabinet API and
+listing-page values onto STATUSES, parse_id() turns the id into an int.
+
+migrate_typed_schema() converts an existing database table by table; it is
+step 4 of migrations.py. Columns of tables without keys or indexes are
+altered in place, in one transaction per table; the others are rewritten
+from their own DDL with the new column types (migrations.rewrite_table) and
+swapped in, so readers keep seeing the old table until then. Views are
+recreated at the end. Converted tables are skipped, so an interrupted run
+can simply be restarted.
+
+Usage:
+    python typed_schema.py               # Columns still to convert (local DB)
+    python typed_schema.py --cloud       # Same, against MotherDuck
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+
+import duckdb
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from migrations import index_sql, rewrite_table
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(BASE_DIR, 'petitions.duckdb')
+
+SOURCE_TYPE = "petition_source"
+STATUS_TYPE = "petition_status"
+
+# Alphabetical, so ORDER BY source keeps the order it had as VARCHAR
+SOURCES = ("cabinet", "president")
+
+ACTIVE = "Триває збір підписів"
+IN_REVIEW = "На розгляді"
+ANSWERED = "З відповіддю"
+ARCHIVED = "Архів"
+UNKNOWN = "Unknown"
+NOT_FOUND = "Not Found"
+STATUSES = (ACTIVE, IN_REVIEW, ANSWERED, ARCHIVED, UNKNOWN, NOT_FOUND)
+
+# Exact values seen from the Cabinet API, the listing filters and older scrapers
+STATUS_ALIASES = {
+    "Supported": ACTIVE,
+    "Approved": IN_REVIEW,
+    "Answered": ANSWERED,
+    "Unsupported": ARCHIVED,
+    "Не підтримано": ARCHIVED,
+    "Розглянуто": ANSWERED,
+    "active": ACTIVE,
+    "in_process": IN_REVIEW,
+    "processing": IN_REVIEW,
+    "processed": ANSWERED,
+    "answered": ANSWERED,
+    "archive": ARCHIVED,
+    "Archive": ARCHIVED,
+}
+# Substrings of longer status texts, checked in order (same as scraper_detail.extract_status)
+STATUS_PHRASES = (
+    ("Триває збір", ACTIVE),
+    ("Очікує на розгляд", IN_REVIEW),
+    ("На розгляді", IN_REVIEW),
+    ("З відповіддю", ANSWERED),
+    ("Розглянуто", ANSWERED),
+    ("Архів", ARCHIVED),
+    ("Збір підписів завершено", ARCHIVED),
+    ("Не підтриман", ARCHIVED),
+)
+
+# Columns converted by migrate_typed_schema(), per table
+TYPED_COLUMNS = {
+    "petitions": {"source": SOURCE_TYPE, "external_id": "INTEGER", "status": STATUS_TYPE},
+    "votes_intervals": {"petition_id": "INTEGER", "source": SOURCE_TYPE},
+    "status_events": {"source": SOURCE_TYPE, "petition_id": "INTEGER",
+                      "from_status": STATUS_TYPE, "to_status": STATUS_TYPE},
+    "daily_source_deltas": {"source": SOURCE_TYPE},
+    "petition_metrics": {"petition_id": "INTEGER", "source": SOURCE_TYPE},
+    "scatter_sample": {"petition_id": "INTEGER", "source": SOURCE_TYPE},
+    "petition_forecasts": {"source": SOURCE_TYPE, "petition_id": "INTEGER"},
+    "vote_stats": {"source": SOURCE_TYPE, "petition_id": "INTEGER"},
+    "anomalies": {"source": SOURCE_TYPE, "petition_id": "INTEGER"},
+    "funnel_metrics": {"source": SOURCE_TYPE},
+    "author_stats": {"source": SOURCE_TYPE},
+    "dedup_docs": {"source": SOURCE_TYPE, "petition_id": "INTEGER"},
+    "dedup_lsh": {"source": SOURCE_TYPE, "petition_id": "INTEGER"},
+    "search_docs": {"source": SOURCE_TYPE, "petition_id": "INTEGER"},
+    "search_postings": {"source": SOURCE_TYPE, "petition_id": "INTEGER", "status": STATUS_TYPE},
+    "petition_texts": {"source": SOURCE_TYPE, "petition_id": "INTEGER"},
+}
+
+
+def _enum_sql(values):
+    return ", ".join("'" + v + "'" for v in values)
+
+
+def init_types(con):
+    """Creates the ENUM types if they don't exist (call before creating tables that use them)."""
+    con.execute(f"CREATE TYPE IF NOT EXISTS {SOURCE_TYPE} AS ENUM ({_enum_sql(SOURCES)})")
+    con.execute(f"CREATE TYPE IF NOT EXISTS {STATUS_TYPE} AS ENUM ({_enum_sql(STATUSES)})")
+
+
+def normalize_status(raw):
+    """Canonical status (one of STATUSES) of a scraped/API status, None if there is none."""
+    if raw is None:
+        return None
+    text = str(raw).strip()
+    if not text:
+        return None
+    if text in STATUSES:
+        return text
+    if text in STATUS_ALIASES:
+        return STATUS_ALIASES[text]
+    for phrase, status in STATUS_PHRASES:
+        if phrase in text:
+            return status
+    return UNKNOWN
+
+
+def parse_id(raw):
+    """Petition id as an int (ids are numeric on both portals)."""
+    return int(str(raw).strip())
+
+
+def use_type_names(ddl):
+    """DuckDB prints ENUM columns inline in a table's DDL; puts the type names back."""
+    for name, values in ((SOURCE_TYPE, SOURCES), (STATUS_TYPE, STATUSES)):
+        ddl = ddl.replace(f"ENUM({_enum_sql(values)})", name)
+    return ddl
+
+
+def status_sql(column):
+    """SQL mapping a VARCHAR status column onto STATUSES (what normalize_status does, minus phrases)."""
+    whens = " ".join(f"WHEN {column} = '{raw}' THEN '{status}'" for raw, status in STATUS_ALIASES.items())
+    return (f"CASE WHEN {column} IS NULL THEN NULL WHEN {column} IN ({_enum_sql(STATUSES)}) THEN {column} "
+            f"{whens} ELSE '{UNKNOWN}' END")
+
+
+def _columns(con, table):
+    """[(name, data_type)] of a base table in the current database, [] if it does not exist."""
+    return con.execute("""
+        SELECT c.column_name, c.data_type
+        FROM information_schema.columns c
+        JOIN information_schema.tables t USING (table_catalog, table_schema, table_name)
+        WHERE c.table_name = ? AND c.table_catalog = current_database() AND c.table_schema = current_schema()
+          AND t.table_type = 'BASE TABLE'
+        ORDER BY c.ordinal_position
+    """, [table]).fetchall()
+
+
+def _is_typed(data_type, target):
+    if target == "INTEGER":
+        return data_type == "INTEGER"
+    return data_type.startswith("ENUM")
+
+
+def pending_columns(con):
+    """{table: {column: type}} of the TYPED_COLUMNS not converted yet."""
+    pending = {}
+    for table, targets in TYPED_COLUMNS.items():
+        types = dict(_columns(con, table))
+        todo = {c: t for c, t in targets.items() if c in types and not _is_typed(types[c], t)}
+        if todo:
+            pending[table] = todo
+    return pending
+
+
+def _convert_sql(column, target, cast="CAST"):
+    quoted = f'"{column}"'
+    if target == STATUS_TYPE:
+        return f"CAST({status_sql(quoted)} AS {STATUS_TYPE})"
+    return f"{cast}({quoted} AS {target})"
+
+
+def _check_values(con, table, columns):
+    """Raises ValueError if a value would not survive the conversion (non-numeric id, unknown source)."""
+    for column, target in columns.items():
+        if target == "INTEGER":
+            bad = con.execute(f"""
+                SELECT DISTINCT "{column}" FROM {table}
+                WHERE "{column}" IS NOT NULL AND TRY_CAST("{column}" AS INTEGER) IS NULL LIMIT 5
+            """).fetchall()
+        elif target == SOURCE_TYPE:
+            bad = con.execute(f"""
+                SELECT DISTINCT "{column}" FROM {table}
+                WHERE "{column}" IS NOT NULL AND "{column}" NOT IN ({_enum_sql(SOURCES)}) LIMIT 5
+            """).fetchall()
+        else:
+            continue
+        if bad:
+            raise ValueError(f"{table}.{column}: values that cannot become {target}: {[r[0] for r in bad]}")
+
+
+def _needs_rebuild(con, table):
+    """Keys and indexes pin the column types, so such tables are rewritten instead of altered."""
+    keys = con.execute("""
+        SELECT COUNT(*) FROM duckdb_constraints()
+        WHERE table_name = ? AND database_name = current_database() AND schema_name = current_schema()
+          AND constraint_type IN ('PRIMARY KEY', 'UNIQUE')
+    """, [table]).fetchone()[0]
+    return keys > 0 or bool(index_sql(con, table))
+
+
+def _typed_ddl(con, table, columns, new_name):
+    """The table's CREATE TABLE statement with the new column types, under `new_name`."""
+    ddl = con.execute("""
+        SELECT sql FROM duckdb_tables()
+        WHERE table_name = ? AND database_name = current_database() AND schema_name = current_schema()
+    """, [table]).fetchone()[0]
+    ddl = re.sub(rf'^CREATE TABLE "?{table}"?\(', f"CREATE TABLE {new_name}(", ddl)
+    for column, target in columns.items():
+        ddl, found = re.subn(rf'([(,]\s*"?{column}"?) VARCHAR\b', rf"\1 {target}", ddl)
+        if not found:
+            raise ValueError(f"{table}.{column}: column not found in {ddl}")
+    return ddl
+
+
+def _convert_table(con, table, columns):
+    """Converts `columns` of one table. Returns (number of rows, whether it was rewritten)."""
+    if _needs_rebuild(con, table):
+        select = ", ".join(_convert_sql(c, columns[c]) if c in columns else f'"{c}"'
+                           for c, _ in _columns(con, table))
+        return rewrite_table(con, table, _typed_ddl(con, table, columns, f"{table}__new"), select), True
+
+    con.execute("BEGIN TRANSACTION")
+    try:
+        # ALTER also converts deleted rows still in storage; the live
+        # values were checked already, so those may just become NULL
+        for column, target in columns.items():
+            con.execute(f'ALTER TABLE {table} ALTER COLUMN "{column}" '
+                        f'TYPE {target} USING {_convert_sql(column, target, "TRY_CAST")}')
+        rows = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return rows, False
+
+
+def _refresh_views(con):
+    """Views are bound to the column types they were created with; re-create them."""
+    for name, sql in con.execute("""
+        SELECT view_name, sql FROM duckdb_views()
+        WHERE NOT internal AND NOT temporary
+          AND database_name = current_database() AND schema_name = current_schema()
+    """).fetchall():
+        con.execute(re.sub(r"^CREATE VIEW", "CREATE OR REPLACE VIEW", sql))
+
+
+def migrate_typed_schema(con):
+    """
+    Converts every pending TYPED_COLUMNS column, one table per transaction.
+    All values are checked first, so a bad id stops the run before any table
+    is touched. Returns the number of tables converted.
+    """
+    init_types(con)
+    pending = pending_columns(con)
+    if not pending:
+        return 0
+    for table, columns in pending.items():
+        _check_values(con, table, columns)
+
+    for table, columns in pending.items():
+        start = time.time()
+        rows, rewritten = _convert_table(con, table, columns)
+        how = "rewritten" if rewritten else "altered"
+        print(f"   ✅ {table}: {', '.join(columns)} {how} ({rows:,} rows, {time.time() - start:.1f}s)")
+    _refresh_views(con)
+    return len(pending)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ENUM source/status and integer petition ids")
+    parser.add_argument("--cloud", action="store_true", help="Run against MotherDuck instead of the local DB")
+    args = parser.parse_args()
+
+    if args.cloud:
+        from cloud_sync import get_motherduck_connection
+        con = get_motherduck_connection()
+    else:
+        con = duckdb.connect(DB_FILE)
+
+    try:
+        pending = pending_columns(con)
+        for table, columns in pending.items():
+            print(f"   {table}: {', '.join(f'{c} -> {t}' for c, t in columns.items())}")
+        print(f"{len(pending)} tables to convert (python migrations.py)" if pending else "✅ Schema is typed.")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
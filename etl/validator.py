@@ -6,6 +6,7 @@ Used by cloud_sync.py to ensure data quality before and after sync.
 import duckdb
 import random
 from scraper_detail import fetch_petition_detail
+from records import FetchError
 
 
 class ValidationResult:
@@ -62,7 +63,7 @@ def get_dynamic_markers(con):
     answered = con.execute("""
         SELECT external_id, votes, status 
         FROM petitions 
-        WHERE (status = 'З відповіддю' OR status = 'Розглянуто') AND source = 'president'
+        WHERE status = 'З відповіддю' AND source = 'president'
         LIMIT 1
     """).fetchone()
 
@@ -96,21 +97,21 @@ def run_preflight_check(con, session=None, verbose=True):
         pet_id = marker["id"]
         data = fetch_petition_detail(pet_id, session=session)
         
-        if not data or "error" in data:
+        if not data or isinstance(data, FetchError):
             result.add_warning(f"Petition {pet_id} ({marker['type']}): Failed to fetch (404/Timeout)")
             failed_count += 1
             continue
         
         # Validation Logic:
         # 1. Status must be recognized
-        status = data.get("status", "Unknown")
+        status = data.status or "Unknown"
         if status == "Unknown":
             result.add_error(f"Petition {pet_id}: Scraper returned 'Unknown' status")
             failed_count += 1
             continue
             
         # 2. Votes should not drop significantly (unless it's some rare site error)
-        new_votes = data.get("votes", 0)
+        new_votes = data.votes or 0
         db_votes = marker["db_votes"]
         if new_votes < db_votes * 0.95: # Allow 5% margin for rare edge cases / re-counts
             result.add_error(f"Petition {pet_id}: Votes dropped significantly! DB: {db_votes}, Web: {new_votes}")
@@ -118,7 +119,7 @@ def run_preflight_check(con, session=None, verbose=True):
             continue
             
         # 3. Text length should be > 0
-        if data.get("text_length", 0) == 0:
+        if not data.text_length:
             result.add_error(f"Petition {pet_id}: Scraper returned text_length = 0")
             failed_count += 1
             continue
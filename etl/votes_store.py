@@ -0,0 +1,312 @@
+"""
+Change-only storage of the daily vote counts.
+
+`votes_history` used to hold one row per petition per synced day, even when
+the count did not move (every Cabinet petition, every day). The counts now
+live in `votes_intervals`, one row per run of consecutive synced days with
+the same count:
+
+    (petition_id, source, valid_from, last_seen, votes)
+
+`last_seen` is the last day the petition was synced with that count, so an
+unchanged petition costs an in-place update instead of a new row, and a
+petition that stopped being tracked stops there. Days that were never synced
+are never covered: a petition synced again after a gap starts a new interval,
+even with the same count.
+
+`votes_history` is now a view expanding the intervals back to one row per
+(petition, day) with the old columns, so existing readers keep working.
+Readers of a date range should use the `votes_between(from, to)` table macro
+instead: it skips the intervals outside the range before expanding them.
+
+Writers call record_votes() once per batch instead of inserting rows.
+
+Usage:
+    python votes_store.py --migrate            # Convert a legacy votes_history table (local DB)
+    python votes_store.py --stats              # Rows stored vs daily points
+    python votes_store.py --cloud ...          # Same, against MotherDuck
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import duckdb
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from typed_schema import SOURCE_TYPE, init_types, parse_id
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(BASE_DIR, 'petitions.duckdb')
+
+EXPAND_SQL = """
+    SELECT i.petition_id, i.source, i.start_day + CAST(k AS INTEGER) AS date, i.votes
+    FROM (
+        SELECT petition_id, source, votes,
+               {start} AS start_day,
+               {end} AS end_day
+        FROM votes_intervals
+        {where}
+    ) i, UNNEST(range(0, i.end_day - i.start_day + 1)) AS r(k)
+"""
+
+VIEW_SQL = EXPAND_SQL.format(start="valid_from", end="last_seen", where="")
+
+# Run number of each synced day, ordered by date: a run ends where the count
+# changes or the previous day was not synced (needs `prev` and `prev_date`)
+RUN_SQL = """
+    SUM(CASE WHEN votes IS NOT DISTINCT FROM prev AND date = prev_date + 1 THEN 0 ELSE 1 END)
+        OVER (PARTITION BY petition_id, source ORDER BY date)
+"""
+
+MACRO_SQL = EXPAND_SQL.format(
+    start="GREATEST(valid_from, CAST(date_from AS DATE))",
+    end="LEAST(last_seen, CAST(date_to AS DATE))",
+    where="WHERE valid_from <= CAST(date_to AS DATE) AND last_seen >= CAST(date_from AS DATE)",
+)
+
+
+def _table_type(con, name):
+    row = con.execute("""
+        SELECT table_type FROM information_schema.tables
+        WHERE table_name = ? AND table_catalog = current_database() AND table_schema = current_schema()
+    """, [name]).fetchone()
+    return row[0] if row else None
+
+
+def init_votes_tables(con):
+    """
+    Creates votes_intervals, the votes_history view and the votes_between()
+    macro. A legacy votes_history table is migrated first.
+    """
+    init_types(con)
+    if _table_type(con, "votes_history") == "BASE TABLE":
+        migrate_votes_history(con)
+        return
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS votes_intervals (
+            petition_id INTEGER,
+            source {SOURCE_TYPE},
+            valid_from DATE,             -- first day with this count
+            last_seen DATE,              -- last synced day with this count
+            votes INTEGER,
+            PRIMARY KEY (petition_id, source, valid_from)
+        )
+    """)
+    if _table_type(con, "votes_history") is None:
+        con.execute(f"CREATE VIEW votes_history AS {VIEW_SQL}")
+    con.execute(f"CREATE OR REPLACE MACRO votes_between(date_from, date_to) AS TABLE {MACRO_SQL}")
+
+
+def migrate_votes_history(con):
+    """
+    Collapses a legacy votes_history table (one row per day) into
+    votes_intervals and replaces it with the expanding view.
+    Returns (daily rows before, interval rows after).
+    """
+    start = time.time()
+    before = con.execute("SELECT COUNT(*) FROM votes_history").fetchone()[0]
+    con.execute("BEGIN TRANSACTION")
+    try:
+        _collapse_legacy_table(con)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    after = con.execute("SELECT COUNT(*) FROM votes_intervals").fetchone()[0]
+    print(f"   ✅ votes_history migrated: {before:,} daily rows -> {after:,} intervals "
+          f"({time.time() - start:.1f}s)")
+    return before, after
+
+
+def _collapse_legacy_table(con):
+    con.execute("DROP TABLE IF EXISTS votes_intervals")
+    con.execute(f"""
+        CREATE TABLE votes_intervals (
+            petition_id INTEGER,
+            source {SOURCE_TYPE},
+            valid_from DATE,
+            last_seen DATE,
+            votes INTEGER,
+            PRIMARY KEY (petition_id, source, valid_from)
+        )
+    """)
+    # A new interval starts wherever the count differs from the previous synced day
+    # or a day was not synced
+    con.execute(f"""
+        INSERT INTO votes_intervals
+        SELECT CAST(petition_id AS INTEGER), source, MIN(date), MAX(date), ANY_VALUE(votes)
+        FROM (
+            SELECT *, {RUN_SQL} AS run
+            FROM (
+                SELECT petition_id, source, date, votes,
+                       LAG(votes) OVER (PARTITION BY petition_id, source ORDER BY date) AS prev,
+                       LAG(date) OVER (PARTITION BY petition_id, source ORDER BY date) AS prev_date
+                FROM votes_history
+            )
+        )
+        GROUP BY petition_id, source, run
+        ORDER BY source, petition_id, MIN(date)
+    """)
+    con.execute("DROP TABLE votes_history")
+    init_votes_tables(con)
+
+
+def record_votes(con, day, rows):
+    """
+    Records the counts synced on `day`: rows of (source, petition_id, votes).
+    Same semantics as the old upsert into votes_history (a re-run of the day
+    overwrites its count, and only that day's), in a handful of set-based
+    statements. An unchanged count extends the latest interval only from the
+    day after its last_seen: after a gap it starts a new one. A re-run of the first or a middle day of a longer interval
+    goes through _rewrite_days().
+    """
+    rows = [r for r in rows if r[2] is not None]
+    if not rows:
+        return 0
+    init_votes_tables(con)
+    batch = {
+        "source": np.array([r[0] for r in rows], dtype=object),
+        "petition_id": np.array([parse_id(r[1]) for r in rows], dtype=np.int64),
+        "votes": np.array([int(r[2]) for r in rows], dtype=np.int64),
+    }
+    # Each synced petition next to its latest interval; `action` decides what the day does to it
+    con.execute("""
+        CREATE OR REPLACE TEMP TABLE vote_batch AS
+        SELECT b.source, CAST(b.petition_id AS INTEGER) AS petition_id, CAST(b.votes AS INTEGER) AS votes,
+               CAST($day AS DATE) AS day,
+               l.valid_from, l.last_seen, l.votes AS current_votes,
+               CASE
+                   WHEN l.valid_from IS NULL THEN 'insert'
+                   WHEN CAST($day AS DATE) < l.valid_from THEN 'rebuild'
+                   WHEN b.votes = l.votes AND CAST($day AS DATE) <= l.last_seen + 1 THEN 'extend'
+                   WHEN CAST($day AS DATE) > l.last_seen THEN 'insert'
+                   WHEN CAST($day AS DATE) = l.valid_from AND CAST($day AS DATE) = l.last_seen THEN 'overwrite'
+                   WHEN CAST($day AS DATE) = l.last_seen THEN 'split'
+                   ELSE 'rebuild'
+               END AS action
+        FROM (SELECT DISTINCT ON (source, petition_id) * FROM batch) b
+        LEFT JOIN (
+            SELECT petition_id, source, valid_from, last_seen, votes
+            FROM votes_intervals
+            WHERE (petition_id, source) IN (SELECT petition_id, source FROM batch)
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY petition_id, source ORDER BY valid_from DESC) = 1
+        ) l ON l.petition_id = b.petition_id AND l.source = b.source
+    """, {"day": str(day)})
+    con.execute("""
+        UPDATE votes_intervals AS i
+        SET last_seen = GREATEST(i.last_seen, b.day)
+        FROM vote_batch b
+        WHERE b.action = 'extend'
+          AND i.petition_id = b.petition_id AND i.source = b.source AND i.valid_from = b.valid_from
+    """)
+    con.execute("""
+        UPDATE votes_intervals AS i
+        SET votes = b.votes
+        FROM vote_batch b
+        WHERE b.action = 'overwrite'
+          AND i.petition_id = b.petition_id AND i.source = b.source AND i.valid_from = b.valid_from
+    """)
+    con.execute("""
+        UPDATE votes_intervals AS i
+        SET last_seen = b.day - 1
+        FROM vote_batch b
+        WHERE b.action = 'split'
+          AND i.petition_id = b.petition_id AND i.source = b.source AND i.valid_from = b.valid_from
+    """)
+    con.execute("""
+        INSERT INTO votes_intervals
+        SELECT petition_id, source, day, day, votes
+        FROM vote_batch
+        WHERE action IN ('insert', 'split')
+    """)
+    rebuild = con.execute("SELECT COUNT(*) FROM vote_batch WHERE action = 'rebuild'").fetchone()[0]
+    if rebuild:
+        _rewrite_days(con)
+    count = con.execute("SELECT COUNT(*) FROM vote_batch").fetchone()[0]
+    con.execute("DROP TABLE vote_batch")
+    return count
+
+
+def _rewrite_days(con):
+    """
+    Slow path for days older than a petition's latest interval (late
+    backfills) and re-runs of a day before the end of it: the petition's
+    intervals are expanded, the day is set and the runs are collapsed again.
+    """
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE vote_rewrite AS
+        WITH points AS (
+            SELECT v.petition_id, v.source, v.date, v.votes
+            FROM votes_history v
+            JOIN vote_batch b ON b.petition_id = v.petition_id AND b.source = v.source
+            WHERE b.action = 'rebuild' AND v.date != b.day
+            UNION ALL
+            SELECT petition_id, source, day, votes FROM vote_batch WHERE action = 'rebuild'
+        ),
+        runs AS (
+            SELECT *, {RUN_SQL} AS run
+            FROM (
+                SELECT *, LAG(votes) OVER (PARTITION BY petition_id, source ORDER BY date) AS prev,
+                          LAG(date) OVER (PARTITION BY petition_id, source ORDER BY date) AS prev_date
+                FROM points
+            )
+        )
+        SELECT petition_id, source, MIN(date) AS valid_from, MAX(date) AS last_seen, ANY_VALUE(votes) AS votes
+        FROM runs
+        GROUP BY petition_id, source, run
+    """)
+    con.execute("""
+        DELETE FROM votes_intervals
+        WHERE (petition_id, source) IN (SELECT petition_id, source FROM vote_batch WHERE action = 'rebuild')
+    """)
+    con.execute("INSERT INTO votes_intervals SELECT * FROM vote_rewrite")
+    con.execute("DROP TABLE vote_rewrite")
+
+
+def latest_day(con):
+    """Latest synced day, without expanding the intervals."""
+    init_votes_tables(con)
+    return con.execute("SELECT MAX(last_seen) FROM votes_intervals").fetchone()[0]
+
+
+def storage_stats(con):
+    """(interval rows stored, daily points they expand to)."""
+    init_votes_tables(con)
+    return con.execute("""
+        SELECT COUNT(*), COALESCE(SUM(last_seen - valid_from + 1), 0) FROM votes_intervals
+    """).fetchone()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Change-only votes history storage")
+    parser.add_argument("--migrate", action="store_true", help="Convert a legacy votes_history table")
+    parser.add_argument("--stats", action="store_true", help="Show rows stored vs daily points")
+    parser.add_argument("--cloud", action="store_true", help="Run against MotherDuck instead of the local DB")
+    args = parser.parse_args()
+
+    if args.cloud:
+        from cloud_sync import get_motherduck_connection
+        con = get_motherduck_connection()
+    else:
+        con = duckdb.connect(DB_FILE)
+
+    try:
+        if args.migrate:
+            if _table_type(con, "votes_history") == "BASE TABLE":
+                migrate_votes_history(con)
+            else:
+                print("✅ votes_history is already a view over votes_intervals.")
+        if args.stats or not args.migrate:
+            stored, points = storage_stats(con)
+            ratio = points / stored if stored else 0
+            print(f"📦 {stored:,} intervals for {points:,} daily points ({ratio:.1f}x fewer rows)")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
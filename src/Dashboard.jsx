@@ -10,7 +10,7 @@ import {
     ArrowRight, Sparkles, BarChart3,
     Zap, Layers, Sun, Moon
 } from 'lucide-react';
-import data from './analytics_data.json';
+import { useManifest, useSection, useNearViewport } from './dataClient';
 
 // --- COLOR PALETTE ---
 const COLORS = {
@@ -127,8 +127,17 @@ const TIMELINE_EVENTS = [
 // --- MAIN DASHBOARD ---
 
 export default function Dashboard() {
-    const { overview, daily, analytics, insights, pipeline } = data;
+    // Above-the-fold sections load immediately; the rest when scrolled near
+    const [dailyRef, dailyVisible] = useNearViewport();
+    const [analyticsRef, analyticsVisible] = useNearViewport();
+    const pipeline = useManifest()?.pipeline || {};
+    const overview = useSection('overview') || {};
+    const insights = useSection('insights') || [];
+    const daily = useSection('daily', dailyVisible) || {};
+    const history = useSection('history', dailyVisible);
+    const analytics = useSection('analytics', analyticsVisible) || {};
     const [activeSource, setActiveSource] = useState('all');
+    const [historyZoom, setHistoryZoom] = useState('daily');
 
     // Dark mode with localStorage persistence
     const [isDark, setIsDark] = useState(() => {
@@ -152,7 +161,13 @@ export default function Dashboard() {
     }, [isDark]);
 
     // --- TRANSFORM DATA ---
-    const historyData = daily.history || [];
+    // History ships in three downsampled tiers (etl/downsample.py)
+    const historyTiers = history || {};
+    const historyData = historyTiers.daily || [];
+    const zoomedHistory = historyTiers[historyZoom] || [];
+    const zoomTickFormatter = historyZoom === 'monthly'
+        ? v => v.slice(0, 7)
+        : v => v.slice(5).replace('-', '.');
 
     const isSourceMatch = (source) => activeSource === 'all' || source === activeSource;
 
@@ -315,7 +330,7 @@ export default function Dashboard() {
                 </section>
 
                 {/* ═══════════════ BLOCK 2: DAILY DYNAMICS ═══════════════ */}
-                <section className="animate-in animate-in-delay-2">
+                <section ref={dailyRef} className="animate-in animate-in-delay-2">
                     <SectionHeader title="Daily Dynamics" subtitle={`Vote trends by source • ${daily.last_sync_date ? `Last sync: ${daily.last_sync_date}` : 'Since the last automated sync'}`} icon={TrendingUp} />
 
                     {/* KPI Row */}
@@ -338,7 +353,7 @@ export default function Dashboard() {
                         </div>
                         <div className="glass-card-static px-4 py-3 text-center">
                             <p className="text-xs text-[var(--text-muted)]">History Points</p>
-                            <p className="text-xl font-bold font-mono text-[var(--text-primary)]">{historyData.length}</p>
+                            <p className="text-xl font-bold font-mono text-[var(--text-primary)]">{historyTiers.days_tracked ?? historyData.length}</p>
                         </div>
                     </div>
 
@@ -381,16 +396,32 @@ export default function Dashboard() {
 
                         {/* RIGHT: All History — Area Chart */}
                         <GlassCard>
-                            <h3 className="text-lg font-bold text-[var(--text-primary)] mb-1">All History</h3>
+                            <div className="flex items-center justify-between mb-1">
+                                <h3 className="text-lg font-bold text-[var(--text-primary)]">All History</h3>
+                                <div className="glass-pill flex p-0.5">
+                                    {[['daily', '90D'], ['weekly', '2Y'], ['monthly', 'All']].map(([tier, label]) => (
+                                        <button
+                                            key={tier}
+                                            onClick={() => setHistoryZoom(tier)}
+                                            className={`px-2.5 py-1 text-[11px] font-semibold rounded-full transition-all ${historyZoom === tier
+                                                ? 'bg-emerald-600 text-white'
+                                                : 'text-[var(--text-muted)] hover:text-[var(--text-primary)]'
+                                                }`}
+                                        >
+                                            {label}
+                                        </button>
+                                    ))}
+                                </div>
+                            </div>
                             <p className="text-sm text-[var(--text-muted)] mb-4">
-                                {historyData.length > 0
-                                    ? `${historyData[0].date} → ${historyData[historyData.length - 1].date}`
+                                {zoomedHistory.length > 0
+                                    ? `${zoomedHistory[0].date} → ${zoomedHistory[zoomedHistory.length - 1].date}${historyZoom === 'daily' ? '' : ` • per ${historyZoom === 'weekly' ? 'week' : 'month'}`}`
                                     : 'Collecting data...'
                                 }
                             </p>
                             <div className="h-56">
                                 <ResponsiveContainer width="100%" height="100%">
-                                    <AreaChart data={historyData}>
+                                    <AreaChart data={zoomedHistory}>
                                         <defs>
                                             <linearGradient id="colorTotalDaily" x1="0" y1="0" x2="0" y2="1">
                                                 <stop offset="5%" stopColor="#10b981" stopOpacity={0.6} />
@@ -400,7 +431,7 @@ export default function Dashboard() {
                                         <XAxis
                                             dataKey="date"
                                             tick={{ fontSize: 10, fill: axisTickColor }}
-                                            tickFormatter={v => v.slice(5).replace('-', '.')}
+                                            tickFormatter={zoomTickFormatter}
                                             minTickGap={30}
                                             axisLine={false} tickLine={false}
                                         />
@@ -493,7 +524,7 @@ export default function Dashboard() {
                 </section>
 
                 {/* ═══════════════ BLOCK 3: ENGAGEMENT & CONTENT ═══════════════ */}
-                <section className="animate-in animate-in-delay-3">
+                <section ref={analyticsRef} className="animate-in animate-in-delay-3">
                     <SectionHeader title="Engagement & Content" subtitle="How petitions gather support and what drives votes" icon={BarChart3} />
 
                     <div className="grid grid-cols-1 md:grid-cols-2 gap-6">
@@ -574,7 +605,7 @@ export default function Dashboard() {
                             <p className="text-sm text-[var(--text-muted)] mb-6">Most impactful petition creators by total votes</p>
                             <div className="h-64">
                                 <ResponsiveContainer width="100%" height="100%">
-                                    <BarChart data={(analytics.top_authors || []).slice(0, 7)} layout="vertical">
+                                    <BarChart data={((activeSource === 'all' ? analytics.top_authors : analytics.top_authors_by_source?.[activeSource]) || []).slice(0, 7)} layout="vertical">
                                         <XAxis type="number" axisLine={false} tickLine={false} tick={{ fontSize: 10, fill: axisTickColor }} />
                                         <YAxis type="category" dataKey="author" width={120} tick={{ fontSize: 9, fill: axisTickColor }} axisLine={false} tickLine={false}
                                             tickFormatter={(v) => v.length > 18 ? v.substring(0, 18) + '…' : v} />
@@ -596,7 +627,7 @@ export default function Dashboard() {
                         {/* Category Breakdown */}
                         <GlassCard>
                             <h3 className="text-lg font-bold text-[var(--text-primary)] mb-1">Category Breakdown</h3>
-                            <p className="text-sm text-[var(--text-muted)] mb-6">Topic classification via keyword analysis</p>
+                            <p className="text-sm text-[var(--text-muted)] mb-6">Topic classification via keyword analysis · unique = near-duplicates merged</p>
                             <div className="space-y-3">
                                 {(analytics.categories || []).map((cat, i) => (
                                     <div key={cat.category}>
@@ -604,6 +635,11 @@ export default function Dashboard() {
                                             <span className="text-sm font-medium text-[var(--text-secondary)]">{cat.category}</span>
                                             <span className="text-sm font-mono text-[var(--text-muted)]">
                                                 {cat.count.toLocaleString()} <span className="text-xs">({cat.percentage}%)</span>
+                                                {cat.unique !== undefined && cat.unique < cat.count && (
+                                                    <span className="text-xs" title="Near-duplicate (templated) petitions merged">
+                                                        {' · '}{cat.unique.toLocaleString()} unique
+                                                    </span>
+                                                )}
                                             </span>
                                         </div>
                                         <div className="w-full bg-slate-200/50 dark:bg-slate-700/50 rounded-full h-2.5 overflow-hidden">
@@ -620,18 +656,24 @@ export default function Dashboard() {
                         {/* Keywords Top-10 */}
                         <GlassCard>
                             <h3 className="text-lg font-bold text-[var(--text-primary)] mb-1">Keywords Top-10</h3>
-                            <p className="text-sm text-[var(--text-muted)] mb-6">Most frequent words in petition titles</p>
+                            <p className="text-sm text-[var(--text-muted)] mb-6">Most frequent words in petition titles (grey: near-duplicates merged)</p>
                             <div className="h-64">
                                 <ResponsiveContainer width="100%" height="100%">
                                     <BarChart data={analytics.keywords_top10 || []} layout="vertical">
                                         <XAxis type="number" axisLine={false} tickLine={false} tick={{ fontSize: 10, fill: axisTickColor }} />
                                         <YAxis type="category" dataKey="word" width={100} tick={{ fontSize: 11, fill: axisTickColor }} axisLine={false} tickLine={false} />
-                                        <Tooltip contentStyle={tooltipStyle(isDark)} formatter={(v) => [`${v.toLocaleString()} occurrences`, 'Frequency']} />
-                                        <Bar dataKey="count" radius={[0, 6, 6, 0]} barSize={18}>
+                                        <Tooltip
+                                            contentStyle={tooltipStyle(isDark)}
+                                            formatter={(v, name) => name === 'unique'
+                                                ? [`${v.toLocaleString()} after merging near-duplicates`, 'Unique']
+                                                : [`${v.toLocaleString()} occurrences`, 'Frequency']}
+                                        />
+                                        <Bar dataKey="count" radius={[0, 6, 6, 0]} barSize={12}>
                                             {(analytics.keywords_top10 || []).map((_, index) => (
                                                 <Cell key={`cell-${index}`} fill={index < 3 ? COLORS.primary : index < 6 ? COLORS.secondary : '#94a3b8'} />
                                             ))}
                                         </Bar>
+                                        <Bar dataKey="unique" radius={[0, 6, 6, 0]} barSize={6} fill="#94a3b8" fillOpacity={0.6} />
                                     </BarChart>
                                 </ResponsiveContainer>
                             </div>
@@ -685,6 +727,9 @@ export default function Dashboard() {
                                             <th className="px-4 py-3 text-right">7-Day Growth</th>
                                             <th className="px-4 py-3 text-right">Daily Rate</th>
                                             <th className="px-4 py-3 text-right">Current Votes</th>
+                                            <th className="px-4 py-3 text-right">25k ETA</th>
+                                            <th className="px-4 py-3 text-right">Forecast</th>
+                                            <th className="px-4 py-3 text-right">P(25k)</th>
                                         </tr>
                                     </thead>
                                     <tbody className="divide-y divide-[var(--border-color)]">
@@ -696,10 +741,62 @@ export default function Dashboard() {
                                                         title={v.title}>
                                                         {v.title}
                                                     </a>
+                                                    {v.similar?.length > 0 && (
+                                                        <div className="mt-1 text-xs text-[var(--text-muted)] line-clamp-1">
+                                                            Similar:{' '}
+                                                            {v.similar.map((s, j) => (
+                                                                <span key={s.url}>
+                                                                    {j > 0 && ' · '}
+                                                                    <a href={s.url} target="_blank" rel="noopener noreferrer"
+                                                                        className="hover:text-indigo-500 transition-colors" title={s.title}>
+                                                                        {s.title.length > 40 ? `${s.title.slice(0, 40)}…` : s.title}
+                                                                    </a>
+                                                                </span>
+                                                            ))}
+                                                        </div>
+                                                    )}
                                                 </td>
                                                 <td className="px-4 py-3 text-right font-bold text-amber-500 font-mono">+{v.growth_7d?.toLocaleString()}</td>
                                                 <td className="px-4 py-3 text-right font-mono text-[var(--text-secondary)]">~{v.daily_rate?.toLocaleString()}/day</td>
                                                 <td className="px-4 py-3 text-right font-mono text-[var(--text-secondary)]">{v.votes_current?.toLocaleString()}</td>
+                                                <td className="px-4 py-3 text-right font-mono text-[var(--text-muted)]">{v.projected_25k || '—'}</td>
+                                                <td className="px-4 py-3 text-right font-mono text-[var(--text-secondary)]">{v.predicted_final != null ? `~${v.predicted_final.toLocaleString()}` : '—'}</td>
+                                                <td className="px-4 py-3 text-right font-mono text-[var(--text-muted)]">{v.p_25k != null ? `${Math.round(v.p_25k * 100)}%` : '—'}</td>
+                                            </tr>
+                                        ))}
+                                    </tbody>
+                                </table>
+                            </div>
+                        </GlassCard>
+                    </section>
+                )}
+
+                {/* ═══════════════ BLOCK 6: FUNNEL ═══════════════ */}
+                {analytics.funnel?.totals?.length > 0 && (
+                    <section>
+                        <SectionHeader title="Petition Funnel" subtitle="From 25,000 signatures to an official answer" icon={CheckCircle} />
+                        <GlassCard>
+                            <div className="overflow-x-auto">
+                                <table className="w-full text-sm">
+                                    <thead className="text-xs text-[var(--text-muted)] uppercase font-medium">
+                                        <tr className="border-b border-[var(--border-color)]">
+                                            <th className="px-4 py-3 text-left">Platform</th>
+                                            <th className="px-4 py-3 text-right">Petitions</th>
+                                            <th className="px-4 py-3 text-right">Reached 25k</th>
+                                            <th className="px-4 py-3 text-right">In Review</th>
+                                            <th className="px-4 py-3 text-right">Answered</th>
+                                            <th className="px-4 py-3 text-right">Answer Rate</th>
+                                        </tr>
+                                    </thead>
+                                    <tbody className="divide-y divide-[var(--border-color)]">
+                                        {analytics.funnel.totals.map((f) => (
+                                            <tr key={f.source} className="hover:bg-[var(--accent-glow)] transition-colors">
+                                                <td className="px-4 py-3 font-medium text-[var(--text-primary)] capitalize">{f.source}</td>
+                                                <td className="px-4 py-3 text-right font-mono text-[var(--text-secondary)]">{f.petitions.toLocaleString()}</td>
+                                                <td className="px-4 py-3 text-right font-mono text-[var(--text-secondary)]">{f.reached_25k.toLocaleString()}</td>
+                                                <td className="px-4 py-3 text-right font-mono text-[var(--text-secondary)]">{f.in_review.toLocaleString()}</td>
+                                                <td className="px-4 py-3 text-right font-mono text-[var(--text-secondary)]">{f.answered.toLocaleString()}</td>
+                                                <td className="px-4 py-3 text-right font-bold text-emerald-500 font-mono">{f.answer_rate != null ? `${f.answer_rate}%` : '—'}</td>
                                             </tr>
                                         ))}
                                     </tbody>
@@ -0,0 +1,130 @@
+import { useState, useEffect, useRef } from 'react';
+
+// The ETL writes public/data/manifest.json plus one content-hashed shard per
+// section. The manifest is always revalidated; shards are immutable, so a
+// section is only re-downloaded when its hash (file name) changes.
+const DATA_URL = '/data';
+
+// Precompressed copies live under shards/br/ and shards/gz/ and are served
+// with a matching Content-Encoding (see netlify.toml). The dev server does
+// not set those headers, so it always gets the plain shard.
+const ENCODINGS = import.meta.env.PROD ? ['br', 'gz'] : [];
+
+function shardUrl(entry) {
+    const encoding = ENCODINGS.find(ext => entry[`${ext}_bytes`] !== undefined);
+    return encoding
+        ? `${DATA_URL}/${entry.file.replace('shards/', `shards/${encoding}/`)}`
+        : `${DATA_URL}/${entry.file}`;
+}
+
+// The export may ship big arrays as {"$columns": {key: [...]}} (parallel
+// arrays); expand them back into arrays of objects, at any depth.
+export function decodeColumns(value) {
+    if (Array.isArray(value)) return value.map(decodeColumns);
+    if (!value || typeof value !== 'object') return value;
+    if (value.$columns) {
+        const columns = Object.entries(value.$columns);
+        const length = columns.length ? columns[0][1].length : 0;
+        return Array.from({ length }, (_, i) =>
+            Object.fromEntries(columns.map(([key, values]) => [key, values[i]])));
+    }
+    return Object.fromEntries(Object.entries(value).map(([k, v]) => [k, decodeColumns(v)]));
+}
+
+let manifestPromise = null;
+const shardCache = new Map();
+
+export function loadManifest() {
+    if (!manifestPromise) {
+        manifestPromise = fetch(`${DATA_URL}/manifest.json`, { cache: 'no-cache' })
+            .then(res => {
+                if (!res.ok) throw new Error(`manifest: HTTP ${res.status}`);
+                return res.json();
+            })
+            .catch(err => {
+                manifestPromise = null;
+                throw err;
+            });
+    }
+    return manifestPromise;
+}
+
+export function loadSection(name) {
+    return loadManifest().then(manifest => {
+        const entry = manifest.sections?.[name];
+        if (!entry) throw new Error(`manifest has no section "${name}"`);
+
+        if (!shardCache.has(entry.file)) {
+            const request = fetch(shardUrl(entry))
+                .then(res => {
+                    if (!res.ok) throw new Error(`${name}: HTTP ${res.status}`);
+                    return res.json();
+                })
+                .then(decodeColumns)
+                .catch(err => {
+                    shardCache.delete(entry.file);
+                    throw err;
+                });
+            shardCache.set(entry.file, request);
+        }
+        return shardCache.get(entry.file);
+    });
+}
+
+// Returns the manifest once loaded (null until then).
+export function useManifest() {
+    const [manifest, setManifest] = useState(null);
+
+    useEffect(() => {
+        let active = true;
+        loadManifest()
+            .then(m => active && setManifest(m))
+            .catch(err => console.error('Failed to load data manifest:', err));
+        return () => { active = false; };
+    }, []);
+
+    return manifest;
+}
+
+// Returns a section's data once loaded (null until then). Nothing is fetched
+// while `enabled` is false, so below-the-fold sections can wait for scrolling.
+export function useSection(name, enabled = true) {
+    const [data, setData] = useState(null);
+
+    useEffect(() => {
+        if (!enabled) return;
+        let active = true;
+        loadSection(name)
+            .then(d => active && setData(d))
+            .catch(err => console.error(`Failed to load section "${name}":`, err));
+        return () => { active = false; };
+    }, [name, enabled]);
+
+    return data;
+}
+
+// Returns [ref, isNear]: isNear flips to true (once) when the element comes
+// within `margin` of the viewport.
+export function useNearViewport(margin = '600px') {
+    const ref = useRef(null);
+    const [isNear, setIsNear] = useState(false);
+
+    useEffect(() => {
+        if (isNear) return;
+        const el = ref.current;
+        if (!el || typeof IntersectionObserver === 'undefined') {
+            setIsNear(true);
+            return;
+        }
+        const observer = new IntersectionObserver(entries => {
+            if (entries.some(e => e.isIntersecting)) {
+                setIsNear(true);
+                observer.disconnect();
+            }
+        }, { rootMargin: margin });
+        observer.observe(el);
+        return () => observer.disconnect();
+    }, [isNear, margin]);
+
+    return [ref, isNear];
+}